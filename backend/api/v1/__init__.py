@@ -1,5 +1,15 @@
 from fastapi import APIRouter
 from .routes import conversations, webhooks, voice_memos
+from clients.registry import registry
+from middleware.auth import token_cache
+from services.voice_memo_service import upload_dedup_stats
+from services.live_transcription import live_stats
+from services.quota_service import quota_cache
+from dependencies import DatabaseServiceDep
+import metrics
+import logging
+
+logger = logging.getLogger(__name__)
 
 v1_router = APIRouter(prefix="/v1")
 
@@ -10,4 +20,80 @@ v1_router.include_router(voice_memos.router)
 
 @v1_router.get("/health")
 def health():
-    return {"status": "healthy", "message": "Sonanta is here and alive!"}
\ No newline at end of file
+    return {"status": "healthy", "message": "Sonanta is here and alive!"}
+
+@v1_router.get("/health/pools")
+def pool_stats():
+    return registry.stats()
+
+
+@v1_router.get("/health/auth-cache")
+def auth_cache_stats():
+    return token_cache.stats()
+
+
+@v1_router.get("/health/response-cache")
+async def response_cache_stats():
+    return await registry.response_cache.stats()
+
+
+@v1_router.get("/health/events")
+async def event_bus_stats():
+    return await registry.event_bus.stats()
+
+
+@v1_router.get("/health/quota-cache")
+def quota_cache_stats():
+    return quota_cache.stats()
+
+
+@v1_router.get("/health/queue")
+async def queue_stats():
+    return await registry.job_queue.stats()
+
+
+async def collect_runtime_metrics() -> None:
+    """Snapshot the in-process counters behind the health endpoints for /metrics."""
+    caches = {
+        "auth": token_cache.stats(),
+        "quota": quota_cache.stats(),
+        "upload_dedup": dict(upload_dedup_stats),
+        "response": await registry.response_cache.stats()
+    }
+    gauges = {}
+    
+    pool_stats = registry.stats()
+    if "signed_url_pool" in pool_stats:
+        caches["signed_url_pool"] = pool_stats["signed_url_pool"]
+        gauges["signed_url_pool_available"] = pool_stats["signed_url_pool"]["available"]
+    
+    gauges["live_recordings"] = live_stats["active"]
+    
+    event_stats = await registry.event_bus.stats()
+    if "subscribers" in event_stats:
+        gauges["event_subscribers"] = event_stats["subscribers"]
+    
+    try:
+        queue = await registry.job_queue.stats()
+    except Exception:
+        # a scrape still reports latencies when the queue is unreachable
+        logger.exception("Failed to read queue stats for metrics")
+        queue = {}
+    
+    metrics.runtime.update(caches, queue, gauges)
+
+
+@v1_router.get("/health/content-cache")
+async def content_cache_stats(database_service: DatabaseServiceDep):
+    # every cache entry was created by exactly one miss
+    stats = {}
+    for row in await database_service.get_content_cache_stats():
+        lookups = row["entries"] + row["hits"]
+        stats[row["kind"]] = {**row, "hit_rate": round(row["hits"] / lookups, 4) if lookups else 0.0}
+    
+    uploads = upload_dedup_stats["hits"] + upload_dedup_stats["misses"]
+    stats["uploads"] = {
+        **upload_dedup_stats,
+        "hit_rate": round(upload_dedup_stats["hits"] / uploads, 4) if uploads else 0.0
+    }
+    return stats
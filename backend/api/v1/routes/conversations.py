@@ -1,6 +1,17 @@
-from fastapi import APIRouter, HTTPException
-from typing import Dict, Any
-from dependencies import ConversationServiceDep, DatabaseServiceDep, CurrentUser
+from fastapi import APIRouter, HTTPException, Query
+from typing import Dict, Any, Optional
+from dependencies import (
+    ConversationServiceDep,
+    DatabaseServiceDep,
+    ResponseCacheDep,
+    QuotaServiceDep,
+    CurrentUser
+)
+from services.pagination import decode_cursor, paginate
+from services.projections import select_columns
+from services.memo_context import get_memo_context
+from services.quota_service import CONVERSATION
+import asyncio
 
 router = APIRouter(prefix="/conversations", tags=["conversations"])
 
@@ -9,21 +20,34 @@ router = APIRouter(prefix="/conversations", tags=["conversations"])
 async def start_conversation(
     conversation_service: ConversationServiceDep,
     database_service: DatabaseServiceDep,
+    response_cache: ResponseCacheDep,
+    quota_service: QuotaServiceDep,
     current_user: CurrentUser
 ) -> Dict[str, Any]:
     try:
-        signed_url = await conversation_service.get_signed_url()
+        user_id = str(current_user.id)
+        _, context = await asyncio.gather(
+            quota_service.check(user_id, CONVERSATION),
+            get_memo_context(user_id, database_service, response_cache)
+        )
         
-        conversation = await database_service.create_conversation(
-            user_id=str(current_user.id),
-            metadata={"signed_url": signed_url}
+        # a pooled URL is ready at once, a direct fetch overlaps the insert
+        signed_url, conversation = await asyncio.gather(
+            conversation_service.get_signed_url(),
+            database_service.create_conversation(
+                user_id=user_id,
+                context_memo_ids=context["memo_ids"]
+            )
         )
         
         return {
             "conversation_id": conversation["id"],
             "signed_url": signed_url,
-            "user_id": str(current_user.id)
+            "user_id": user_id,
+            "context": context
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -54,20 +78,28 @@ async def get_conversation(
 async def list_conversations(
     database_service: DatabaseServiceDep,
     current_user: CurrentUser,
-    limit: int = 10,
-    offset: int = 0
+    limit: int = Query(10, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None  # "summary" (default), "full" or comma-separated columns
 ) -> Dict[str, Any]:
     try:
         conversations = await database_service.get_user_conversations(
             user_id=str(current_user.id),
-            limit=limit,
-            offset=offset
+            limit=limit + 1,
+            offset=offset,
+            after=decode_cursor(cursor),
+            columns=select_columns("conversations", fields)
         )
+        conversations, next_cursor = paginate(conversations, limit)
         
         return {
             "conversations": conversations,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
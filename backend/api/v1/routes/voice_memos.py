@@ -1,66 +1,537 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Header, Body, Query, Request, Response, WebSocket, WebSocketDisconnect
 from typing import Dict, Any, List, Optional
-from dependencies import VoiceMemoServiceDep, CurrentUser
+from fastapi.responses import StreamingResponse
+from dependencies import (
+    VoiceMemoServiceDep,
+    ResumableUploadServiceDep,
+    ResponseCacheDep,
+    DatabaseServiceDep,
+    EventBusDep,
+    SearchServiceDep,
+    QuotaServiceDep,
+    StreamingSTTDep,
+    SupabaseDep,
+    CurrentUser
+)
+from services.upload_service import spool_upload
+from services.pagination import decode_cursor, paginate
+from services.projections import select_columns
+from services.http_cache import cached_read
+from services.status_events import status_stream
+from services.search_service import SEARCH_MODES
+from services.quota_service import RECORDING
+from services.live_transcription import LiveRecording
+from clients.streaming_stt import SAMPLE_RATES
+from middleware.auth import verify_token
+from config import config
+import asyncio
+import base64
+import json
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/voice-memos", tags=["voice-memos"])
 
+ALLOWED_TYPES = ["audio/mpeg", "audio/mp3", "audio/wav", "audio/m4a", "audio/webm"]
+
+
+def _check_content_type(content_type: Optional[str]) -> None:
+    if content_type not in ALLOWED_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_TYPES)}"
+        )
+
+
+def _parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+    # TUS Upload-Metadata: comma separated "key base64(value)" pairs
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            metadata[parts[0]] = base64.b64decode(parts[1]).decode() if len(parts) > 1 else ""
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid Upload-Metadata header")
+    return metadata
+
+
+def _batch_ids(ids: List[str]) -> List[str]:
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > config.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {config.batch_max_items} ids per batch"
+        )
+    return ids
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _upload_headers(upload: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "Tus-Resumable": "1.0.0",
+        "Upload-Offset": str(upload["offset"]),
+        "Upload-Length": str(upload["length"]),
+        "Cache-Control": "no-store"
+    }
+
 
 @router.post("/upload")
 async def upload_voice_memo(
-    background_tasks: BackgroundTasks,
     voice_memo_service: VoiceMemoServiceDep,
+    quota_service: QuotaServiceDep,
     current_user: CurrentUser,
     file: UploadFile = File(...),
     title: Optional[str] = Form(None)
 ) -> Dict[str, Any]:
+    audio = None
     try:
-        allowed_types = ["audio/mpeg", "audio/mp3", "audio/wav", "audio/m4a", "audio/webm"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Invalid file type. Allowed types: {', '.join(allowed_types)}"
-            )
+        _check_content_type(file.content_type)
+        await quota_service.check(str(current_user.id), RECORDING)
         
-        content = await file.read()
+        audio = await spool_upload(file)
         
-        voice_memo = await voice_memo_service.upload_voice_memo(
+        voice_memo = await voice_memo_service.upload_spooled_voice_memo(
             user_id=str(current_user.id),
-            file_content=content,
+            audio=audio,
             filename=file.filename,
             content_type=file.content_type,
             title=title
         )
         
-        background_tasks.add_task(
-            voice_memo_service.start_transcription,
-            voice_memo["id"]
+        if not voice_memo.get("deduplicated"):
+            await voice_memo_service.start_transcription(voice_memo, audio)
+        
+        return voice_memo
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if audio:
+            audio.discard()
+
+
+@router.post("/uploads", status_code=201)
+async def create_resumable_upload(
+    request: Request,
+    response: Response,
+    upload_service: ResumableUploadServiceDep,
+    quota_service: QuotaServiceDep,
+    current_user: CurrentUser,
+    upload_length: int = Header(...),
+    upload_metadata: Optional[str] = Header(None)
+) -> Dict[str, Any]:
+    metadata = _parse_upload_metadata(upload_metadata)
+    content_type = metadata.get("content_type") or metadata.get("filetype")
+    _check_content_type(content_type)
+    await quota_service.check(str(current_user.id), RECORDING)
+    
+    upload = upload_service.create(
+        user_id=str(current_user.id),
+        length=upload_length,
+        filename=metadata.get("filename", "recording"),
+        content_type=content_type,
+        title=metadata.get("title")
+    )
+    
+    response.headers.update(_upload_headers(upload))
+    response.headers["Location"] = f"{request.url.path.rstrip('/')}/{upload['id']}"
+    return {"upload_id": upload["id"], "offset": upload["offset"], "length": upload["length"]}
+
+
+@router.head("/uploads/{upload_id}")
+async def get_resumable_upload_offset(
+    upload_id: str,
+    upload_service: ResumableUploadServiceDep,
+    current_user: CurrentUser
+) -> Response:
+    upload = upload_service.get(upload_id, str(current_user.id))
+    return Response(status_code=200, headers=_upload_headers(upload))
+
+
+@router.patch("/uploads/{upload_id}")
+async def append_resumable_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    upload_service: ResumableUploadServiceDep,
+    voice_memo_service: VoiceMemoServiceDep,
+    current_user: CurrentUser,
+    upload_offset: int = Header(...)
+) -> Dict[str, Any]:
+    user_id = str(current_user.id)
+    async with upload_service.lock(upload_id):
+        upload = await upload_service.append(upload_id, user_id, upload_offset, request.stream())
+        response.headers.update(_upload_headers(upload))
+        
+        if upload["offset"] < upload["length"]:
+            return {"upload_id": upload_id, "offset": upload["offset"], "length": upload["length"]}
+        
+        # on failure the staged bytes are kept, so an empty PATCH at the final
+        # offset retries the hand-off to storage
+        audio = await upload_service.complete(upload_id, user_id)
+        try:
+            voice_memo = await voice_memo_service.upload_spooled_voice_memo(
+                user_id=user_id,
+                audio=audio,
+                filename=upload["filename"],
+                content_type=upload["content_type"],
+                title=upload["title"]
+            )
+            
+            if not voice_memo.get("deduplicated"):
+                await voice_memo_service.start_transcription(voice_memo, audio)
+        
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        upload_service.discard(upload_id)
+    
+    return {"upload_id": upload_id, "offset": upload["offset"], "length": upload["length"], "voice_memo": voice_memo}
+
+
+@router.post("/upload-url")
+async def create_direct_upload_url(
+    voice_memo_service: VoiceMemoServiceDep,
+    quota_service: QuotaServiceDep,
+    current_user: CurrentUser,
+    content_type: str = Body(..., embed=True)
+) -> Dict[str, Any]:
+    # the client PUTs the audio straight to storage, then calls /finalize
+    _check_content_type(content_type)
+    user_id = str(current_user.id)
+    await quota_service.check(user_id, RECORDING)
+    
+    try:
+        signed = await voice_memo_service.create_upload_url(user_id, content_type)
+        return {**signed, "max_bytes": config.max_upload_bytes}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/finalize")
+async def finalize_direct_upload(
+    voice_memo_service: VoiceMemoServiceDep,
+    current_user: CurrentUser,
+    path: str = Body(..., embed=True),
+    title: Optional[str] = Body(None, embed=True),
+    filename: Optional[str] = Body(None, embed=True)
+) -> Dict[str, Any]:
+    user_id = str(current_user.id)
+    if not voice_memo_service.owns_upload_path(user_id, path):
+        raise HTTPException(status_code=400, detail="Invalid upload path")
+    
+    try:
+        uploaded = await voice_memo_service.get_uploaded_object(path)
+        if not uploaded:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        
+        size = (uploaded.get("metadata") or {}).get("size")
+        if size is not None and size > config.max_upload_bytes:
+            await voice_memo_service.remove_upload(path)
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {config.max_upload_bytes} bytes"
+            )
+        
+        voice_memo = await voice_memo_service.finalize_upload(
+            user_id=user_id,
+            path=path,
+            size_bytes=size,
+            title=title,
+            filename=filename
         )
         
+        if not voice_memo.get("deduplicated"):
+            await voice_memo_service.start_transcription(voice_memo)
+        
         return voice_memo
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _is_stop(text: str) -> bool:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return False
+    return isinstance(message, dict) and message.get("type") == "stop"
+
+
+async def _forward_transcript(websocket: WebSocket, recording: LiveRecording) -> None:
+    try:
+        async for event in recording.events():
+            await websocket.send_json(event)
+    except (WebSocketDisconnect, RuntimeError):
+        # the client left, the transcript is still collected for the memo
+        pass
+
+
+@router.websocket("/stream")
+async def stream_voice_memo(
+    websocket: WebSocket,
+    voice_memo_service: VoiceMemoServiceDep,
+    quota_service: QuotaServiceDep,
+    supabase_client: SupabaseDep,
+    streaming_stt: StreamingSTTDep
+) -> None:
+    """Record a memo over a WebSocket, transcribing it while it is recorded.
+
+    Browsers cannot set headers on a WebSocket, so the first message carries
+    the token: ``{"type": "start", "token", "title", "sample_rate", "language"}``.
+    Binary messages are 16-bit little-endian mono PCM at that sample rate and
+    ``{"type": "stop"}`` ends the recording. The server sends ``partial`` and
+    ``segment`` events as the audio is transcribed, then ``completed`` with
+    the stored memo. A dropped connection still stores what was recorded.
+    """
+    await websocket.accept()
+    
+    try:
+        message = await asyncio.wait_for(websocket.receive(), config.streaming_idle_timeout_seconds)
+        if message["type"] == "websocket.disconnect":
+            return
+        if message.get("text") is None:
+            # audio before the start message
+            await websocket.close(code=1003)
+            return
+        start = json.loads(message["text"])
+        if not isinstance(start, dict) or start.get("type") != "start":
+            raise HTTPException(status_code=400, detail="Expected a start message")
+        current_user = await verify_token(str(start.get("token") or ""), supabase_client)
+        sample_rate = int(start.get("sample_rate") or config.streaming_sample_rate)
+        if sample_rate not in SAMPLE_RATES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid sample rate. Allowed rates: {', '.join(map(str, SAMPLE_RATES))}"
+            )
+        user_id = str(current_user.id)
+        await quota_service.check(user_id, RECORDING)
+    except HTTPException as e:
+        await websocket.send_json({"type": "error", "status": e.status_code, "detail": e.detail})
+        await websocket.close(code=1008)
+        return
+    except (asyncio.TimeoutError, ValueError, TypeError):
+        await websocket.close(code=1008)
+        return
+    except WebSocketDisconnect:
+        return
+    
+    recording = LiveRecording(streaming_stt, sample_rate, start.get("language"))
+    forward = None
+    connected = True
+    stopped_by = "client"
+    audio = None
+    try:
+        await recording.start()
+        await websocket.send_json({"type": "ready", "sample_rate": sample_rate, "live": recording.session is not None})
+        forward = asyncio.create_task(_forward_transcript(websocket, recording))
+        
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), config.streaming_idle_timeout_seconds)
+            except asyncio.TimeoutError:
+                stopped_by = "idle"
+                break
+            
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                stopped_by = "disconnect"
+                break
+            if message.get("bytes"):
+                if len(message["bytes"]) % 2:
+                    # a split sample would shift every later one by a byte
+                    await websocket.send_json({"type": "error", "status": 400, "detail": "Audio frames must hold whole 16-bit samples, frame dropped"})
+                    continue
+                try:
+                    await recording.write(message["bytes"])
+                except HTTPException:
+                    # keep what fits rather than losing the recording
+                    stopped_by = "max_size"
+                    break
+            elif message.get("text") and _is_stop(message["text"]):
+                break
+        
+        if not recording.size_bytes:
+            if connected:
+                await websocket.send_json({"type": "error", "status": 400, "detail": "No audio received"})
+                await websocket.close(code=1008)
+            return
+        
+        # flushes the last segment, the forwarder ends with the session
+        audio, transcript = await recording.finish()
+        await forward
+        
+        voice_memo = await voice_memo_service.store_live_recording(
+            user_id=user_id,
+            audio=audio,
+            transcript=transcript,
+            duration_seconds=recording.duration_seconds,
+            title=start.get("title")
+        )
+        
+        if connected:
+            await websocket.send_json({"type": "completed", "stopped_by": stopped_by, "voice_memo": voice_memo})
+            await websocket.close()
+    
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.exception("Live recording failed for %s", user_id)
+        if connected:
+            await websocket.send_json({"type": "error", "status": 500, "detail": str(e)})
+            await websocket.close(code=1011)
+    finally:
+        if forward:
+            forward.cancel()
+        if audio:
+            audio.discard()
+        else:
+            await recording.discard()
+
+
+@router.get("/events")
+async def voice_memo_events(
+    request: Request,
+    database_service: DatabaseServiceDep,
+    event_bus: EventBusDep,
+    current_user: CurrentUser
+) -> StreamingResponse:
+    # one authenticated stream replaces polling GET /{memo_id} per memo
+    return StreamingResponse(
+        status_stream(event_bus, database_service, str(current_user.id), request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/search")
+async def search_voice_memos(
+    q: str,
+    search_service: SearchServiceDep,
+    current_user: CurrentUser,
+    limit: int = Query(10, ge=1, le=100),
+    mode: str = "hybrid",
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    if mode not in SEARCH_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid mode. Allowed modes: {', '.join(SEARCH_MODES)}"
+        )
+    
+    try:
+        start = time.perf_counter()
+        results = await search_service.search(
+            user_id=str(current_user.id),
+            query=q,
+            limit=limit,
+            mode=mode,
+            fields=fields
+        )
         
+        return {
+            "results": results,
+            "query": q,
+            "mode": mode,
+            "took_ms": round((time.perf_counter() - start) * 1000, 2)
+        }
+    
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/batch-get")
+async def batch_get_voice_memos(
+    voice_memo_service: VoiceMemoServiceDep,
+    current_user: CurrentUser,
+    ids: List[str] = Body(..., embed=True),
+    fields: Optional[str] = Body("full", embed=True)  # as for GET /, but the whole row by default
+) -> Dict[str, Any]:
+    ids = _batch_ids(ids)
+    columns = select_columns("voice_memos", fields)
+    # a malformed id would fail the whole in_ query, it just isn't found
+    valid_ids = [memo_id for memo_id in ids if _is_uuid(memo_id)]
+    
+    try:
+        memos = await voice_memo_service.get_voice_memos_batch(str(current_user.id), valid_ids, columns) if valid_ids else {}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "results": [
+            {"id": memo_id, "status": "ok", "voice_memo": memos[memo_id]} if memo_id in memos
+            else {"id": memo_id, "status": "not_found"}
+            for memo_id in ids
+        ]
+    }
+
+
+@router.post("/batch-delete")
+async def batch_delete_voice_memos(
+    voice_memo_service: VoiceMemoServiceDep,
+    current_user: CurrentUser,
+    ids: List[str] = Body(..., embed=True)
+) -> Dict[str, Any]:
+    ids = _batch_ids(ids)
+    valid_ids = [memo_id for memo_id in ids if _is_uuid(memo_id)]
+    
+    try:
+        outcomes = await voice_memo_service.delete_voice_memos(str(current_user.id), valid_ids) if valid_ids else {}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "results": [
+            {"id": memo_id, "status": outcomes.get(memo_id, "not_found")}
+            for memo_id in ids
+        ]
+    }
+
+
 @router.get("/{memo_id}")
 async def get_voice_memo(
     memo_id: str,
+    request: Request,
     voice_memo_service: VoiceMemoServiceDep,
+    response_cache: ResponseCacheDep,
     current_user: CurrentUser
-) -> Dict[str, Any]:
-    try:
+) -> Response:
+    user_id = str(current_user.id)
+    
+    async def load() -> Dict[str, Any]:
         voice_memo = await voice_memo_service.get_voice_memo(
             memo_id=memo_id,
-            user_id=str(current_user.id)
+            user_id=user_id
         )
         
         if not voice_memo:
             raise HTTPException(status_code=404, detail="Voice memo not found")
         
         return voice_memo
-        
+    
+    try:
+        return await cached_read(request, response_cache, user_id, load)
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -69,29 +540,47 @@ async def get_voice_memo(
 
 @router.get("/")
 async def list_voice_memos(
+    request: Request,
     voice_memo_service: VoiceMemoServiceDep,
+    response_cache: ResponseCacheDep,
     current_user: CurrentUser,
-    limit: int = 20,
-    offset: int = 0,
-    tags: Optional[str] = None  # Comma-separated tags
-) -> Dict[str, Any]:
-    try:
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
+    tags: Optional[str] = None,  # Comma-separated tags
+    fields: Optional[str] = None  # "summary" (default), "full" or comma-separated columns
+) -> Response:
+    user_id = str(current_user.id)
+    
+    async def load() -> Dict[str, Any]:
         tag_list = None
         if tags:
             tag_list = [tag.strip() for tag in tags.split(",")]
         
         voice_memos = await voice_memo_service.list_voice_memos(
-            user_id=str(current_user.id),
-            limit=limit,
+            user_id=user_id,
+            limit=limit + 1,
             offset=offset,
-            tags=tag_list
+            tags=tag_list,
+            after=decode_cursor(cursor),
+            columns=select_columns("voice_memos", fields)
         )
+        voice_memos, next_cursor = paginate(voice_memos, limit)
         
         return {
             "voice_memos": voice_memos,
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": next_cursor
         }
-        
+    
+    try:
+        return await cached_read(
+            request, response_cache, user_id, load,
+            memos=lambda payload: payload["voice_memos"]
+        )
+    
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,20 +1,45 @@
-from fastapi import APIRouter, HTTPException, Request
-from typing import Dict, Any
+from fastapi import APIRouter, Header, HTTPException, Request
+from typing import Annotated, Dict, Any, Optional
+from dependencies import DatabaseServiceDep, JobQueueDep
+from middleware.webhook_signature import verify_elevenlabs_signature
+from services.conversation_webhooks import compact_webhook
 import json
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
 
-@router.post("/conversation-end")
-async def conversation_end_webhook(request: Request) -> Dict[str, str]:
+@router.post("/conversation-end", status_code=202)
+async def conversation_end_webhook(
+    request: Request,
+    database_service: DatabaseServiceDep,
+    job_queue: JobQueueDep,
+    elevenlabs_signature: Annotated[Optional[str], Header()] = None
+) -> Dict[str, Any]:
+    body = await request.body()
+    verify_elevenlabs_signature(body, elevenlabs_signature)
+    
     try:
-        payload = await request.json()
-        
-        print(f"\n=== ELEVENLABS WEBHOOK PAYLOAD ===\n{json.dumps(payload, indent=2)}\n===================================\n")
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    
+    if payload.get("type", "post_call_transcription") != "post_call_transcription":
+        return {"status": "ignored"}
+    
+    webhook = compact_webhook(payload.get("data") or {})
+    elevenlabs_id = webhook["elevenlabs_conversation_id"]
+    if not elevenlabs_id:
+        raise HTTPException(status_code=400, detail="Missing conversation_id")
+    
+    try:
+        existing = await database_service.get_conversation_by_elevenlabs_id(elevenlabs_id)
+        if existing and existing.get("ended_at"):
+            return {"status": "duplicate", "conversation_id": existing["id"]}
         
-        # TODO: Process webhook once we know the structure
+        # picked up by worker.py, see services/conversation_webhooks.py
+        job_id = await job_queue.enqueue("ingest_conversation", webhook)
         
-        return {"status": "received", "message": "Webhook payload logged"}
+        return {"status": "accepted", "job_id": job_id}
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
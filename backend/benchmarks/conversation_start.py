@@ -0,0 +1,97 @@
+"""POST /conversations/start latency with and without the signed URL pool.
+
+    python -m benchmarks.conversation_start --starts 200 --elevenlabs-ms 250
+
+ElevenLabs is a local fake behind the shared HTTP client that answers the
+signed URL request after --elevenlabs-ms (with jitter); the conversation
+insert sleeps --insert-ms. Starts arrive every --interval-ms, so the pool
+has time to refill between them the way it would under real traffic.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from types import SimpleNamespace
+import httpx
+from config import config
+from clients.registry import registry
+from dependencies import get_current_user
+from main import app
+from services.database_service import DatabaseService
+
+
+def _fake_elevenlabs(latency: float) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency * random.uniform(0.7, 1.6))
+        return httpx.Response(200, json={"signed_url": f"wss://api.elevenlabs.io/v1/convai/conversation?token={uuid.uuid4().hex}"})
+    
+    return httpx.MockTransport(handler)
+
+
+def _fake_database(insert_latency: float) -> None:
+    async def create_conversation(self, user_id, **kwargs):
+        await asyncio.sleep(insert_latency)
+        return {"id": str(uuid.uuid4()), "user_id": user_id}
+    
+    async def get_memo_context(self, user_id):
+        return {"memo_ids": [], "digest": ""}
+    
+    DatabaseService.create_conversation = create_conversation
+    DatabaseService.get_memo_context = get_memo_context
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+
+async def _run(args, pool_size: int):
+    config.signed_url_pool_size = pool_size
+    registry.startup()
+    registry.http["elevenlabs"].client._transport = _fake_elevenlabs(args.elevenlabs_ms / 1000)
+    registry.signed_url_pool.start()
+    # the pool fills in the background after startup
+    await asyncio.sleep(args.warmup_seconds)
+    
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def start():
+            began = time.perf_counter()
+            response = await client.post("/api/v1/conversations/start")
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - began)
+        
+        tasks = []
+        for _ in range(args.starts):
+            tasks.append(asyncio.create_task(start()))
+            await asyncio.sleep(random.expovariate(1000 / args.interval_ms))
+        await asyncio.gather(*tasks)
+    
+    stats = registry.signed_url_pool.stats()
+    await registry.shutdown()
+    return latencies, stats
+
+
+async def main(args):
+    random.seed(0)
+    _fake_database(args.insert_ms / 1000)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(id=str(uuid.uuid4()))
+    
+    print(f"{args.starts} starts every ~{args.interval_ms:.0f} ms, ElevenLabs ~{args.elevenlabs_ms:.0f} ms, insert {args.insert_ms:.0f} ms")
+    print(f"{'mode':<10} {'p50 ms':>8} {'p99 ms':>8} {'pool hit ratio':>15}")
+    for mode, pool_size in (("direct", 0), ("pooled", args.pool_size)):
+        latencies, stats = await _run(args, pool_size)
+        print(f"{mode:<10} {_percentile(latencies, 0.5):>8.1f} {_percentile(latencies, 0.99):>8.1f} {stats['hit_ratio']:>15.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--starts", type=int, default=200)
+    parser.add_argument("--interval-ms", type=float, default=100.0)
+    parser.add_argument("--elevenlabs-ms", type=float, default=250.0)
+    parser.add_argument("--insert-ms", type=float, default=20.0)
+    parser.add_argument("--pool-size", type=int, default=config.signed_url_pool_size)
+    parser.add_argument("--warmup-seconds", type=float, default=1.0)
+    asyncio.run(main(parser.parse_args()))
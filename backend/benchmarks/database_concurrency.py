@@ -0,0 +1,58 @@
+"""Concurrent DatabaseService throughput with and without the Supabase executor.
+
+Runs against an in-process PostgREST stand-in that blocks for a fixed latency,
+the way a real network round trip blocks the synchronous supabase-py client.
+
+    python -m benchmarks.database_concurrency --requests 200 --latency-ms 20
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from config import config
+from clients.supabase import SupabaseClient
+from services.database_service import DatabaseService
+
+
+def _slow_postgrest(latency: float) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(latency)
+        return httpx.Response(200, json={"id": "memo", "user_id": "user"})
+    
+    return httpx.MockTransport(handler)
+
+
+async def _run(workers: int, requests: int, latency: float) -> float:
+    config.supabase_executor_workers = workers
+    supabase_client = SupabaseClient()
+    supabase_client.client.postgrest.session._transport = _slow_postgrest(latency)
+    database_service = DatabaseService(supabase_client)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        database_service.get_voice_memo("memo", "user") for _ in range(requests)
+    ])
+    elapsed = time.perf_counter() - start
+    
+    supabase_client.close()
+    return requests / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+    
+    latency = args.latency_ms / 1000
+    inline = asyncio.run(_run(0, args.requests, latency))
+    pooled = asyncio.run(_run(args.workers, args.requests, latency))
+    
+    print(f"inline (event loop):   {inline:8.1f} req/s")
+    print(f"executor ({args.workers:>2} threads): {pooled:8.1f} req/s")
+    print(f"speedup:               {pooled / inline:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
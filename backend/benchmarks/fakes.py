@@ -0,0 +1,556 @@
+"""Local stand-ins for Supabase, ElevenLabs and OpenAI.
+
+The fakes answer at the HTTP layer, behind the transports of the clients
+the app already holds, so supabase-py, the ElevenLabs SDK and the shared
+provider clients run unchanged. PostgREST is emulated well enough for the
+queries in services/ (filters, ``or``, ordering, paging, upserts, the RPCs
+the app calls), storage keeps objects in memory and auth resolves the
+user from the bearer token. Realtime speech-to-text is a local WebSocket
+server speaking the provider's protocol.
+
+Every fake takes a ``Faults`` that adds latency (with jitter) and answers
+a fraction of requests with 503, and the providers another fraction with
+429 and a Retry-After.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote
+import httpx
+from jose import jwt
+
+# upserts resolve conflicts on these columns, everything else on id
+CONFLICT_KEYS = {
+    "content_cache": ("kind", "content_hash"),
+    "memo_contexts": ("user_id",),
+    "voice_memo_embeddings": ("memo_id",),
+}
+
+
+@dataclass
+class Faults:
+    latency_ms: float = 0.0
+    jitter: float = 0.3
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: float = 1.0
+    
+    def delay(self) -> float:
+        if not self.latency_ms:
+            return 0.0
+        return self.latency_ms / 1000 * random.uniform(1 - self.jitter, 1 + self.jitter)
+    
+    def fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+    
+    def throttle(self) -> bool:
+        return self.throttle_rate > 0 and random.random() < self.throttle_rate
+
+
+def _unavailable() -> httpx.Response:
+    return httpx.Response(503, json={"message": "injected failure", "code": "503"})
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _literal(value: str) -> str:
+    return value[1:-1] if len(value) > 1 and value[0] == value[-1] == '"' else value
+
+
+def _split(expression: str) -> List[str]:
+    # top-level commas only, and(...) groups keep theirs
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    return parts + [current] if current else parts
+
+
+def _compare(row: Dict[str, Any], column: str, operator: str, value: str) -> bool:
+    field = row.get(column)
+    if operator == "in":
+        return str(field) in [_literal(item) for item in _split(value.strip("()"))]
+    if operator == "cs":
+        return set(_split(value.strip("{}"))) <= set(field or [])
+    if operator == "is":
+        return field is None if value == "null" else str(field).lower() == value
+    
+    value = _literal(value)
+    if field is None:
+        return operator == "neq"
+    if isinstance(field, (int, float)) and not isinstance(field, bool):
+        value = float(value)
+    elif not isinstance(field, str):
+        field = json.dumps(field)
+    return {
+        "eq": field == value,
+        "neq": field != value,
+        "lt": field < value,
+        "lte": field <= value,
+        "gt": field > value,
+        "gte": field >= value,
+    }[operator]
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, value = expression.partition(".")
+    return _compare(row, column, operator, value) != negate
+
+
+def _matches_group(row: Dict[str, Any], combinator: str, terms: List[str]) -> bool:
+    results = []
+    for term in terms:
+        group = re.match(r"^(and|or)\((.*)\)$", term)
+        if group:
+            results.append(_matches_group(row, group.group(1), _split(group.group(2))))
+        else:
+            column, _, expression = term.partition(".")
+            results.append(_matches(row, column, expression))
+    return all(results) if combinator == "and" else any(results)
+
+
+class FakeSupabase:
+    """In-memory PostgREST, storage and auth for one Supabase project."""
+    
+    def __init__(self, faults: Optional[Faults] = None, jwt_secret: str = "") -> None:
+        self.faults = faults or Faults()
+        self.jwt_secret = jwt_secret
+        self.tables: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.objects: Dict[str, bytes] = {}
+        self.calls: Counter = Counter()
+        self.rpcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "lookup_content_cache": self._lookup_content_cache,
+            "content_cache_stats": lambda args: [],
+            "get_usage_quota": self._usage_quota,
+            "reconcile_usage": lambda args: 0,
+            "search_voice_memos": lambda args: [],
+            "end_conversation": self._end_conversation,
+        }
+        # supabase-py runs on executor threads
+        self._lock = threading.Lock()
+    
+    def table(self, name: str) -> Dict[str, Dict[str, Any]]:
+        return self.tables.setdefault(name, {})
+    
+    def insert(self, name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        row = {"id": str(uuid.uuid4()), "created_at": _now(), **row}
+        self.table(name)[row["id"]] = row
+        return row
+    
+    def install(self, supabase_client) -> None:
+        """Route the sessions of a ``clients.supabase.SupabaseClient`` here."""
+        client = supabase_client.client
+        # touching the properties makes supabase-py create the lazy sessions
+        client.postgrest
+        client.storage
+        for session in supabase_client.http_sessions().values():
+            session._transport = httpx.MockTransport(self.handle)
+    
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        time.sleep(self.faults.delay())
+        if self.faults.fail():
+            return _unavailable()
+        
+        path = unquote(request.url.path)
+        with self._lock:
+            if path.startswith("/rest/v1/rpc/"):
+                return self._rpc(path[len("/rest/v1/rpc/"):], request)
+            if path.startswith("/rest/v1/"):
+                return self._rest(path[len("/rest/v1/"):], request)
+            if path.startswith("/storage/v1/"):
+                return self._storage(path[len("/storage/v1/"):], request)
+            if path.startswith("/auth/v1/user"):
+                return self._user(request)
+        return httpx.Response(404, json={"message": f"no fake for {path}"})
+    
+    # PostgREST
+    
+    def _query(self, request: httpx.Request) -> Tuple[List[Tuple[str, str]], Dict[str, str]]:
+        filters, options = [], {}
+        for key, value in parse_qsl(request.url.query.decode(), keep_blank_values=True):
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                options[key] = value
+            else:
+                filters.append((key, value))
+        return filters, options
+    
+    def _filter(self, rows, filters):
+        for column, expression in filters:
+            if column in ("or", "and"):
+                terms = _split(expression[1:-1])
+                rows = [row for row in rows if _matches_group(row, column, terms)]
+            else:
+                rows = [row for row in rows if _matches(row, column, expression)]
+        return rows
+    
+    def _rest(self, name: str, request: httpx.Request) -> httpx.Response:
+        self.calls[f"{request.method} {name}"] += 1
+        filters, options = self._query(request)
+        table = self.table(name)
+        
+        if request.method == "POST":
+            body = json.loads(request.content or b"[]")
+            rows = body if isinstance(body, list) else [body]
+            prefer = request.headers.get("prefer", "")
+            upsert = "merge-duplicates" in prefer
+            ignore = "ignore-duplicates" in prefer
+            keys = tuple(options["on_conflict"].split(",")) if options.get("on_conflict") else CONFLICT_KEYS.get(name, ("id",))
+            stored = []
+            for row in rows:
+                existing = None
+                if upsert or ignore:
+                    # NULLs never conflict, like in a unique index
+                    existing = next((
+                        r for r in table.values()
+                        if all(row.get(k) is not None and r.get(k) == row.get(k) for k in keys)
+                    ), None)
+                if existing is not None and ignore:
+                    continue
+                if existing is not None:
+                    existing.update(row)
+                    stored.append(existing)
+                else:
+                    stored.append(self.insert(name, row))
+            return self._rows(request, stored, options)
+        
+        rows = self._filter(list(table.values()), filters)
+        
+        if request.method == "PATCH":
+            changes = json.loads(request.content)
+            for row in rows:
+                row.update(changes)
+            return self._rows(request, rows, options)
+        
+        if request.method == "DELETE":
+            for row in rows:
+                table.pop(row["id"], None)
+            return self._rows(request, rows, options)
+        
+        for column in reversed((options.get("order") or "").split(",")):
+            if column:
+                name_, *flags = column.split(".")
+                rows.sort(key=lambda row: (row.get(name_) is None, row.get(name_) or ""), reverse="desc" in flags)
+        offset = int(options.get("offset") or 0)
+        if options.get("limit"):
+            rows = rows[offset:offset + int(options["limit"])]
+        else:
+            rows = rows[offset:]
+        return self._rows(request, rows, options)
+    
+    def _rows(self, request: httpx.Request, rows: List[Dict[str, Any]], options: Dict[str, str]) -> httpx.Response:
+        select = options.get("select", "*")
+        if select != "*":
+            columns = [column.strip() for column in select.split(",")]
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(rows) != 1:
+                return httpx.Response(406, json={
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None
+                })
+            return httpx.Response(200, json=rows[0])
+        return httpx.Response(200, json=rows)
+    
+    def _rpc(self, name: str, request: httpx.Request) -> httpx.Response:
+        self.calls[f"rpc {name}"] += 1
+        handler = self.rpcs.get(name)
+        if handler is None:
+            return httpx.Response(404, json={"code": "PGRST202", "message": f"no fake for rpc {name}"})
+        return httpx.Response(200, json=handler(json.loads(request.content or b"{}")))
+    
+    def _lookup_content_cache(self, args: Dict[str, Any]) -> Any:
+        for row in self.table("content_cache").values():
+            if row["kind"] == args["p_kind"] and row["content_hash"] == args["p_content_hash"]:
+                row["hits"] = row.get("hits", 0) + 1
+                return row["result"]
+        return None
+    
+    def _end_conversation(self, args: Dict[str, Any]) -> Any:
+        row = self.table("conversations").get(args["p_conversation_id"])
+        if row is None or row.get("ended_at"):
+            return []
+        row.update(
+            transcript=args["p_transcript"],
+            summary=args["p_summary"] or row.get("summary"),
+            duration_seconds=args["p_duration_seconds"],
+            title=args["p_title"] or row.get("title"),
+            elevenlabs_conversation_id=args["p_elevenlabs_conversation_id"] or row.get("elevenlabs_conversation_id"),
+            ended_at=_now()
+        )
+        if args["p_duration_seconds"]:
+            self.insert("conversation_logs", {"user_id": row["user_id"], "duration_seconds": args["p_duration_seconds"]})
+        return [row]
+    
+    def _usage_quota(self, args: Dict[str, Any]) -> Any:
+        return [{
+            "period": datetime.now(timezone.utc).strftime("%Y-%m-01"),
+            "recording_seconds": 0,
+            "conversation_seconds": 0,
+            "recording_limit_seconds": 10 ** 9,
+            "conversation_limit_seconds": 10 ** 9
+        }]
+    
+    # storage
+    
+    def _storage(self, path: str, request: httpx.Request) -> httpx.Response:
+        self.calls[f"storage {request.method}"] += 1
+        path = path.lstrip("/")
+        if path.startswith("object/upload/sign/"):
+            key = path[len("object/upload/sign/"):]
+            if request.method == "POST":
+                token = self.token(key, ttl=7200)
+                return httpx.Response(200, json={"url": f"/object/upload/sign/{key}?token={token}"})
+            self.objects[key] = _file_part(request)
+            return httpx.Response(200, json={"Key": key})
+        if path.startswith("object/list/"):
+            bucket = path[len("object/list/"):]
+            options = json.loads(request.content)
+            prefix = f"{bucket}/{options.get('prefix', '')}".rstrip("/") + "/"
+            found = [
+                {"name": key[len(prefix):], "id": key, "metadata": {"size": len(data)}}
+                for key, data in self.objects.items()
+                if key.startswith(prefix) and options.get("search", "") in key[len(prefix):]
+            ]
+            return httpx.Response(200, json=found[:options.get("limit", 100)])
+        if path.startswith("object/"):
+            key = path[len("object/"):]
+            if request.method in ("POST", "PUT"):
+                self.objects[key] = _file_part(request)
+                return httpx.Response(200, json={"Key": key, "Id": str(uuid.uuid4())})
+            if request.method == "GET":
+                if key not in self.objects:
+                    return httpx.Response(404, json={"statusCode": "404", "error": "not_found", "message": "Object not found"})
+                return httpx.Response(200, content=self.objects[key])
+            if request.method == "DELETE":
+                removed = []
+                for prefix in json.loads(request.content).get("prefixes", []):
+                    if self.objects.pop(f"{key}/{prefix}", None) is not None:
+                        removed.append({"name": prefix})
+                return httpx.Response(200, json=removed)
+        return httpx.Response(404, json={"statusCode": "404", "error": "not_found", "message": f"no fake for {path}"})
+    
+    # auth
+    
+    def _user(self, request: httpx.Request) -> httpx.Response:
+        self.calls["auth user"] += 1
+        token = request.headers.get("authorization", "").removeprefix("Bearer ")
+        try:
+            claims = jwt.decode(token, self.jwt_secret, algorithms=["HS256"], options={"verify_aud": False})
+        except Exception:
+            return httpx.Response(401, json={"message": "invalid token"})
+        return httpx.Response(200, json={
+            "id": claims["sub"],
+            "aud": "authenticated",
+            "role": "authenticated",
+            "email": f"{claims['sub']}@example.com",
+            "app_metadata": {},
+            "user_metadata": {},
+            "created_at": _now()
+        })
+    
+    def token(self, user_id: str, ttl: int = 3600) -> str:
+        return jwt.encode({"sub": user_id, "exp": int(time.time()) + ttl}, self.jwt_secret, algorithm="HS256")
+
+
+def _file_part(request: httpx.Request) -> bytes:
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith("multipart/form-data"):
+        return request.content
+    boundary = content_type.split("boundary=")[-1].encode()
+    for part in request.content.split(b"--" + boundary):
+        head, _, body = part.partition(b"\r\n\r\n")
+        if b"filename=" in head:
+            return body.rstrip(b"\r\n")
+    return b""
+
+
+def _async_transport(faults: Faults, calls: Counter, routes: Dict[str, Callable[[httpx.Request], httpx.Response]]) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(faults.delay())
+        calls[request.url.path] += 1
+        if faults.fail():
+            return _unavailable()
+        if faults.throttle():
+            return httpx.Response(429, headers={"Retry-After": str(faults.retry_after)}, json={"detail": "rate limited"})
+        for prefix, route in routes.items():
+            if request.url.path.startswith(prefix):
+                return route(request)
+        return httpx.Response(404, json={"detail": f"no fake for {request.url.path}"})
+    
+    return httpx.MockTransport(handler)
+
+
+class FakeElevenLabs:
+    """Speech-to-text and conversation signed URLs."""
+    
+    def __init__(self, faults: Optional[Faults] = None) -> None:
+        self.faults = faults or Faults()
+        self.calls: Counter = Counter()
+    
+    def _transcribe(self, request: httpx.Request) -> httpx.Response:
+        # the same audio always gets the same words
+        seed = int(hashlib.sha256(request.content[-4096:]).hexdigest()[:8], 16)
+        words = random.Random(seed).choices(
+            ["today", "meeting", "plan", "family", "idea", "tired", "grateful", "project", "walk", "call"],
+            k=40
+        )
+        return httpx.Response(200, json={
+            "text": " ".join(words),
+            "language_code": "en",
+            "language_probability": 0.98,
+            "words": [
+                {"text": word, "start": index * 0.4, "end": index * 0.4 + 0.3, "type": "word"}
+                for index, word in enumerate(words)
+            ]
+        })
+    
+    def _signed_url(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "signed_url": f"wss://api.elevenlabs.io/v1/convai/conversation?token={uuid.uuid4().hex}"
+        })
+    
+    def transport(self) -> httpx.MockTransport:
+        return _async_transport(self.faults, self.calls, {
+            "/v1/speech-to-text": self._transcribe,
+            "/v1/convai/conversation/get-signed-url": self._signed_url,
+            "/v1/convai/conversation/get_signed_url": self._signed_url,
+        })
+
+
+class FakeRealtimeSTT:
+    """ElevenLabs realtime speech-to-text on a local WebSocket.
+
+    Every ``word_seconds`` of audio adds a word to the partial transcript and
+    every ``segment_seconds`` (or a commit) turns it into a committed one,
+    standing in for the provider's voice activity detection. Point
+    ``config.elevenlabs_realtime_url`` at ``start()``'s URL.
+    """
+
+    WORDS = ["today", "meeting", "plan", "family", "idea", "tired", "grateful", "project", "walk", "call"]
+    
+    def __init__(self, faults: Optional[Faults] = None, word_seconds: float = 0.4, segment_seconds: float = 4.0) -> None:
+        self.faults = faults or Faults()
+        self.word_seconds = word_seconds
+        self.segment_seconds = segment_seconds
+        self.calls: Counter = Counter()
+        self._server = None
+    
+    async def _session(self, connection) -> None:
+        self.calls["sessions"] += 1
+        if not connection.request.headers.get("xi-api-key"):
+            await connection.send(json.dumps({"message_type": "auth_error", "error": "missing api key"}))
+            return
+        if self.faults.fail():
+            await connection.send(json.dumps({"message_type": "error", "error": "injected failure"}))
+            return
+        
+        await connection.send(json.dumps({"message_type": "session_started", "session_id": uuid.uuid4().hex}))
+        # replies go out after the injected latency, in order, without slowing intake
+        replies: asyncio.Queue = asyncio.Queue()
+        
+        async def reply() -> None:
+            latest = 0.0
+            while True:
+                due, message = await replies.get()
+                latest = max(latest, due)
+                await asyncio.sleep(max(latest - time.monotonic(), 0.0))
+                await connection.send(json.dumps(message))
+        
+        sender = asyncio.create_task(reply())
+        rng = random.Random(connection.request.path)
+        words: List[str] = []
+        audio_seconds = segment_start = 0.0
+        try:
+            async for message in connection:
+                data = json.loads(message)
+                self.calls["chunks"] += 1
+                sample_rate = data.get("sample_rate") or 16000
+                audio_seconds += len(base64.b64decode(data.get("audio_base_64") or "")) / 2 / sample_rate
+                due = time.monotonic() + self.faults.delay()
+                
+                heard = int((audio_seconds - segment_start) / self.word_seconds)
+                if heard > len(words):
+                    words += rng.choices(self.WORDS, k=heard - len(words))
+                    replies.put_nowait((due, {"message_type": "partial_transcript", "text": " ".join(words)}))
+                if data.get("commit") or audio_seconds - segment_start >= self.segment_seconds:
+                    self.calls["commits"] += 1
+                    replies.put_nowait((due, {
+                        "message_type": "committed_transcript",
+                        "text": " ".join(words),
+                        "language_code": "en"
+                    }))
+                    words = []
+                    segment_start = audio_seconds
+        finally:
+            sender.cancel()
+    
+    async def start(self) -> str:
+        from websockets.asyncio.server import serve
+        
+        self._server = await serve(self._session, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        return f"ws://127.0.0.1:{port}/v1/speech-to-text/realtime"
+    
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+class FakeOpenAI:
+    """Chat completions (tagging) and embeddings."""
+    
+    def __init__(self, faults: Optional[Faults] = None, dimensions: int = 64) -> None:
+        self.faults = faults or Faults()
+        self.dimensions = dimensions
+        self.calls: Counter = Counter()
+    
+    def _chat(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": '["work", "planning"]'}}]
+        })
+    
+    def _embeddings(self, request: httpx.Request) -> httpx.Response:
+        texts = json.loads(request.content)["input"]
+        data = []
+        for index, text in enumerate(texts):
+            rng = random.Random(hashlib.sha256(text.encode()).digest())
+            data.append({"index": index, "embedding": [rng.uniform(-1, 1) for _ in range(self.dimensions)]})
+        return httpx.Response(200, json={"data": data})
+    
+    def transport(self) -> httpx.MockTransport:
+        return _async_transport(self.faults, self.calls, {
+            "/v1/chat/completions": self._chat,
+            "/v1/embeddings": self._embeddings,
+        })
+
+
+def install(registry, supabase: FakeSupabase, elevenlabs: FakeElevenLabs, openai: FakeOpenAI) -> None:
+    """Point every client in ``registry`` at the fakes."""
+    registry.startup()
+    supabase.install(registry.supabase)
+    registry.http["elevenlabs"].client._transport = elevenlabs.transport()
+    registry.http["openai"].client._transport = openai.transport()
@@ -0,0 +1,64 @@
+-- OFFSET vs keyset paging over a seeded 1M-row voice_memos table.
+--
+--   psql "$DATABASE_URL" -f benchmarks/keyset_pagination.sql
+--
+-- Runs in a transaction that is rolled back, so nothing is left behind.
+-- Expect the OFFSET plan to grow linearly with the page depth while the
+-- keyset plan stays an index range scan of limit + 1 rows.
+
+BEGIN;
+
+CREATE TEMP TABLE bench_memos (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  user_id UUID NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  title TEXT,
+  tags TEXT[] DEFAULT '{}'
+) ON COMMIT DROP;
+
+-- 1M rows across 10 users, with second-level timestamp collisions so the id
+-- tiebreaker matters
+INSERT INTO bench_memos (user_id, created_at, title, tags)
+SELECT
+  ('00000000-0000-0000-0000-00000000000' || (n % 10))::uuid,
+  NOW() - ((n / 3) || ' seconds')::interval,
+  'memo ' || n,
+  ARRAY[(ARRAY['work', 'family', 'health', 'ideas'])[1 + n % 4]]
+FROM generate_series(1, 1000000) AS n;
+
+CREATE INDEX ON bench_memos(user_id, created_at DESC, id DESC);
+CREATE INDEX ON bench_memos USING GIN(tags);
+ANALYZE bench_memos;
+
+-- Deep page with OFFSET: reads and discards every earlier row
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_memos
+WHERE user_id = '00000000-0000-0000-0000-000000000001'
+ORDER BY created_at DESC, id DESC
+LIMIT 21 OFFSET 90000;
+
+-- Same page with a keyset cursor, the row just before it, as the API issues it
+-- (the PostgREST "or" filter from DatabaseService._page expands to this)
+SELECT created_at AS cursor_created_at, id AS cursor_id FROM bench_memos
+WHERE user_id = '00000000-0000-0000-0000-000000000001'
+ORDER BY created_at DESC, id DESC
+OFFSET 89999 LIMIT 1 \gset
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_memos
+WHERE user_id = '00000000-0000-0000-0000-000000000001'
+  AND (created_at < :'cursor_created_at' OR (created_at = :'cursor_created_at' AND id < :'cursor_id'))
+ORDER BY created_at DESC, id DESC
+LIMIT 21;
+
+-- Tag filter on a deep keyset page uses the GIN index or the composite one,
+-- whichever the planner estimates cheaper
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bench_memos
+WHERE user_id = '00000000-0000-0000-0000-000000000001'
+  AND tags @> ARRAY['work']
+  AND (created_at < :'cursor_created_at' OR (created_at = :'cursor_created_at' AND id < :'cursor_id'))
+ORDER BY created_at DESC, id DESC
+LIMIT 21;
+
+ROLLBACK;
@@ -0,0 +1,99 @@
+"""Payload size and encode time of a list page: full rows vs the summary projection.
+
+    python -m benchmarks.list_projection --page-size 20
+
+Rows are synthetic but sized like real ones: a few minutes of transcript,
+chunk segments in transcript_metadata, and upload metadata.
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from services.projections import select_columns
+
+WORDS = "the a meeting idea work family plan call tomorrow think really need want project".split()
+
+
+def _transcript(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+def _voice_memo(index: int) -> dict:
+    transcript = _transcript(random.randint(300, 900))
+    created_at = datetime.now(timezone.utc) - timedelta(minutes=index)
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "created_at": created_at.isoformat(),
+        "updated_at": created_at.isoformat(),
+        "audio_url": f"https://example.supabase.co/storage/v1/object/public/voice-memos/u/audio/{uuid.uuid4().hex}.webm",
+        "duration_seconds": 180.5,
+        "file_size_bytes": 1_900_000,
+        "transcript": transcript,
+        "transcript_preview": transcript[:200],
+        "transcript_status": "completed",
+        "transcript_metadata": {
+            "language": "en",
+            "confidence": 0.98,
+            "segments": [
+                {"index": i, "start": i * 120.0, "end": (i + 1) * 120.0, "text": _transcript(150)}
+                for i in range(2)
+            ],
+            "timings": {"load_audio": 0.1, "transcode": 0.8, "stt": 6.2},
+        },
+        "title": "memo.webm",
+        "summary": None,
+        "tags": ["work", "planning"],
+        "is_favorite": False,
+        "metadata": {"original_filename": "memo.webm"},
+        "content_hash": uuid.uuid4().hex * 2,
+    }
+
+
+def _project(rows: list, columns: str) -> list:
+    if columns == "*":
+        return rows
+    keep = columns.split(",")
+    return [{key: row[key] for key in keep} for row in rows]
+
+
+def _measure(rows: list, repeat: int) -> dict:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        body = json.dumps({"voice_memos": rows}).encode()
+    encode_ms = (time.perf_counter() - start) / repeat * 1000
+    return {
+        "bytes": len(body),
+        "gzip_bytes": len(gzip.compress(body)),
+        "encode_ms": round(encode_ms, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    
+    random.seed(0)
+    rows = [_voice_memo(i) for i in range(args.page_size)]
+    
+    results = {
+        fields: _measure(_project(rows, select_columns("voice_memos", fields)), args.repeat)
+        for fields in ("full", "summary", "id,title")
+    }
+    
+    full = results["full"]["bytes"]
+    print(f"{'fields':<10} {'bytes':>9} {'gzip':>8} {'encode ms':>10} {'vs full':>8}")
+    for fields, result in results.items():
+        print(
+            f"{fields:<10} {result['bytes']:>9} {result['gzip_bytes']:>8} "
+            f"{result['encode_ms']:>10} {result['bytes'] / full:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
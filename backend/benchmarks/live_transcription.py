@@ -0,0 +1,172 @@
+"""Time from the end of a recording to its stored transcript: live vs upload.
+
+    python -m benchmarks.live_transcription --recordings 8 --seconds 20 --elevenlabs-ms 2000
+
+Each recording is streamed to WS /voice-memos/stream at --speed times real
+time in 100 ms chunks; the clock starts when the client sends stop and ends
+at ``completed``. The same audio is then sent to POST /voice-memos/upload
+and timed from the start of the upload to the worker storing the
+transcript, which is what a client recording first and uploading after
+waits for. The app is served by uvicorn in-process against the fakes in
+benchmarks/fakes.py; --elevenlabs-ms is the batch speech-to-text time and
+--realtime-ms how long the realtime provider takes to answer a chunk.
+"""
+from benchmarks.load_test import _configure, _percentiles
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uvicorn
+from websockets.asyncio.client import connect
+import httpx
+from config import config
+from clients.registry import registry
+from main import app
+from services.job_worker import JobWorker
+from worker import HANDLERS
+from benchmarks.fakes import Faults, FakeElevenLabs, FakeOpenAI, FakeRealtimeSTT, FakeSupabase, install
+
+CHUNK_SECONDS = 0.1
+
+
+async def _serve():
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, lifespan="off", log_level="critical"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return server, task, f"127.0.0.1:{port}"
+
+
+async def _stream(address: str, token: str, audio: bytes, speed: float) -> dict:
+    chunk_bytes = int(config.streaming_sample_rate * CHUNK_SECONDS) * 2
+    events = {"partial": 0, "segment": 0}
+    first_text = None
+    
+    async with connect(f"ws://{address}/api/v1/voice-memos/stream", max_size=None) as ws:
+        await ws.send(json.dumps({"type": "start", "token": token, "sample_rate": config.streaming_sample_rate}))
+        assert json.loads(await ws.recv())["type"] == "ready"
+        
+        async def receive() -> dict:
+            nonlocal first_text
+            async for message in ws:
+                event = json.loads(message)
+                if event["type"] in events:
+                    events[event["type"]] += 1
+                    first_text = first_text or time.perf_counter()
+                elif event["type"] in ("completed", "error"):
+                    return event
+        
+        receiver = asyncio.create_task(receive())
+        started = time.perf_counter()
+        for offset in range(0, len(audio), chunk_bytes):
+            await ws.send(audio[offset:offset + chunk_bytes])
+            await asyncio.sleep(CHUNK_SECONDS / speed)
+        stopped = time.perf_counter()
+        await ws.send(json.dumps({"type": "stop"}))
+        result = await receiver
+    
+    return {
+        "ok": result["type"] == "completed" and result["voice_memo"]["transcript_status"] == "completed",
+        "after_stop": time.perf_counter() - stopped,
+        "first_text": (first_text or stopped) - started,
+        **events
+    }
+
+
+async def _upload(client: httpx.AsyncClient, supabase: FakeSupabase, token: str, audio: bytes) -> dict:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/voice-memos/upload",
+        headers={"Authorization": f"Bearer {token}"},
+        files={"file": ("memo.wav", audio, "audio/wav")}
+    )
+    memo_id = response.json()["id"]
+    while supabase.table("voice_memos")[memo_id].get("transcript_status") not in ("completed", "failed"):
+        await asyncio.sleep(0.01)
+    return {
+        "ok": supabase.table("voice_memos")[memo_id]["transcript_status"] == "completed",
+        "after_stop": time.perf_counter() - started
+    }
+
+
+def _report(name: str, results: list) -> None:
+    latency = _percentiles([result["after_stop"] for result in results])
+    failed = sum(not result["ok"] for result in results)
+    print(f"{name:<8} {len(results):>5} {failed:>7} {latency.get('p50', 0):>8.1f} {latency.get('p95', 0):>8.1f}", end="")
+    if "first_text" in results[0]:
+        first = _percentiles([result["first_text"] for result in results])
+        segments = sum(result["segment"] for result in results) / len(results)
+        print(f"   first text p50 {first.get('p50', 0):.0f} ms, {segments:.1f} segments per recording", end="")
+    print()
+
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    _configure(args)
+    supabase = FakeSupabase(Faults(args.supabase_ms), jwt_secret=config.supabase_anon_key)
+    install(registry, supabase, FakeElevenLabs(Faults(args.elevenlabs_ms)), FakeOpenAI(Faults(args.openai_ms)))
+    realtime = FakeRealtimeSTT(Faults(args.realtime_ms))
+    config.elevenlabs_realtime_url = await realtime.start()
+    
+    server, serving, address = await _serve()
+    worker = JobWorker(registry.job_queue, HANDLERS, args.worker_concurrency)
+    working = asyncio.create_task(worker.run())
+    
+    user_id = "00000000-0000-4000-8000-000000000001"
+    token = supabase.token(user_id)
+    recordings = [
+        random.randbytes(int(config.streaming_sample_rate * args.seconds) * 2)
+        for _ in range(args.recordings)
+    ]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def bounded(run, audio):
+        async with semaphore:
+            return await run(audio)
+    
+    print(
+        f"{args.recordings} recordings of {args.seconds:.0f} s at {args.speed:.0f}x, batch stt {args.elevenlabs_ms:.0f} ms, "
+        f"realtime {args.realtime_ms:.0f} ms per reply, worker poll {config.job_poll_interval_seconds} s"
+    )
+    print(f"{'path':<8} {'runs':>5} {'failed':>7} {'p50 ms':>8} {'p95 ms':>8}  (stop to stored transcript)")
+    
+    live = await asyncio.gather(*[
+        bounded(lambda audio: _stream(address, token, audio, args.speed), audio) for audio in recordings
+    ])
+    _report("live", live)
+    
+    async with httpx.AsyncClient(base_url=f"http://{address}", timeout=None) as client:
+        # different bytes, so upload de-duplication does not answer from the live memos
+        uploaded = await asyncio.gather(*[
+            bounded(lambda audio: _upload(client, supabase, token, audio), audio[::-1]) for audio in recordings
+        ])
+    _report("upload", uploaded)
+    
+    worker.stop()
+    await working
+    server.should_exit = True
+    await serving
+    await realtime.stop()
+    await registry.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--recordings", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--speed", type=float, default=10.0, help="how much faster than real time audio is sent")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--worker-concurrency", type=int, default=config.worker_concurrency)
+    parser.add_argument("--supabase-ms", type=float, default=10.0)
+    parser.add_argument("--elevenlabs-ms", type=float, default=2000.0)
+    parser.add_argument("--realtime-ms", type=float, default=150.0)
+    parser.add_argument("--openai-ms", type=float, default=150.0)
+    parser.add_argument("--ffmpeg", action="store_true", help="normalize uploaded audio before STT (needs ffmpeg)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="critical")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    asyncio.run(main(args))
@@ -0,0 +1,400 @@
+"""Offline load test of the API and worker against local fakes.
+
+    python -m benchmarks.load_test --requests 200 --concurrency 16
+    python -m benchmarks.load_test --scenarios upload --supabase-ms 15 --error-rate 0.02 --json run.json
+
+Boots ``main.app`` in-process with Supabase, ElevenLabs and OpenAI replaced
+by the fakes in benchmarks/fakes.py, then drives each scenario through the
+real routes, auth included:
+
+    upload   POST /voice-memos/upload, then the worker drains the
+             transcription jobs (download, STT, tagging, embedding, context)
+    direct   POST /voice-memos/upload-url, PUT to storage, POST /finalize,
+             then the worker drains the transcription jobs
+    list     GET /voice-memos/ following cursors over seeded memos
+    start    POST /conversations/start with the signed URL pool running
+    webhook  signed POST /webhooks/conversation-end, then the worker
+             drains the ingestion jobs
+
+Jobs go through the SQLite queue. Each provider gets its own latency and
+the same injected error and 429 rates. The fakes share the process with
+the app, so absolute numbers include their CPU time; compare runs with the
+same arguments. ``--json`` writes the results so two runs can be compared.
+"""
+import os
+
+# the fakes accept any credentials, nothing here reaches a real service
+for name, value in {
+    "SUPABASE_URL": "http://supabase.local",
+    "SUPABASE_ANON_KEY": "load-test-jwt-secret",
+    # supabase-py only checks that the key looks like a JWT
+    "SUPABASE_SERVICE_KEY": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.load-test",
+    "ELEVENLABS_API_KEY": "load-test",
+    "ELEVENLABS_AGENT_ID": "load-test-agent",
+    "OPENAI_API_KEY": "load-test",
+}.items():
+    os.environ.setdefault(name, value)
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import random
+import resource
+import tempfile
+import time
+import tracemalloc
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import httpx
+from config import config
+from clients.registry import registry
+from main import app
+from services.job_worker import JobWorker
+from worker import HANDLERS
+from benchmarks.fakes import Faults, FakeElevenLabs, FakeOpenAI, FakeSupabase, install
+
+SCENARIOS = ("upload", "direct", "list", "start", "webhook")
+WEBHOOK_SECRET = "load-test-webhook-secret"
+
+
+@dataclass
+class Result:
+    scenario: str
+    requests: int = 0
+    errors: int = 0
+    seconds: float = 0.0
+    statuses: Dict[str, int] = field(default_factory=dict)
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    worker: Dict[str, Any] = field(default_factory=dict)
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        f"p{p}": round(values[min(int(len(values) * p / 100), len(values) - 1)] * 1000, 1)
+        for p in (50, 95, 99)
+    }
+
+
+def _rss_mib() -> float:
+    # current resident set where /proc exists, peak otherwise
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _drive(
+    result: Result,
+    count: int,
+    concurrency: int,
+    send: Callable[[int], Awaitable[httpx.Response]]
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one(index: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await send(index)
+                status = str(response.status_code)
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            result.statuses[status] = result.statuses.get(status, 0) + 1
+            if not status.startswith("2"):
+                result.errors += 1
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[one(index) for index in range(count)])
+    result.seconds = round(time.perf_counter() - start, 3)
+    result.requests = count
+    result.latency_ms = _percentiles(latencies)
+
+
+async def _drain(concurrency: int, trace_memory: bool) -> Dict[str, Any]:
+    """Run a worker until the queue is empty and report what it cost."""
+    durations = []
+    
+    def timed(handler):
+        async def run(job):
+            start = time.perf_counter()
+            try:
+                await handler(job)
+            finally:
+                durations.append(time.perf_counter() - start)
+        return run
+    
+    worker = JobWorker(registry.job_queue, {kind: timed(handler) for kind, handler in HANDLERS.items()}, concurrency)
+    rss_before = _rss_mib()
+    if trace_memory:
+        tracemalloc.start()
+    
+    start = time.perf_counter()
+    task = asyncio.create_task(worker.run())
+    while True:
+        await asyncio.sleep(0.05)
+        stats = await registry.job_queue.stats()
+        if not stats["depth"] and not stats["running"]:
+            break
+    elapsed = time.perf_counter() - start
+    worker.stop()
+    await task
+    
+    report = {
+        "jobs": worker.counters["completed"],
+        "retried": worker.counters["retried"],
+        "dead": worker.counters["dead"],
+        "seconds": round(elapsed, 3),
+        "jobs_per_second": round(worker.counters["completed"] / elapsed, 1) if elapsed else 0.0,
+        "job_latency_ms": _percentiles(durations),
+        "rss_mib": round(_rss_mib(), 1),
+        "rss_growth_mib": round(_rss_mib() - rss_before, 1)
+    }
+    if trace_memory:
+        report["heap_peak_mib"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+    return report
+
+
+def _sign(body: bytes) -> str:
+    timestamp = str(int(time.time()))
+    digest = hmac.new(WEBHOOK_SECRET.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v0={digest}"
+
+
+def _webhook(user_id: str, conversation_id: str, turns: int) -> bytes:
+    return json.dumps({
+        "type": "post_call_transcription",
+        "event_timestamp": int(time.time()),
+        "data": {
+            "agent_id": config.elevenlabs_agent_id,
+            "conversation_id": f"conv_{uuid.uuid4().hex}",
+            "status": "done",
+            "transcript": [
+                {"role": "user" if turn % 2 else "agent", "message": "a sentence or two " * 4, "time_in_call_secs": turn * 5}
+                for turn in range(turns)
+            ],
+            "metadata": {"call_duration_secs": turns * 5},
+            "analysis": {"transcript_summary": "Talked about the week.", "call_summary_title": "Check-in"},
+            "conversation_initiation_client_data": {
+                "dynamic_variables": {"user_id": user_id, "conversation_id": conversation_id}
+            }
+        }
+    }).encode()
+
+
+class LoadTest:
+    def __init__(self, args: argparse.Namespace, supabase: FakeSupabase) -> None:
+        self.args = args
+        self.supabase = supabase
+        self.users = [str(uuid.uuid4()) for _ in range(args.users)]
+        self.tokens = {user: supabase.token(user) for user in self.users}
+    
+    def _auth(self, index: int) -> Dict[str, str]:
+        user = self.users[index % len(self.users)]
+        return {"Authorization": f"Bearer {self.tokens[user]}"}
+    
+    async def upload(self, client: httpx.AsyncClient) -> Result:
+        result = Result("upload")
+        size = self.args.audio_kb * 1024
+        
+        async def send(index: int) -> httpx.Response:
+            # distinct audio, so upload de-duplication never short-circuits
+            audio = random.randbytes(size)
+            return await client.post(
+                "/api/v1/voice-memos/upload",
+                headers=self._auth(index),
+                files={"file": ("memo.webm", audio, "audio/webm")}
+            )
+        
+        await _drive(result, self.args.requests, self.args.concurrency, send)
+        result.worker = await _drain(self.args.worker_concurrency, self.args.trace_memory)
+        return result
+    
+    async def direct(self, client: httpx.AsyncClient) -> Result:
+        result = Result("direct")
+        size = self.args.audio_kb * 1024
+        storage = httpx.Client(transport=httpx.MockTransport(self.supabase.handle))
+        
+        async def send(index: int) -> httpx.Response:
+            headers = self._auth(index)
+            signed = await client.post("/api/v1/voice-memos/upload-url", json={"content_type": "audio/webm"}, headers=headers)
+            if signed.status_code != 200:
+                return signed
+            # the audio goes to storage without passing through the app
+            await asyncio.to_thread(
+                storage.put,
+                signed.json()["upload_url"],
+                content=random.randbytes(size),
+                headers={"Content-Type": "audio/webm"}
+            )
+            return await client.post("/api/v1/voice-memos/finalize", json={"path": signed.json()["path"]}, headers=headers)
+        
+        try:
+            await _drive(result, self.args.requests, self.args.concurrency, send)
+        finally:
+            storage.close()
+        result.worker = await _drain(self.args.worker_concurrency, self.args.trace_memory)
+        return result
+    
+    async def list(self, client: httpx.AsyncClient) -> Result:
+        result = Result("list")
+        for user in self.users:
+            for index in range(self.args.seed_memos):
+                self.supabase.insert("voice_memos", {
+                    "user_id": user,
+                    "title": f"Memo {index}",
+                    "audio_url": f"{config.supabase_url}/storage/v1/object/public/voice-memos/{user}/{index}.webm",
+                    "transcript": "a seeded transcript " * 50,
+                    "transcript_preview": "a seeded transcript",
+                    "transcript_status": "completed",
+                    "tags": ["work"],
+                    "duration_seconds": 60
+                })
+        cursors: Dict[str, Optional[str]] = {}
+        cache_hits = 0
+        
+        async def send(index: int) -> httpx.Response:
+            nonlocal cache_hits
+            user = self.users[index % len(self.users)]
+            params = {"limit": 20}
+            if cursors.get(user):
+                params["cursor"] = cursors[user]
+            response = await client.get("/api/v1/voice-memos/", params=params, headers=self._auth(index))
+            if response.status_code == 200:
+                # walk the pages, then start over
+                cursors[user] = response.json().get("next_cursor")
+                cache_hits += response.headers.get("x-cache") == "HIT"
+            return response
+        
+        await _drive(result, self.args.requests, self.args.concurrency, send)
+        result.worker = {"response_cache_hit_ratio": round(cache_hits / self.args.requests, 4)}
+        return result
+    
+    async def start(self, client: httpx.AsyncClient) -> Result:
+        result = Result("start")
+        registry.signed_url_pool.start()
+        await asyncio.sleep(self.args.warmup_seconds)
+        
+        async def send(index: int) -> httpx.Response:
+            return await client.post("/api/v1/conversations/start", headers=self._auth(index))
+        
+        await _drive(result, self.args.requests, self.args.concurrency, send)
+        result.worker = {"signed_url_pool": registry.signed_url_pool.stats()}
+        return result
+    
+    async def webhook(self, client: httpx.AsyncClient) -> Result:
+        result = Result("webhook")
+        bodies = []
+        for index in range(self.args.requests):
+            user = self.users[index % len(self.users)]
+            conversation = self.supabase.insert("conversations", {"user_id": user, "ended_at": None})
+            bodies.append(_webhook(user, conversation["id"], self.args.turns))
+        
+        async def send(index: int) -> httpx.Response:
+            body = bodies[index]
+            return await client.post(
+                "/api/v1/webhooks/conversation-end",
+                content=body,
+                headers={"ElevenLabs-Signature": _sign(body), "Content-Type": "application/json"}
+            )
+        
+        await _drive(result, self.args.requests, self.args.concurrency, send)
+        result.worker = await _drain(self.args.worker_concurrency, self.args.trace_memory)
+        return result
+
+
+def _configure(args: argparse.Namespace) -> None:
+    config.job_queue_backend = "sqlite"
+    config.job_queue_sqlite_path = os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")
+    config.job_retry_base_seconds = 0.05
+    config.job_retry_max_seconds = 0.5
+    config.audio_normalization_enabled = args.ffmpeg
+    config.elevenlabs_webhook_secret = WEBHOOK_SECRET
+    config.response_cache_backend = "memory"
+    config.event_bus_backend = "memory"
+
+
+def _print(result: Result) -> None:
+    latency = result.latency_ms
+    rps = result.requests / result.seconds if result.seconds else 0.0
+    print(
+        f"{result.scenario:<8} {result.requests:>6} {result.errors:>6} {rps:>8.1f} "
+        f"{latency.get('p50', 0):>8.1f} {latency.get('p95', 0):>8.1f} {latency.get('p99', 0):>8.1f}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    _configure(args)
+    supabase = FakeSupabase(Faults(args.supabase_ms, error_rate=args.error_rate), jwt_secret=config.supabase_anon_key)
+    install(
+        registry,
+        supabase,
+        FakeElevenLabs(Faults(args.elevenlabs_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate)),
+        FakeOpenAI(Faults(args.openai_ms, error_rate=args.error_rate, throttle_rate=args.throttle_rate))
+    )
+    test = LoadTest(args, supabase)
+    
+    print(
+        f"supabase {args.supabase_ms:.0f} ms, elevenlabs {args.elevenlabs_ms:.0f} ms, openai {args.openai_ms:.0f} ms, "
+        f"error rate {args.error_rate:.1%}, 429 rate {args.throttle_rate:.1%}, {args.users} users, concurrency {args.concurrency}"
+    )
+    print(f"{'scenario':<8} {'reqs':>6} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        for scenario in args.scenarios.split(","):
+            result = await getattr(test, scenario)(client)
+            results.append(result)
+            _print(result)
+    
+    for result in results:
+        if result.worker:
+            print(f"  {result.scenario}: {json.dumps(result.worker)}")
+    
+    await registry.shutdown()
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": [asdict(result) for result in results]}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--worker-concurrency", type=int, default=config.worker_concurrency)
+    parser.add_argument("--supabase-ms", type=float, default=10.0)
+    parser.add_argument("--elevenlabs-ms", type=float, default=300.0)
+    parser.add_argument("--openai-ms", type=float, default=150.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="provider calls answered 429 with Retry-After")
+    parser.add_argument("--audio-kb", type=int, default=256)
+    parser.add_argument("--seed-memos", type=int, default=60)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--warmup-seconds", type=float, default=1.0)
+    parser.add_argument("--ffmpeg", action="store_true", help="normalize audio before STT (needs ffmpeg)")
+    parser.add_argument("--trace-memory", action="store_true", help="track the worker's Python heap peak (slower)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="critical", help="injected errors log a retry per job at warning")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper())
+    
+    unknown = set(args.scenarios.split(",")) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    asyncio.run(main(args))
@@ -0,0 +1,134 @@
+"""Requests and DB reads to learn that memos finished: polling vs the SSE stream.
+
+    python -m benchmarks.status_events --memos 20 --poll-interval 2
+
+A simulated worker completes each memo after a random transcription time
+(times are scaled down by --time-scale so the run takes a few seconds).
+Every poll is one authenticated request plus one DB read; the stream is
+one request for the whole session, with DB reads only when the bus is not
+shared and the stream has to check in-flight memos itself.
+"""
+import argparse
+import asyncio
+import json
+import random
+from clients.event_bus import MemoryEventBus
+from services.status_events import status_stream
+
+
+class FakeDatabase:
+    def __init__(self, memos):
+        self.memos = memos
+        self.reads = 0
+    
+    async def get_voice_memo_statuses(self, user_id, memo_ids=None):
+        self.reads += 1
+        watched = set(memo_ids or [])
+        return [
+            {"id": memo_id, "transcript_status": memo["status"], "tags": memo["tags"]}
+            for memo_id, memo in self.memos.items()
+            if memo["status"] in ("pending", "processing") or memo_id in watched
+        ]
+    
+    async def get_voice_memo(self, memo_id, user_id):
+        self.reads += 1
+        return self.memos[memo_id]
+
+
+async def _worker(memos, bus, durations, scale):
+    async def finish(memo_id, duration):
+        await asyncio.sleep(duration * scale)
+        memos[memo_id]["status"] = "completed"
+        await bus.publish("u", {"type": "transcript", "memo_id": memo_id, "status": "completed"})
+        await asyncio.sleep(0.5 * scale)
+        memos[memo_id]["tags"] = ["work"]
+        await bus.publish("u", {"type": "tags", "memo_id": memo_id, "tags": ["work"]})
+    
+    await asyncio.gather(*[finish(memo_id, durations[memo_id]) for memo_id in memos])
+
+
+def _memos(count):
+    return {f"m{i}": {"status": "pending", "tags": []} for i in range(count)}
+
+
+async def _polling(durations, interval, scale):
+    memos = _memos(len(durations))
+    db = FakeDatabase(memos)
+    requests = 0
+    
+    async def poll(memo_id):
+        nonlocal requests
+        while True:
+            requests += 1
+            memo = await db.get_voice_memo(memo_id, "u")
+            if memo["status"] == "completed" and memo["tags"]:
+                return
+            await asyncio.sleep(interval * scale)
+    
+    await asyncio.gather(
+        _worker(memos, MemoryEventBus(100), durations, scale),
+        *[poll(memo_id) for memo_id in memos]
+    )
+    return requests, db.reads
+
+
+async def _stream(durations, interval, scale, shared):
+    memos = _memos(len(durations))
+    db = FakeDatabase(memos)
+    bus = MemoryEventBus(100)
+    # an in-process bus stands in for a shared one; without one the worker's
+    # events never reach the API process
+    bus.shared = shared
+    worker_bus = bus if shared else MemoryEventBus(100)
+    
+    async def never_disconnected():
+        return False
+    
+    stream = status_stream(bus, db, "u", never_disconnected, heartbeat=60, poll_interval=interval * scale)
+    pending = {memo_id: {"transcript", "tags"} for memo_id in memos}
+    
+    async def consume():
+        async for chunk in stream:
+            if not chunk.startswith("event: "):
+                continue
+            event = json.loads(chunk.split("data: ", 1)[1])
+            if event["type"] == "tags" or event.get("status") == "completed":
+                pending.get(event["memo_id"], set()).discard(event["type"])
+                if not pending.get(event["memo_id"], True):
+                    del pending[event["memo_id"]]
+            if not pending:
+                return
+    
+    consumer = asyncio.create_task(consume())
+    await asyncio.sleep(0)
+    await _worker(memos, worker_bus, durations, scale)
+    await consumer
+    await stream.aclose()
+    return 1, db.reads
+
+
+async def main(args):
+    random.seed(0)
+    durations = {f"m{i}": random.uniform(args.min_seconds, args.max_seconds) for i in range(args.memos)}
+    
+    results = {
+        "polling": await _polling(durations, args.poll_interval, args.time_scale),
+        "sse (shared bus)": await _stream(durations, args.poll_interval, args.time_scale, shared=True),
+        "sse (in-process bus)": await _stream(durations, args.poll_interval, args.time_scale, shared=False),
+    }
+    
+    polling_requests = results["polling"][0]
+    print(f"{args.memos} memos, {args.min_seconds}-{args.max_seconds}s transcription, {args.poll_interval}s interval")
+    print(f"{'mode':<22} {'requests':>9} {'db reads':>9} {'requests saved':>15}")
+    for mode, (requests, reads) in results.items():
+        print(f"{mode:<22} {requests:>9} {reads:>9} {1 - requests / polling_requests:>15.1%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--memos", type=int, default=20)
+    parser.add_argument("--min-seconds", type=float, default=5.0)
+    parser.add_argument("--max-seconds", type=float, default=60.0)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--time-scale", type=float, default=0.02)
+    asyncio.run(main(parser.parse_args()))
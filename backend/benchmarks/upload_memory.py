@@ -0,0 +1,52 @@
+"""Peak Python heap per upload: buffering the whole file vs chunked spooling.
+
+    python -m benchmarks.upload_memory --size-mb 25
+"""
+import argparse
+import asyncio
+import tempfile
+import tracemalloc
+from fastapi import UploadFile
+from services.upload_service import spool_upload
+
+
+def _upload_file(size: int) -> UploadFile:
+    # mirrors Starlette, which spools multipart parts to disk past 1 MiB
+    spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    block = b"\0" * (1024 * 1024)
+    for _ in range(size // len(block)):
+        spooled.write(block)
+    spooled.seek(0)
+    return UploadFile(file=spooled, size=size, filename="memo.wav")
+
+
+async def _peak(coro_factory, size: int) -> int:
+    file = _upload_file(size)
+    tracemalloc.start()
+    result = await coro_factory(file)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(result, "discard"):
+        result.discard()
+    return peak
+
+
+async def _buffered(file: UploadFile) -> bytes:
+    return await file.read()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=25)
+    args = parser.parse_args()
+    
+    size = args.size_mb * 1024 * 1024
+    buffered = asyncio.run(_peak(_buffered, size))
+    spooled = asyncio.run(_peak(spool_upload, size))
+    
+    print(f"buffered read: {buffered / 1024 / 1024:8.2f} MiB peak")
+    print(f"spooled copy:  {spooled / 1024 / 1024:8.2f} MiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""Replays a burst of signed conversation-end webhooks through the app.
+
+    python -m benchmarks.webhook_ingestion --webhooks 500 --duplicates 0.1
+
+Measures how fast the endpoint acknowledges (202 after verify + enqueue),
+how fast a worker drains the burst, and what the same burst costs when
+the endpoint processes each webhook before responding. Conversation reads and writes go to an in-memory store
+that sleeps --db-latency-ms per call. Jobs go to an in-memory queue with
+the same per-call latency, like an insert into the Supabase jobs table, or
+with --queue sqlite to the SQLite stand-in (which serializes writers).
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+import uuid
+import httpx
+from config import config
+from collections import deque
+from clients.registry import registry
+from clients.job_queue import Job, JobQueue, SQLiteJobQueue
+from dependencies import get_job_queue
+from main import app
+from services.database_service import DatabaseService
+from services.conversation_webhooks import ingest_conversation
+from services.job_worker import JobWorker
+
+SECRET = "benchmark-secret"
+
+
+class FakeConversations:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.rows = {}
+        self.calls = 0
+    
+    def start(self) -> str:
+        """What POST /conversations/start leaves behind."""
+        row = {"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "elevenlabs_conversation_id": None, "ended_at": None}
+        self.rows[row["id"]] = row
+        return row["id"]
+    
+    def install(self):
+        store = self
+        
+        async def by_elevenlabs_id(_, elevenlabs_id):
+            await store._wait()
+            return next((row for row in store.rows.values() if row["elevenlabs_conversation_id"] == elevenlabs_id), None)
+        
+        async def by_id(_, conversation_id):
+            await store._wait()
+            return store.rows.get(conversation_id)
+        
+        async def end(_, conversation_id, transcript, elevenlabs_conversation_id=None, **kwargs):
+            await store._wait()
+            row = store.rows[conversation_id]
+            if row["ended_at"]:
+                return None
+            row.update(transcript=transcript, ended_at=time.time(), elevenlabs_conversation_id=elevenlabs_conversation_id)
+            return row
+        
+        DatabaseService.get_conversation_by_elevenlabs_id = by_elevenlabs_id
+        DatabaseService.get_conversation_by_id = by_id
+        DatabaseService.end_conversation = end
+    
+    async def _wait(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+
+class SimulatedQueue(JobQueue):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.queued = deque()
+        self.running = 0
+    
+    async def enqueue(self, kind, payload, delay=0):
+        await asyncio.sleep(self.latency)
+        job = Job(id=str(uuid.uuid4()), kind=kind, payload=payload, created_at=time.time())
+        self.queued.append(job)
+        return job.id
+    
+    async def claim(self, worker_id, visibility_timeout):
+        await asyncio.sleep(self.latency)
+        if not self.queued:
+            return None
+        job = self.queued.popleft()
+        job.attempts += 1
+        job.started_at = time.time()
+        self.running += 1
+        return job
+    
+    async def complete(self, job):
+        await asyncio.sleep(self.latency)
+        self.running -= 1
+    
+    async def fail(self, job, error, retry_delay):
+        await asyncio.sleep(self.latency)
+        self.running -= 1
+        self.queued.append(job)
+    
+    async def stats(self):
+        return {"depth": len(self.queued), "running": self.running}
+
+
+class InlineQueue:
+    """Runs the job inside the request, the way a synchronous endpoint would."""
+
+    async def enqueue(self, kind, payload, delay=0):
+        await ingest_conversation(payload)
+        return "inline"
+
+
+def _payload(turns: int, conversation_id: str) -> dict:
+    return {
+        "type": "post_call_transcription",
+        "event_timestamp": int(time.time()),
+        "data": {
+            "agent_id": "agent",
+            "conversation_id": f"conv_{uuid.uuid4().hex}",
+            "status": "done",
+            "transcript": [
+                {
+                    "role": "user" if turn % 2 else "agent",
+                    "message": "a sentence or two of conversation " * 3,
+                    "time_in_call_secs": turn * 5,
+                    "tool_calls": [],
+                    "llm_usage": {"model_usage": {"gpt-4o-mini": {"input": {"tokens": 900}}}},
+                }
+                for turn in range(turns)
+            ],
+            "metadata": {"call_duration_secs": turns * 5},
+            "analysis": {"transcript_summary": "Talked about the week.", "call_summary_title": "Weekly check-in"},
+            "conversation_initiation_client_data": {"dynamic_variables": {"conversation_id": conversation_id}},
+        },
+    }
+
+
+def _sign(body: bytes) -> str:
+    timestamp = str(int(time.time()))
+    digest = hmac.new(SECRET.encode(), f"{timestamp}.".encode() + body, hashlib.sha256).hexdigest()
+    return f"t={timestamp},v0={digest}"
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+
+
+async def _burst(bodies, concurrency, send):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one(body):
+        async with semaphore:
+            start = time.perf_counter()
+            await send(body)
+            latencies.append(time.perf_counter() - start)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[one(body) for body in bodies])
+    return len(bodies) / (time.perf_counter() - start), latencies
+
+
+async def main(args):
+    config.elevenlabs_webhook_secret = SECRET
+    store = FakeConversations(args.db_latency_ms / 1000)
+    store.install()
+    
+    if args.queue == "sqlite":
+        queue = SQLiteJobQueue(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    else:
+        queue = SimulatedQueue(store.latency)
+    
+    payloads = [_payload(args.turns, store.start()) for _ in range(args.webhooks)]
+    # redeliveries of already-sent webhooks
+    payloads += payloads[:int(args.webhooks * args.duplicates)]
+    bodies = [json.dumps(payload).encode() for payload in payloads]
+    
+    statuses = {}
+    transport = httpx.ASGITransport(app=app)
+    
+    async def replay():
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def send(body):
+                response = await client.post(
+                    "/api/v1/webhooks/conversation-end",
+                    content=body,
+                    headers={"ElevenLabs-Signature": _sign(body), "Content-Type": "application/json"}
+                )
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            
+            return await _burst(bodies, args.concurrency, send)
+    
+    # client construction happens once per process, keep it out of the numbers
+    registry.startup()
+    
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    accept_rate, accept_latencies = await replay()
+    
+    async def handler(job):
+        await ingest_conversation(job.payload)
+    
+    worker = JobWorker(queue, {"ingest_conversation": handler}, concurrency=args.workers)
+    start = time.perf_counter()
+    runner = asyncio.create_task(worker.run())
+    while True:
+        stats = await queue.stats()
+        if not stats["depth"] and not stats["running"]:
+            break
+        await asyncio.sleep(0.05)
+    drain_rate = worker.counters["completed"] / (time.perf_counter() - start)
+    worker.stop()
+    await runner
+    
+    ingested = sum(1 for row in store.rows.values() if row["ended_at"])
+    
+    # the same burst again, processed before the response
+    accept_statuses = dict(statuses)
+    statuses.clear()
+    for row in store.rows.values():
+        row.update(elevenlabs_conversation_id=None, ended_at=None)
+    app.dependency_overrides[get_job_queue] = lambda: InlineQueue()
+    inline_rate, inline_latencies = await replay()
+    
+    print(f"{len(bodies)} webhooks ({args.webhooks} unique, {args.turns} turns), concurrency {args.concurrency}")
+    print(f"responses: {accept_statuses}, conversations ended by the worker: {ingested}")
+    print(f"{'path':<16} {'per sec':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    print(f"{'accept (202)':<16} {accept_rate:>9.0f} {_percentile(accept_latencies, 0.5):>8.1f} {_percentile(accept_latencies, 0.99):>8.1f}")
+    print(f"{'worker drain':<16} {drain_rate:>9.0f}")
+    print(f"{'inline':<16} {inline_rate:>9.0f} {_percentile(inline_latencies, 0.5):>8.1f} {_percentile(inline_latencies, 0.99):>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--webhooks", type=int, default=500)
+    parser.add_argument("--duplicates", type=float, default=0.1)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--db-latency-ms", type=float, default=10.0)
+    parser.add_argument("--queue", choices=("simulated", "sqlite"), default="simulated")
+    asyncio.run(main(parser.parse_args()))
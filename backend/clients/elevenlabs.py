@@ -1,21 +1,22 @@
-from elevenlabs import ElevenLabs
+from elevenlabs import AsyncElevenLabs
+from clients.http import ProviderHTTPClient
 from config import config
 from typing import Dict, Any
-import asyncio
 from fastapi import HTTPException
 
 
 class ElevenLabsClient:
-    def __init__(self) -> None:
-        self.client = ElevenLabs(
+    def __init__(self, http: ProviderHTTPClient) -> None:
+        self.http = http
+        self.client = AsyncElevenLabs(
             api_key=config.elevenlabs_api_key,
+            httpx_client=http.client
         )
         self.agent_id = config.elevenlabs_agent_id
     
     async def get_signed_url(self) -> str:
         try:
-            response = await asyncio.to_thread(
-                self.client.conversational_ai.conversations.get_signed_url,
+            response = await self.client.conversational_ai.conversations.get_signed_url(
                 agent_id=self.agent_id
             )
             return response.signed_url
@@ -29,4 +30,4 @@ class ElevenLabsClient:
         return {
             "conversation_id": conversation_id,
             "status": "completed"
-        }
\ No newline at end of file
+        }
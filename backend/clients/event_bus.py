@@ -0,0 +1,116 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Set
+from config import config
+import asyncio
+import importlib.util
+import json
+
+
+class EventBus(ABC):
+    """Per-user pub/sub for transcription status events.
+
+    ``shared`` backends deliver events published by other processes, such as
+    worker.py; the in-process one only sees events published by itself.
+    """
+
+    shared = False
+
+    @abstractmethod
+    async def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        ...
+    
+    @abstractmethod
+    def subscribe(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        ...
+    
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        ...
+    
+    async def aclose(self) -> None:
+        """Release the backend's connections; nothing to do by default."""
+
+
+class MemoryEventBus(EventBus):
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self.counters: Counter = Counter()
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+    
+    async def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        self.counters["published"] += 1
+        for queue in self._subscribers.get(user_id, ()):
+            if queue.full():
+                # a slow client loses the oldest event, not the newest
+                queue.get_nowait()
+                self.counters["dropped"] += 1
+            queue.put_nowait(event)
+            self.counters["delivered"] += 1
+    
+    async def subscribe(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            subscribers = self._subscribers.get(user_id, set())
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(user_id, None)
+    
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+            **self.counters
+        }
+
+
+class RedisEventBus(EventBus):
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "sonanta:events") -> None:
+        # optional dependency, only needed for this backend
+        import redis.asyncio as redis
+        
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.counters: Counter = Counter()
+    
+    def _channel(self, user_id: str) -> str:
+        return f"{self.prefix}:{user_id}"
+    
+    async def publish(self, user_id: str, event: Dict[str, Any]) -> None:
+        self.counters["published"] += 1
+        await self.redis.publish(self._channel(user_id), json.dumps(event))
+    
+    async def subscribe(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._channel(user_id))
+        self.counters["subscribers"] += 1
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    self.counters["delivered"] += 1
+                    yield json.loads(message["data"])
+        finally:
+            self.counters["subscribers"] -= 1
+            await pubsub.aclose()
+    
+    async def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", **self.counters}
+    
+    async def aclose(self) -> None:
+        await self.redis.aclose()
+
+
+def create_event_bus() -> EventBus:
+    if config.event_bus_backend == "redis":
+        if not config.event_bus_redis_url:
+            raise ValueError("event_bus_redis_url is required for the redis backend")
+        if importlib.util.find_spec("redis") is None:
+            raise ValueError("the redis backend needs the redis package, pip install redis")
+        return RedisEventBus(config.event_bus_redis_url)
+    return MemoryEventBus(config.event_queue_size)
@@ -0,0 +1,238 @@
+from collections import Counter, deque
+from typing import Dict, Any, Optional, Union
+from clients.rate_limit import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    TokenBucket,
+    backoff_delay,
+    retry_after_seconds
+)
+from config import config
+import metrics
+import asyncio
+import statistics
+import time
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ProviderError(Exception):
+    """A provider call that failed after ``request`` had already retried it.
+
+    429, 5xx and transport failures (``status`` is then the exception name)
+    are retryable: the job goes back on the queue, after ``retry_after`` if
+    the provider sent one. Any other 4xx will fail the same way again.
+    """
+
+    def __init__(self, provider: str, status: Union[int, str], retry_after: Optional[float] = None) -> None:
+        super().__init__(f"{provider} API failed: {status}")
+        self.provider = provider
+        self.status = status
+        self.retry_after = retry_after or 0.0
+        self.retryable = not isinstance(status, int) or status == 429 or status >= 500
+    
+    @classmethod
+    def from_response(cls, provider: str, response: httpx.Response) -> "ProviderError":
+        return cls(provider, response.status_code, retry_after_seconds(response))
+
+
+def is_retryable(error: BaseException) -> bool:
+    return getattr(error, "retryable", True)
+
+
+class ProviderHTTPClient:
+    """Shared keep-alive HTTP/2 client for one outbound provider.
+
+    Records request latency, status codes and how many requests had to open
+    a new connection, so pooling efficiency is visible per provider.
+    
+    ``request`` goes through the provider's circuit breaker, token bucket
+    and adaptive concurrency limit, and retries 429, 5xx and transport
+    errors with jittered backoff or the provider's Retry-After.
+    """
+
+    def __init__(
+        self,
+        provider: str,
+        base_url: str,
+        timeout: float,
+        max_connections: int,
+        headers: Optional[Dict[str, str]] = None,
+        concurrency: int = 8,
+        max_concurrency: int = 32,
+        rate_per_second: float = 0.0,
+        latency_target: float = 0.0
+    ) -> None:
+        self.provider = provider
+        self.limiter = AdaptiveLimiter(
+            initial=concurrency,
+            minimum=config.outbound_concurrency_min,
+            maximum=max_concurrency,
+            latency_target=latency_target
+        )
+        self.bucket = TokenBucket(rate_per_second, burst=max(rate_per_second, 1.0))
+        self.breaker = CircuitBreaker(provider, config.circuit_failure_threshold, config.circuit_reset_seconds)
+        self.retries: Counter = Counter()
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            http2=True,
+            timeout=httpx.Timeout(timeout, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=config.http_max_keepalive_connections
+            ),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]}
+        )
+        self.requests = 0
+        self.errors = 0
+        self.new_connections = 0
+        self.statuses: Counter = Counter()
+        self.latencies: deque = deque(maxlen=1000)
+    
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+    
+    async def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+        request.extensions["sonanta_started"] = time.perf_counter()
+    
+    async def _on_response(self, response: httpx.Response) -> None:
+        started = response.request.extensions.get("sonanta_started")
+        elapsed = time.perf_counter() - started if started is not None else None
+        if elapsed is not None:
+            self.latencies.append(elapsed)
+        self.statuses[response.status_code] += 1
+        metrics.observe_outbound(self.provider, response.status_code, elapsed)
+    
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        try:
+            probe = self.breaker.before_request()
+        except CircuitOpenError:
+            metrics.observe_rejected(self.provider)
+            raise
+        
+        started = None
+        outcome = None
+        overloaded = False
+        latency = None
+        # a cancelled or crashed call must not keep its concurrency slot, or
+        # leave the breaker waiting on a probe that never reports back
+        try:
+            await self.bucket.acquire()
+            started = await self.limiter.acquire()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors += 1
+                metrics.observe_outbound(self.provider, "error")
+                outcome = False
+                raise
+            
+            latency = time.monotonic() - started
+            overloaded = response.status_code == 429
+            # a 429 says we are too fast, not that the provider is down,
+            # unless it answers the probe that would close the circuit
+            if not overloaded:
+                outcome = response.status_code < 500
+            elif probe:
+                outcome = False
+            return response
+        finally:
+            if started is not None:
+                await self.limiter.release(started, overloaded=overloaded, latency=latency)
+            if outcome is not None:
+                self.breaker.record(outcome)
+            elif probe:
+                self.breaker.abandon_probe()
+    
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        attempts = config.outbound_max_attempts
+        for attempt in range(1, attempts + 1):
+            try:
+                response = await self._send(method, url, **kwargs)
+            except CircuitOpenError:
+                raise
+            except httpx.TransportError as e:
+                if attempt == attempts:
+                    raise ProviderError(self.provider, type(e).__name__) from e
+                reason = "transport"
+                delay = backoff_delay(attempt, config.outbound_retry_base_seconds, config.outbound_retry_max_seconds)
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == attempts:
+                    return response
+                
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None and retry_after > config.outbound_max_retry_after_seconds:
+                    return response
+                await response.aclose()
+                
+                reason = str(response.status_code)
+                if retry_after is not None:
+                    # every caller waits on the bucket, not just this one
+                    self.bucket.pause(retry_after)
+                    delay = 0.0
+                else:
+                    delay = backoff_delay(attempt, config.outbound_retry_base_seconds, config.outbound_retry_max_seconds)
+            finally:
+                metrics.observe_flow(self.provider, self.limiter.limit, self.breaker.state != CircuitBreaker.CLOSED)
+            
+            self.retries[reason] += 1
+            metrics.observe_retry(self.provider, reason)
+            await asyncio.sleep(delay)
+    
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+    
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+    
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "new_connections": self.new_connections,
+            "reuse_ratio": round(1 - self.new_connections / self.requests, 4) if self.requests else 0.0,
+            "latency_p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+            "latency_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1) if latencies else None,
+            "retries": dict(self.retries),
+            "concurrency": self.limiter.stats(),
+            "rate_limit": self.bucket.stats(),
+            "circuit": self.breaker.stats()
+        }
+    
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def create_provider_clients() -> Dict[str, ProviderHTTPClient]:
+    return {
+        "elevenlabs": ProviderHTTPClient(
+            "elevenlabs",
+            base_url="https://api.elevenlabs.io",
+            timeout=config.elevenlabs_http_timeout_seconds,
+            max_connections=config.elevenlabs_http_max_connections,
+            headers={"xi-api-key": config.elevenlabs_api_key},
+            concurrency=config.elevenlabs_concurrency_initial,
+            max_concurrency=config.elevenlabs_concurrency_max,
+            rate_per_second=config.elevenlabs_rate_per_second,
+            latency_target=config.elevenlabs_latency_target_seconds
+        ),
+        "openai": ProviderHTTPClient(
+            "openai",
+            base_url="https://api.openai.com",
+            timeout=config.openai_http_timeout_seconds,
+            max_connections=config.openai_http_max_connections,
+            headers={"Authorization": f"Bearer {config.openai_api_key}"},
+            concurrency=config.openai_concurrency_initial,
+            max_concurrency=config.openai_concurrency_max,
+            rate_per_second=config.openai_rate_per_second,
+            latency_target=config.openai_latency_target_seconds
+        )
+    }
@@ -0,0 +1,280 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone, timedelta
+from clients.supabase import SupabaseClient
+from config import config
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    max_attempts: int = 5
+    created_at: float = 0.0
+    started_at: float = 0.0
+    locked_by: Optional[str] = None
+    
+    @property
+    def final_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+    
+    @property
+    def wait_seconds(self) -> float:
+        return max(self.started_at - self.created_at, 0.0)
+
+
+class LeaseLostError(Exception):
+    """The job was reclaimed by another worker before this one finished it."""
+
+
+class JobQueue(ABC):
+    """Durable at-least-once job queue.
+
+    A claimed job stays invisible for ``visibility_timeout`` seconds; if the
+    worker dies before completing or failing it, it becomes claimable again,
+    unless that was its last attempt. ``complete`` and ``fail`` only apply
+    while the caller still holds the lease, and raise LeaseLostError if not.
+    """
+
+    @abstractmethod
+    async def enqueue(self, kind: str, payload: Dict[str, Any], delay: float = 0) -> str:
+        ...
+    
+    @abstractmethod
+    async def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        ...
+    
+    @abstractmethod
+    async def complete(self, job: Job) -> None:
+        ...
+    
+    @abstractmethod
+    async def fail(self, job: Job, error: str, retry_delay: Optional[float]) -> None:
+        """Requeue after ``retry_delay``; None or the last attempt buries the job."""
+    
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        ...
+    
+    async def aclose(self) -> None:
+        """Release the backend's connections; nothing to do by default."""
+
+
+def _timestamp(value: Optional[str]) -> float:
+    return datetime.fromisoformat(value).timestamp() if value else 0.0
+
+
+def _summarize(rows) -> Dict[str, Any]:
+    # rows are (status, job count, oldest created_at as epoch seconds)
+    stats = {"depth": 0, "running": 0, "dead": 0, "oldest_queued_seconds": 0.0}
+    for status, jobs, oldest in rows:
+        if status == "queued":
+            stats["depth"] = jobs
+            stats["oldest_queued_seconds"] = round(time.time() - oldest, 3)
+        elif status in ("running", "dead"):
+            stats[status] = jobs
+    return stats
+
+
+class SupabaseJobQueue(JobQueue):
+    """Queue backed by the ``jobs`` table and its claim/stats functions."""
+
+    def __init__(self, supabase_client: SupabaseClient) -> None:
+        self.supabase_client = supabase_client
+        self.client = supabase_client.get_client()
+    
+    async def _execute(self, query):
+        return await self.supabase_client.run(query.execute)
+    
+    async def enqueue(self, kind: str, payload: Dict[str, Any], delay: float = 0) -> str:
+        visible_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+        response = await self._execute(self.client.table("jobs").insert({
+            "kind": kind,
+            "payload": payload,
+            "max_attempts": config.job_max_attempts,
+            "visible_at": visible_at.isoformat()
+        }))
+        return response.data[0]["id"]
+    
+    async def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        response = await self._execute(self.client.rpc("claim_job", {
+            "p_worker": worker_id,
+            "p_visibility_seconds": int(visibility_timeout)
+        }))
+        if not response.data:
+            return None
+        
+        row = response.data[0]
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=row["payload"] or {},
+            attempts=row["attempts"],
+            max_attempts=row["max_attempts"],
+            created_at=_timestamp(row["created_at"]),
+            started_at=_timestamp(row["started_at"]),
+            locked_by=row["locked_by"]
+        )
+    
+    async def _update_leased(self, job: Job, data: Dict[str, Any]) -> None:
+        response = await self._execute(
+            self.client.table("jobs")
+                .update(data)
+                .eq("id", job.id)
+                .eq("status", "running")
+                .eq("locked_by", job.locked_by)
+        )
+        if not response.data:
+            raise LeaseLostError(job.id)
+    
+    async def complete(self, job: Job) -> None:
+        await self._update_leased(job, {"status": "completed", "finished_at": datetime.now(timezone.utc).isoformat()})
+    
+    async def fail(self, job: Job, error: str, retry_delay: Optional[float]) -> None:
+        now = datetime.now(timezone.utc)
+        data = {"last_error": error[:2000], "locked_by": None}
+        if job.final_attempt or retry_delay is None:
+            data.update({"status": "dead", "finished_at": now.isoformat()})
+        else:
+            data.update({"status": "queued", "visible_at": (now + timedelta(seconds=retry_delay)).isoformat()})
+        
+        await self._update_leased(job, data)
+    
+    async def stats(self) -> Dict[str, Any]:
+        response = await self._execute(self.client.rpc("job_queue_stats", {}))
+        return _summarize(
+            (row["status"], row["jobs"], _timestamp(row["oldest"]))
+            for row in response.data or []
+        )
+
+
+class SQLiteJobQueue(JobQueue):
+    """Single-host stand-in with the same semantics, for local runs and tests."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as conn:
+            # readers don't block the writer, and commits skip the per-write fsync
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    visible_at REAL NOT NULL,
+                    locked_by TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_claimable ON jobs(status, visible_at)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    def _enqueue(self, kind: str, payload: Dict[str, Any], delay: float) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, max_attempts, visible_at, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), config.job_max_attempts, now + delay, now)
+            )
+        return job_id
+    
+    def _claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # abandoned on its last attempt, running it again would exceed max_attempts
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', locked_by = NULL, finished_at = ?, "
+                "last_error = COALESCE(last_error, 'visibility timeout expired') "
+                "WHERE status = 'running' AND visible_at <= ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status IN ('queued', 'running') AND visible_at <= ? AND attempts < max_attempts "
+                "ORDER BY visible_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_by = ?, started_at = ?, visible_at = ? WHERE id = ?",
+                (worker_id, now, now + visibility_timeout, row["id"])
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        
+        return Job(
+            id=row["id"],
+            kind=row["kind"],
+            payload=json.loads(row["payload"]),
+            attempts=row["attempts"] + 1,
+            max_attempts=row["max_attempts"],
+            created_at=row["created_at"],
+            started_at=now,
+            locked_by=worker_id
+        )
+    
+    def _update_leased(self, job: Job, **fields: Any) -> None:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND status = 'running' AND locked_by = ?",
+                (*fields.values(), job.id, job.locked_by)
+            )
+        if cursor.rowcount == 0:
+            raise LeaseLostError(job.id)
+    
+    def _stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT status, COUNT(*), MIN(created_at) FROM jobs WHERE status <> 'completed' GROUP BY status"
+            ).fetchall()
+        return _summarize(tuple(row) for row in rows)
+    
+    async def enqueue(self, kind: str, payload: Dict[str, Any], delay: float = 0) -> str:
+        return await asyncio.to_thread(self._enqueue, kind, payload, delay)
+    
+    async def claim(self, worker_id: str, visibility_timeout: float) -> Optional[Job]:
+        return await asyncio.to_thread(self._claim, worker_id, visibility_timeout)
+    
+    async def complete(self, job: Job) -> None:
+        await asyncio.to_thread(self._update_leased, job, status="completed", finished_at=time.time())
+    
+    async def fail(self, job: Job, error: str, retry_delay: Optional[float]) -> None:
+        if job.final_attempt or retry_delay is None:
+            fields = {"status": "dead", "finished_at": time.time()}
+        else:
+            fields = {"status": "queued", "visible_at": time.time() + retry_delay}
+        await asyncio.to_thread(self._update_leased, job, last_error=error[:2000], locked_by=None, **fields)
+    
+    async def stats(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._stats)
+
+
+def create_job_queue(supabase_client: SupabaseClient) -> JobQueue:
+    if config.job_queue_backend == "sqlite":
+        return SQLiteJobQueue(config.job_queue_sqlite_path)
+    return SupabaseJobQueue(supabase_client)
@@ -0,0 +1,190 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+from datetime import datetime, timezone
+import asyncio
+import random
+import time
+import httpx
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised without calling the provider while its circuit is open."""
+    
+    def __init__(self, provider: str, retry_after: float) -> None:
+        super().__init__(f"{provider} circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def backoff_delay(attempt: int, base: float, ceiling: float) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(base * 2 ** (attempt - 1), ceiling))
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    # seconds or an HTTP date
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    """AIMD cap on in-flight requests.
+
+    Every success raises the limit by ``1 / limit`` (about one per round of
+    requests); a 429 or a response slower than ``latency_target`` halves it.
+    Only requests started after the last decrease can decrease it again, so
+    one burst of 429s counts once.
+    """
+    
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        latency_target: float = 0.0,
+        backoff: float = 0.5
+    ) -> None:
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.in_flight = 0
+        self.counters: Counter = Counter()
+        self._decreased_at = 0.0
+        self._condition = asyncio.Condition()
+    
+    async def acquire(self) -> float:
+        async with self._condition:
+            if self.in_flight >= int(self.limit):
+                self.counters["queued"] += 1
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+    
+    async def release(self, started: float, overloaded: bool, latency: Optional[float] = None) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            slow = bool(self.latency_target and latency is not None and latency > self.latency_target)
+            if (overloaded or slow) and started >= self._decreased_at:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                self._decreased_at = time.monotonic()
+                self.counters["decreases"] += 1
+            elif not overloaded and not slow:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"limit": round(self.limit, 2), "in_flight": self.in_flight, **self.counters}
+
+
+class TokenBucket:
+    """Requests per second with bursts, paused while a Retry-After runs."""
+    
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.counters: Counter = Counter()
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+    
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.counters["pauses"] += 1
+    
+    async def acquire(self) -> None:
+        # one waiter at a time keeps the order fair
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate <= 0:
+                    return
+                else:
+                    self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+                self.counters["waits"] += 1
+                self.counters["wait_seconds"] += wait
+                await asyncio.sleep(wait)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "paused_seconds": round(max(self._paused_until - time.monotonic(), 0.0), 2),
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in self.counters.items()}
+        }
+
+
+class CircuitBreaker:
+    """Opens after ``threshold`` consecutive failures.
+
+    While open, calls fail fast until ``reset_seconds`` have passed; then a
+    single probe is let through and its outcome closes or reopens it.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, provider: str, threshold: int, reset_seconds: float) -> None:
+        self.provider = provider
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.counters: Counter = Counter()
+        self._opened_at = 0.0
+        self._probing = False
+    
+    def before_request(self) -> bool:
+        """Raise while open; True if this request is the half-open probe."""
+        if self.state == self.CLOSED:
+            return False
+        
+        remaining = self._opened_at + self.reset_seconds - time.monotonic()
+        if self.state == self.OPEN and remaining <= 0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        
+        self.counters["rejected"] += 1
+        raise CircuitOpenError(self.provider, max(remaining, 1.0))
+    
+    def record(self, success: bool) -> None:
+        self._probing = False
+        if success:
+            self.failures = 0
+            self.state = self.CLOSED
+            return
+        
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.counters["opened"] += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+    
+    def abandon_probe(self) -> None:
+        # the probe ended without an answer, the next request probes instead
+        self._probing = False
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.failures, **self.counters}
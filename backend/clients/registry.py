@@ -0,0 +1,149 @@
+from collections import Counter
+from typing import Dict, Any, Optional, Union
+import httpx
+from clients.elevenlabs import ElevenLabsClient
+from clients.http import ProviderHTTPClient, create_provider_clients
+from clients.job_queue import JobQueue, create_job_queue
+from clients.response_cache import ResponseCache, create_response_cache
+from clients.event_bus import EventBus, create_event_bus
+from clients.vector_index import VectorIndex, create_vector_index
+from clients.signed_url_pool import SignedURLPool, create_signed_url_pool
+from clients.streaming_stt import StreamingSTT, create_streaming_stt
+from clients.supabase import SupabaseClient
+
+
+def _open_connections(session: Union[httpx.Client, httpx.AsyncClient]) -> int:
+    pool = getattr(session._transport, "_pool", None)
+    return len(pool.connections) if pool is not None else 0
+
+
+class ClientRegistry:
+    """One long-lived instance of each external client per worker process."""
+
+    def __init__(self) -> None:
+        self._supabase: Optional[SupabaseClient] = None
+        self._elevenlabs: Optional[ElevenLabsClient] = None
+        self._http: Optional[Dict[str, ProviderHTTPClient]] = None
+        self._job_queue: Optional[JobQueue] = None
+        self._response_cache: Optional[ResponseCache] = None
+        self._event_bus: Optional[EventBus] = None
+        self._vector_index: Optional[VectorIndex] = None
+        self._signed_url_pool: Optional[SignedURLPool] = None
+        self._streaming_stt: Optional[StreamingSTT] = None
+        self._created: Counter = Counter()
+        self._resolved: Counter = Counter()
+    
+    @property
+    def supabase(self) -> SupabaseClient:
+        if self._supabase is None:
+            self._supabase = SupabaseClient()
+            self._created["supabase"] += 1
+        self._resolved["supabase"] += 1
+        return self._supabase
+    
+    @property
+    def http(self) -> Dict[str, ProviderHTTPClient]:
+        if self._http is None:
+            self._http = create_provider_clients()
+        return self._http
+    
+    @property
+    def elevenlabs(self) -> ElevenLabsClient:
+        if self._elevenlabs is None:
+            self._elevenlabs = ElevenLabsClient(self.http["elevenlabs"])
+            self._created["elevenlabs"] += 1
+        self._resolved["elevenlabs"] += 1
+        return self._elevenlabs
+    
+    @property
+    def job_queue(self) -> JobQueue:
+        if self._job_queue is None:
+            self._job_queue = create_job_queue(self.supabase)
+        return self._job_queue
+    
+    @property
+    def response_cache(self) -> ResponseCache:
+        if self._response_cache is None:
+            self._response_cache = create_response_cache()
+        return self._response_cache
+    
+    @property
+    def event_bus(self) -> EventBus:
+        if self._event_bus is None:
+            self._event_bus = create_event_bus()
+        return self._event_bus
+    
+    @property
+    def vector_index(self) -> VectorIndex:
+        if self._vector_index is None:
+            self._vector_index = create_vector_index(self.supabase)
+        return self._vector_index
+    
+    @property
+    def signed_url_pool(self) -> SignedURLPool:
+        if self._signed_url_pool is None:
+            self._signed_url_pool = create_signed_url_pool(self.elevenlabs.get_signed_url)
+        return self._signed_url_pool
+    
+    @property
+    def streaming_stt(self) -> StreamingSTT:
+        if self._streaming_stt is None:
+            self._streaming_stt = create_streaming_stt()
+        return self._streaming_stt
+    
+    def startup(self) -> None:
+        self.supabase
+        self.elevenlabs
+    
+    async def shutdown(self) -> None:
+        if self._signed_url_pool is not None:
+            await self._signed_url_pool.stop()
+            self._signed_url_pool = None
+        # sessions, queues and caches first, the clients they run on last
+        for name in ("_streaming_stt", "_event_bus", "_response_cache", "_job_queue", "_vector_index"):
+            resource = getattr(self, name)
+            if resource is not None:
+                await resource.aclose()
+                setattr(self, name, None)
+        self._elevenlabs = None
+        if self._supabase is not None:
+            self._supabase.close()
+            self._supabase = None
+        if self._http is not None:
+            for client in self._http.values():
+                await client.aclose()
+            self._http = None
+    
+    def stats(self) -> Dict[str, Any]:
+        stats = {}
+        
+        for name in ("supabase", "elevenlabs"):
+            resolved = self._resolved[name]
+            created = self._created[name]
+            stats[name] = {
+                "created": created,
+                "resolved": resolved,
+                "reuse_ratio": round((resolved - created) / resolved, 4) if resolved else 0.0
+            }
+        
+        if self._supabase is not None:
+            stats["supabase"]["open_connections"] = {
+                session_name: _open_connections(session)
+                for session_name, session in self._supabase.http_sessions().items()
+            }
+        
+        if self._signed_url_pool is not None:
+            stats["signed_url_pool"] = self._signed_url_pool.stats()
+        
+        if self._streaming_stt is not None:
+            stats["streaming_stt"] = self._streaming_stt.stats()
+        
+        stats["http"] = {
+            provider: {**client.stats(), "open_connections": _open_connections(client.client)}
+            for provider, client in (self._http or {}).items()
+        }
+        
+        return stats
+
+
+registry = ClientRegistry()
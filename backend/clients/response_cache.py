@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+from config import config
+import importlib.util
+import time
+
+
+@dataclass
+class CachedResponse:
+    etag: str
+    body: bytes
+
+
+class ResponseCache(ABC):
+    """Per-user cache of serialized read responses.
+
+    Invalidation is per user: each user has a generation that is part of
+    every key, and bumping it orphans all of that user's entries at once.
+    Callers read the generation before loading a payload and hand it to
+    ``set``, so a payload loaded across an invalidation is never served.
+    """
+
+    # whether invalidations made by worker.py reach this cache
+    shared = False
+    
+    @abstractmethod
+    async def generation(self, user_id: str) -> int:
+        ...
+    
+    @abstractmethod
+    async def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        ...
+    
+    @abstractmethod
+    async def set(self, user_id: str, key: str, value: CachedResponse, ttl: float, generation: int) -> None:
+        ...
+    
+    @abstractmethod
+    async def invalidate_user(self, user_id: str) -> None:
+        ...
+    
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        ...
+    
+    async def aclose(self) -> None:
+        """Release the backend's connections; nothing to do by default."""
+
+
+def _hit_ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return round(hits / lookups, 4) if lookups else 0.0
+
+
+class MemoryResponseCache(ResponseCache):
+    """Bounded LRU in this process. Writes made by other processes are not seen."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_writes = 0
+        self._generations: Dict[str, int] = {}
+        self._entries: "OrderedDict[Tuple[str, int, str], Tuple[float, CachedResponse]]" = OrderedDict()
+    
+    async def generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+    
+    async def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        cache_key = (user_id, self._generations.get(user_id, 0), key)
+        entry = self._entries.get(cache_key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[cache_key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(cache_key)
+        self.hits += 1
+        return entry[1]
+    
+    async def set(self, user_id: str, key: str, value: CachedResponse, ttl: float, generation: int) -> None:
+        if self.max_entries <= 0 or ttl <= 0:
+            return
+        if generation != self._generations.get(user_id, 0):
+            # invalidated while the payload was loading, it may already be stale
+            self.stale_writes += 1
+            return
+        cache_key = (user_id, generation, key)
+        self._entries[cache_key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(cache_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    async def invalidate_user(self, user_id: str) -> None:
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+        self.invalidations += 1
+        # orphaned entries age out through the LRU, drop them eagerly anyway
+        for cache_key in [k for k in self._entries if k[0] == user_id]:
+            del self._entries[cache_key]
+    
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "stale_writes": self.stale_writes,
+            "hit_ratio": _hit_ratio(self.hits, self.misses)
+        }
+
+
+class RedisResponseCache(ResponseCache):
+    """Shared across API and worker processes, so worker writes invalidate too."""
+
+    shared = True
+    
+    def __init__(self, url: str, prefix: str = "sonanta:responses") -> None:
+        # optional dependency, only needed for this backend
+        import redis.asyncio as redis
+        
+        self.redis = redis.from_url(url)
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _key(self, user_id: str, generation: int, key: str) -> str:
+        return f"{self.prefix}:{user_id}:{generation}:{key}"
+    
+    async def generation(self, user_id: str) -> int:
+        return int(await self.redis.get(f"{self.prefix}:gen:{user_id}") or 0)
+    
+    async def get(self, user_id: str, key: str) -> Optional[CachedResponse]:
+        raw = await self.redis.get(self._key(user_id, await self.generation(user_id), key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        etag, body = raw.split(b"\n", 1)
+        return CachedResponse(etag=etag.decode(), body=body)
+    
+    async def set(self, user_id: str, key: str, value: CachedResponse, ttl: float, generation: int) -> None:
+        if ttl <= 0:
+            return
+        # written under the generation the payload was loaded in; if that has
+        # been invalidated since, nothing reads this key again
+        await self.redis.set(
+            self._key(user_id, generation, key),
+            value.etag.encode() + b"\n" + value.body,
+            px=int(ttl * 1000)
+        )
+    
+    async def invalidate_user(self, user_id: str) -> None:
+        # old generations expire on their own TTL
+        await self.redis.incr(f"{self.prefix}:gen:{user_id}")
+        self.invalidations += 1
+    
+    async def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_ratio": _hit_ratio(self.hits, self.misses)
+        }
+    
+    async def aclose(self) -> None:
+        await self.redis.aclose()
+
+
+def create_response_cache() -> ResponseCache:
+    if config.response_cache_backend == "redis":
+        if not config.response_cache_redis_url:
+            raise ValueError("response_cache_redis_url is required for the redis backend")
+        if importlib.util.find_spec("redis") is None:
+            raise ValueError("the redis backend needs the redis package, pip install redis")
+        return RedisResponseCache(config.response_cache_redis_url)
+    return MemoryResponseCache(config.response_cache_max_entries)
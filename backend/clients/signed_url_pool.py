@@ -0,0 +1,131 @@
+from collections import Counter, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+from config import config
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SignedURLPool:
+    """Signed conversation URLs fetched ahead of time.
+
+    Each URL starts one conversation, so ``get`` hands it out once. URLs are
+    dropped ``ttl`` seconds after they were fetched, well before ElevenLabs
+    expires them, and the pool is topped back up to ``size`` in the
+    background whenever it falls to ``min_size``.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Awaitable[str]],
+        size: int,
+        min_size: int,
+        ttl: float,
+        refill_concurrency: int
+    ) -> None:
+        self.fetch = fetch
+        self.size = size
+        self.min_size = min_size
+        self.ttl = ttl
+        self.refill_concurrency = refill_concurrency
+        self.counters: Counter = Counter()
+        self._urls: Deque[Tuple[float, str]] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+    
+    def _purge(self) -> None:
+        now = time.monotonic()
+        while self._urls and self._urls[0][0] <= now:
+            self._urls.popleft()
+            self.counters["expired"] += 1
+    
+    async def get(self) -> str:
+        self._purge()
+        if self._urls:
+            # oldest first, the rest stay usable longer
+            _, url = self._urls.popleft()
+            self.counters["hits"] += 1
+            self._maybe_refill()
+            return url
+        
+        self.counters["misses"] += 1
+        self._maybe_refill()
+        return await self.fetch()
+    
+    def _maybe_refill(self) -> None:
+        if self.size <= 0 or len(self._urls) > self.min_size:
+            return
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.create_task(self._refill())
+    
+    async def _fetch_one(self) -> None:
+        try:
+            url = await self.fetch()
+        except Exception:
+            self.counters["refill_errors"] += 1
+            logger.exception("Failed to pre-fetch signed URL")
+            return
+        self._urls.append((time.monotonic() + self.ttl, url))
+        self.counters["fetched"] += 1
+    
+    async def _refill(self) -> None:
+        # keeps going until full, URLs handed out meanwhile are replaced too
+        while True:
+            self._purge()
+            missing = self.size - len(self._urls)
+            if missing <= 0:
+                return
+            fetched = self.counters["fetched"]
+            await asyncio.gather(*[
+                self._fetch_one() for _ in range(min(missing, self.refill_concurrency))
+            ])
+            if self.counters["fetched"] == fetched:
+                # provider is failing, the next get or refresh tick retries
+                return
+    
+    async def _refresh(self) -> None:
+        # URLs age out even when nobody starts a conversation
+        while True:
+            await asyncio.sleep(max(self.ttl / 4, 1.0))
+            self._purge()
+            self._maybe_refill()
+    
+    def start(self) -> None:
+        if self.size <= 0 or self._refresher is not None:
+            return
+        self._maybe_refill()
+        self._refresher = asyncio.create_task(self._refresh())
+    
+    async def stop(self) -> None:
+        for task in (self._refresher, self._refill_task):
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *[task for task in (self._refresher, self._refill_task) if task is not None],
+            return_exceptions=True
+        )
+        self._refresher = None
+        self._refill_task = None
+        self._urls.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        self._purge()
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            "available": len(self._urls),
+            "size": self.size,
+            **self.counters,
+            "hit_ratio": round(self.counters["hits"] / lookups, 4) if lookups else 0.0
+        }
+
+
+def create_signed_url_pool(fetch: Callable[[], Awaitable[str]]) -> SignedURLPool:
+    return SignedURLPool(
+        fetch,
+        size=config.signed_url_pool_size,
+        min_size=config.signed_url_pool_min,
+        ttl=config.signed_url_ttl_seconds,
+        refill_concurrency=config.signed_url_refill_concurrency
+    )
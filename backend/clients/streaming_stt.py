@@ -0,0 +1,225 @@
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from urllib.parse import urlencode
+from config import config
+import asyncio
+import base64
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# sample rates the realtime API accepts as pcm_<rate>
+SAMPLE_RATES = (8000, 16000, 22050, 24000, 44100, 48000)
+
+
+class StreamingSTTError(Exception):
+    pass
+
+
+class StreamingSession(ABC):
+    """One recording's speech-to-text stream.
+
+    Iterating yields ``{"type": "partial" | "segment", "text": ...}`` events
+    as the provider sends them and stops once the session has ended.
+    """
+
+    def __init__(self) -> None:
+        self.segments: List[str] = []
+        self.language: Optional[str] = None
+        self.error: Optional[str] = None
+        self._events: asyncio.Queue = asyncio.Queue()
+    
+    def _emit(self, event: Dict[str, Any]) -> None:
+        self._events.put_nowait(event)
+    
+    def _end(self) -> None:
+        self._events.put_nowait(None)
+    
+    async def __aiter__(self) -> AsyncIterator[Dict[str, Any]]:
+        while (event := await self._events.get()) is not None:
+            yield event
+    
+    @abstractmethod
+    async def send(self, chunk: bytes) -> None:
+        ...
+    
+    @abstractmethod
+    async def finish(self) -> Dict[str, Any]:
+        """Flush the last segment and return the whole transcript."""
+    
+    @abstractmethod
+    async def aclose(self) -> None:
+        ...
+    
+    def result(self) -> Dict[str, Any]:
+        return {
+            "text": " ".join(self.segments),
+            "language_code": self.language,
+            "segment_count": len(self.segments)
+        }
+
+
+class StreamingSTT(ABC):
+    @abstractmethod
+    async def open(self, sample_rate: int, language: Optional[str] = None) -> StreamingSession:
+        ...
+    
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+    
+    async def aclose(self) -> None:
+        """Release the backend's connections; nothing to do by default."""
+
+
+class ElevenLabsStreamingSession(StreamingSession):
+    def __init__(self, connection, sample_rate: int, counters: Counter) -> None:
+        super().__init__()
+        self.connection = connection
+        self.sample_rate = sample_rate
+        self.counters = counters
+        # audio sent or words heard since the last commit, closing waits for them
+        self._uncommitted = False
+        self._partial = ""
+        self._received = asyncio.Event()
+        self._reader = asyncio.create_task(self._read())
+    
+    async def _read(self) -> None:
+        try:
+            async for message in self.connection:
+                data = json.loads(message)
+                kind = data.get("message_type")
+                self._received.set()
+                if kind == "partial_transcript":
+                    if data.get("text"):
+                        self._uncommitted = True
+                        self._partial = data["text"].strip()
+                        self._emit({"type": "partial", "text": data["text"]})
+                elif kind == "committed_transcript":
+                    self._uncommitted = False
+                    self._partial = ""
+                    self.language = data.get("language_code") or self.language
+                    if data.get("text"):
+                        self.segments.append(data["text"].strip())
+                        self._emit({"type": "segment", "text": data["text"].strip()})
+                elif kind and "error" in kind:
+                    self.error = data.get("error") or kind
+                    self.counters["errors"] += 1
+                    break
+        except Exception as e:
+            # the connection dropped, the recording carries on without it
+            self.error = self.error or str(e) or type(e).__name__
+            self.counters["errors"] += 1
+        finally:
+            self._received.set()
+            self._end()
+    
+    async def _send_chunk(self, chunk: bytes, commit: bool) -> None:
+        await self.connection.send(json.dumps({
+            "message_type": "input_audio_chunk",
+            "audio_base_64": base64.b64encode(chunk).decode(),
+            "commit": commit,
+            "sample_rate": self.sample_rate
+        }))
+    
+    async def send(self, chunk: bytes) -> None:
+        if self.error or self._reader.done():
+            raise StreamingSTTError(self.error or "session closed")
+        self._uncommitted = True
+        await self._send_chunk(chunk, commit=False)
+    
+    async def finish(self) -> Dict[str, Any]:
+        if not self.error and not self._reader.done() and self._uncommitted:
+            await self._send_chunk(b"", commit=True)
+            try:
+                await asyncio.wait_for(self._wait_committed(), config.streaming_finish_timeout_seconds)
+            except asyncio.TimeoutError:
+                self.counters["finish_timeouts"] += 1
+                logger.warning("Realtime speech-to-text did not commit the last segment in time")
+        await self.aclose()
+        if self._partial:
+            # heard but never committed, still better than dropping the words
+            self.segments.append(self._partial)
+        if self.error:
+            raise StreamingSTTError(self.error)
+        return self.result()
+    
+    async def _wait_committed(self) -> None:
+        # a voice activity commit already in flight can arrive before ours,
+        # so once nothing is pending the provider still gets a moment to
+        # send words for audio it had not answered yet
+        while not self._reader.done():
+            self._received.clear()
+            try:
+                await asyncio.wait_for(
+                    self._received.wait(),
+                    None if self._uncommitted else config.streaming_commit_settle_seconds
+                )
+            except asyncio.TimeoutError:
+                return
+    
+    async def aclose(self) -> None:
+        await self.connection.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class ElevenLabsStreamingSTT(StreamingSTT):
+    """ElevenLabs realtime speech-to-text, one WebSocket per recording.
+
+    The provider commits a segment at each pause (voice activity detection),
+    so all but the last few words are final by the time recording stops.
+    """
+
+    def __init__(self, url: str, api_key: str, model: str) -> None:
+        # websockets ships with uvicorn[standard], only needed for this backend
+        from websockets.asyncio.client import connect
+        
+        self._connect = connect
+        self.url = url
+        self.api_key = api_key
+        self.model = model
+        self.counters: Counter = Counter()
+        self._sessions: Set[ElevenLabsStreamingSession] = set()
+    
+    async def open(self, sample_rate: int, language: Optional[str] = None) -> StreamingSession:
+        params = {
+            "model_id": self.model,
+            "audio_format": f"pcm_{sample_rate}",
+            "commit_strategy": "vad"
+        }
+        if language:
+            params["language_code"] = language
+        
+        try:
+            connection = await self._connect(
+                f"{self.url}?{urlencode(params)}",
+                additional_headers={"xi-api-key": self.api_key}
+            )
+        except Exception:
+            self.counters["connect_errors"] += 1
+            raise
+        
+        self.counters["sessions"] += 1
+        session = ElevenLabsStreamingSession(connection, sample_rate, self.counters)
+        self._sessions.add(session)
+        session._reader.add_done_callback(lambda _: self._sessions.discard(session))
+        return session
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "elevenlabs", "active": len(self._sessions), **self.counters}
+    
+    async def aclose(self) -> None:
+        await asyncio.gather(
+            *(session.aclose() for session in list(self._sessions)),
+            return_exceptions=True
+        )
+
+
+def create_streaming_stt() -> StreamingSTT:
+    return ElevenLabsStreamingSTT(
+        config.elevenlabs_realtime_url,
+        config.elevenlabs_api_key,
+        config.elevenlabs_realtime_model
+    )
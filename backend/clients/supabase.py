@@ -1,4 +1,11 @@
 from supabase import create_client, Client
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Callable, Optional
+import asyncio
+import time
+import httpx
+import metrics
 from config import config
 
 
@@ -8,17 +15,52 @@ class SupabaseClient:
             config.supabase_url,
             config.supabase_service_key
         )
+        # supabase-py is synchronous; blocking calls run on a bounded pool
+        # so they never stall the event loop
+        self.executor: Optional[ThreadPoolExecutor] = None
+        if config.supabase_executor_workers > 0:
+            self.executor = ThreadPoolExecutor(
+                max_workers=config.supabase_executor_workers,
+                thread_name_prefix="supabase"
+            )
     
     def get_client(self) -> Client:
         return self.client
     
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        # timed from the caller's side, so executor queueing shows up too
+        start = time.perf_counter()
+        try:
+            if self.executor is None:
+                result = func(*args, **kwargs)
+            else:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+        except Exception:
+            metrics.observe_outbound("supabase", "error", time.perf_counter() - start)
+            raise
+        metrics.observe_outbound("supabase", "ok", time.perf_counter() - start)
+        return result
+    
     async def verify_token(self, token: str):
         try:
             # using the service key to verify tokens
-            user = self.client.auth.get_user(token)
+            user = await self.run(self.client.auth.get_user, token)
             return user
         except Exception as e:
             return None
-        
-        
-supabase_client = SupabaseClient()
\ No newline at end of file
+    
+    def http_sessions(self) -> Dict[str, httpx.Client]:
+        # postgrest/storage sessions are created lazily by supabase-py
+        sessions = {"auth": self.client.auth._http_client}
+        if self.client._postgrest is not None:
+            sessions["postgrest"] = self.client._postgrest.session
+        if self.client._storage is not None:
+            sessions["storage"] = self.client._storage.session
+        return sessions
+    
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        for session in self.http_sessions().values():
+            session.close()
@@ -0,0 +1,182 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+from clients.supabase import SupabaseClient
+from config import config
+import math
+import re
+
+try:
+    import numpy
+except ImportError:  # optional, speeds up the in-memory index
+    numpy = None
+
+# Reciprocal rank fusion constant, the same one search_voice_memos uses
+RRF_K = 60
+
+SearchHit = Tuple[str, float]
+
+
+def _tokens(text: str) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def fuse(semantic: List[str], keyword: List[str], limit: int) -> List[SearchHit]:
+    """Reciprocal rank fusion of two ranked id lists."""
+    scores: Dict[str, float] = {}
+    for ranked in (semantic, keyword):
+        for rank, memo_id in enumerate(ranked, start=1):
+            scores[memo_id] = scores.get(memo_id, 0.0) + 1.0 / (RRF_K + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class VectorIndex(ABC):
+    """Per-user transcript embeddings with semantic, keyword and hybrid lookup.
+
+    ``search`` takes an embedding, a keyword query or both (hybrid) and
+    returns (memo_id, score) pairs, best first.
+    """
+
+    @abstractmethod
+    async def upsert(self, user_id: str, memo_id: str, embedding: List[float], text: str, model: str) -> None:
+        ...
+    
+    @abstractmethod
+    async def delete(self, user_id: str, memo_ids: List[str]) -> None:
+        ...
+    
+    @abstractmethod
+    async def search(
+        self,
+        user_id: str,
+        embedding: Optional[List[float]],
+        query: Optional[str],
+        limit: int
+    ) -> List[SearchHit]:
+        ...
+    
+    async def aclose(self) -> None:
+        """Release the backend's connections; nothing to do by default."""
+
+
+class PgVectorIndex(VectorIndex):
+    """voice_memo_embeddings plus the search_voice_memos RPC, see create_voice_memo_embeddings.sql."""
+
+    def __init__(self, supabase_client: SupabaseClient) -> None:
+        self.supabase_client = supabase_client
+        self.client = supabase_client.get_client()
+    
+    async def upsert(self, user_id: str, memo_id: str, embedding: List[float], text: str, model: str) -> None:
+        # keyword search reads voice_memos.transcript_tsv, text is not stored twice
+        query = self.client.table("voice_memo_embeddings").upsert({
+            "memo_id": memo_id,
+            "user_id": user_id,
+            "model": model,
+            "embedding": _vector_literal(embedding)
+        })
+        await self.supabase_client.run(query.execute)
+    
+    async def delete(self, user_id: str, memo_ids: List[str]) -> None:
+        # rows also go with ON DELETE CASCADE from voice_memos
+        query = self.client.table("voice_memo_embeddings") \
+            .delete() \
+            .eq("user_id", user_id) \
+            .in_("memo_id", memo_ids)
+        await self.supabase_client.run(query.execute)
+    
+    async def search(
+        self,
+        user_id: str,
+        embedding: Optional[List[float]],
+        query: Optional[str],
+        limit: int
+    ) -> List[SearchHit]:
+        response = await self.supabase_client.run(self.client.rpc("search_voice_memos", {
+            "p_user_id": user_id,
+            "p_embedding": _vector_literal(embedding) if embedding else None,
+            "p_query": query or None,
+            "p_match_count": limit
+        }).execute)
+        return [(row["memo_id"], row["score"]) for row in response.data or []]
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    return "[" + ",".join(f"{value:.7g}" for value in embedding) + "]"
+
+
+class MemoryVectorIndex(VectorIndex):
+    """Exact in-process stand-in for tests and single-process runs.
+
+    Only the process that indexed a memo can find it, so this can't back an
+    API whose jobs run in worker.py; the worker refuses to start with it.
+
+    Vectors are normalized on insert so cosine similarity is a dot product;
+    with numpy installed a user's vectors are scored as one matrix product.
+    """
+
+    def __init__(self) -> None:
+        self._vectors: Dict[str, Dict[str, List[float]]] = {}
+        self._tokens: Dict[str, Dict[str, set]] = {}
+        self._matrices: Dict[str, Any] = {}
+    
+    async def upsert(self, user_id: str, memo_id: str, embedding: List[float], text: str, model: str) -> None:
+        self._vectors.setdefault(user_id, {})[memo_id] = _normalize(embedding)
+        self._tokens.setdefault(user_id, {})[memo_id] = set(_tokens(text))
+        self._matrices.pop(user_id, None)
+    
+    async def delete(self, user_id: str, memo_ids: List[str]) -> None:
+        for memo_id in memo_ids:
+            self._vectors.get(user_id, {}).pop(memo_id, None)
+            self._tokens.get(user_id, {}).pop(memo_id, None)
+        self._matrices.pop(user_id, None)
+    
+    def _semantic(self, user_id: str, embedding: List[float], limit: int) -> List[str]:
+        vectors = self._vectors.get(user_id, {})
+        if not vectors:
+            return []
+        query = _normalize(embedding)
+        
+        if numpy is not None:
+            if user_id not in self._matrices:
+                self._matrices[user_id] = (list(vectors), numpy.array(list(vectors.values()), dtype=numpy.float32))
+            ids, matrix = self._matrices[user_id]
+            scores = matrix @ numpy.array(query, dtype=numpy.float32)
+            order = numpy.argsort(-scores)[:limit]
+            return [ids[index] for index in order]
+        
+        scored = [
+            (sum(a * b for a, b in zip(vector, query)), memo_id)
+            for memo_id, vector in vectors.items()
+        ]
+        return [memo_id for _, memo_id in sorted(scored, reverse=True)[:limit]]
+    
+    def _keyword(self, user_id: str, query: str, limit: int) -> List[str]:
+        terms = set(_tokens(query))
+        scored = [
+            (len(terms & tokens) / len(terms), memo_id)
+            for memo_id, tokens in self._tokens.get(user_id, {}).items()
+            if terms & tokens
+        ]
+        return [memo_id for _, memo_id in sorted(scored, reverse=True)[:limit]]
+    
+    async def search(
+        self,
+        user_id: str,
+        embedding: Optional[List[float]],
+        query: Optional[str],
+        limit: int
+    ) -> List[SearchHit]:
+        # each side contributes a deeper candidate list than the final page
+        semantic = self._semantic(user_id, embedding, limit * 4) if embedding else []
+        keyword = self._keyword(user_id, query, limit * 4) if query else []
+        return fuse(semantic, keyword, limit)
+
+
+def create_vector_index(supabase_client: SupabaseClient) -> VectorIndex:
+    if config.vector_index_backend == "memory":
+        return MemoryVectorIndex()
+    return PgVectorIndex(supabase_client)
@@ -15,12 +15,147 @@ class Config(BaseSettings):
     # ElevenLabs settings
     elevenlabs_api_key: str
     elevenlabs_agent_id: str
+    # HMAC secret of the post-call webhook; unsigned webhooks are only accepted in development
+    elevenlabs_webhook_secret: Optional[str] = None
+    elevenlabs_webhook_tolerance_seconds: int = 1800
+    # Pre-fetched signed URLs for conversation start (ElevenLabs issues them for 15 minutes)
+    signed_url_pool_size: int = 8
+    signed_url_pool_min: int = 3
+    signed_url_ttl_seconds: float = 600.0
+    signed_url_refill_concurrency: int = 4
     
     # OpenAI settings
     openai_api_key: str
     
+    # Outbound HTTP pool settings
+    http_max_keepalive_connections: int = 20
+    elevenlabs_http_timeout_seconds: float = 120.0
+    elevenlabs_http_max_connections: int = 20
+    openai_http_timeout_seconds: float = 30.0
+    openai_http_max_connections: int = 20
+    
+    # Outbound flow control per provider: AIMD concurrency (halved on 429 or
+    # responses slower than the target, 0 disables), a token bucket that
+    # Retry-After pauses, jittered retries and a circuit breaker
+    elevenlabs_concurrency_initial: int = 4
+    elevenlabs_concurrency_max: int = 16
+    elevenlabs_rate_per_second: float = 5.0
+    # speech-to-text latency follows the audio length, not provider load
+    elevenlabs_latency_target_seconds: float = 0.0
+    openai_concurrency_initial: int = 8
+    openai_concurrency_max: int = 32
+    openai_rate_per_second: float = 20.0
+    openai_latency_target_seconds: float = 10.0
+    outbound_concurrency_min: int = 1
+    outbound_max_attempts: int = 4
+    outbound_retry_base_seconds: float = 0.5
+    outbound_retry_max_seconds: float = 20.0
+    # longer waits fail the call and leave the retry to the job queue
+    outbound_max_retry_after_seconds: float = 60.0
+    circuit_failure_threshold: int = 5
+    circuit_reset_seconds: float = 30.0
+    
+    # Worker threads for blocking Supabase calls (0 runs them inline)
+    supabase_executor_workers: int = 16
+    
+    # Upload settings
+    max_upload_bytes: int = 52428800
+    upload_chunk_bytes: int = 1048576
+    upload_staging_dir: Optional[str] = None
+    upload_session_ttl_seconds: int = 86400
+    # Most memo ids accepted by POST /voice-memos/batch-get and /batch-delete
+    batch_max_items: int = 100
+    # Pass staged audio straight to a worker on the same host (skips the storage download)
+    audio_handoff_enabled: bool = True
+    
+    # Audio preprocessing before speech-to-text (skipped when ffmpeg is missing)
+    audio_normalization_enabled: bool = True
+    ffmpeg_path: str = "ffmpeg"
+    audio_sample_rate: int = 16000
+    audio_bitrate: str = "24k"
+    audio_silence_threshold: str = "-50dB"
+    audio_silence_min_seconds: float = 0.5
+    
+    # Long recordings are split at silences and transcribed in parallel
+    chunked_transcription_threshold_seconds: float = 300.0
+    chunk_target_seconds: float = 120.0
+    chunk_max_seconds: float = 180.0
+    chunk_concurrency: int = 4
+    audio_split_silence_threshold: str = "-35dB"
+    audio_split_silence_min_seconds: float = 0.4
+    
+    # Live transcription over WebSocket: 16-bit mono PCM is forwarded to
+    # ElevenLabs realtime speech-to-text while it is recorded
+    elevenlabs_realtime_url: str = "wss://api.elevenlabs.io/v1/speech-to-text/realtime"
+    elevenlabs_realtime_model: str = "scribe_v2_realtime"
+    streaming_sample_rate: int = 16000
+    # a recording with no audio for this long is stored as it is
+    streaming_idle_timeout_seconds: float = 30.0
+    # how long closing waits for the provider to commit the last words, and
+    # for anything still on its way once they are
+    streaming_finish_timeout_seconds: float = 5.0
+    streaming_commit_settle_seconds: float = 0.25
+    
+    # Job queue settings ("supabase" or "sqlite" for a single-host stand-in)
+    job_queue_backend: str = "supabase"
+    job_queue_sqlite_path: str = "jobs.sqlite3"
+    job_max_attempts: int = 5
+    job_visibility_timeout_seconds: float = 600.0
+    job_retry_base_seconds: float = 5.0
+    job_retry_max_seconds: float = 300.0
+    job_poll_interval_seconds: float = 1.0
+    worker_concurrency: int = 4
+    
+    # Per-user read cache ("memory" or "redis" to share invalidations with worker.py)
+    response_cache_backend: str = "memory"
+    response_cache_redis_url: Optional[str] = None
+    response_cache_max_entries: int = 5000
+    response_cache_ttl_seconds: float = 300.0
+    # Responses with a transcription in flight expire quickly, the worker's
+    # writes only reach a shared backend
+    response_cache_pending_ttl_seconds: float = 2.0
+    
+    # Transcription status events ("memory" or "redis" to receive the worker's events)
+    event_bus_backend: str = "memory"
+    event_bus_redis_url: Optional[str] = None
+    event_queue_size: int = 100
+    events_heartbeat_seconds: float = 15.0
+    # Without a shared bus the stream checks in-flight memos itself at this interval
+    events_poll_interval_seconds: float = 5.0
+    # polls a completed memo stays watched for its tags; enrichment may fail
+    events_tag_wait_polls: int = 12
+    
+    # Transcript search ("pgvector" or "memory" for an in-process stand-in
+    # that only works when jobs run in the API process, not in worker.py)
+    vector_index_backend: str = "pgvector"
+    embedding_model: str = "text-embedding-3-small"
+    embedding_max_chars: int = 24000
+    query_embedding_cache_size: int = 1000
+    search_max_results: int = 50
+    
+    # Related-memo context attached to new conversations
+    context_memo_count: int = 5
+    context_candidate_count: int = 50
+    context_half_life_days: float = 7.0
+    context_digest_max_chars: int = 2000
+    # The worker refreshes the context; a per-process response cache never
+    # hears about it, so there the cached context expires this quickly
+    context_cache_ttl_seconds: float = 10.0
+    
+    # Monthly usage quotas
+    quota_enforcement_enabled: bool = True
+    quota_cache_ttl_seconds: float = 60.0
+    quota_cache_max_entries: int = 10000
+    usage_reconcile_interval_seconds: float = 3600.0
+    
+    # Prometheus metrics at /metrics (off: no middleware, every observation is a no-op)
+    metrics_enabled: bool = True
+    worker_metrics_port: int = 0
+    
     # Security settings
     jwt_algorithm: str = "HS256"
+    auth_cache_max_entries: int = 10000
+    auth_cache_ttl_seconds: float = 60.0
     
     class Config:
         env_file = ".env"
@@ -3,37 +3,79 @@ from fastapi import Depends
 from fastapi.security import HTTPAuthorizationCredentials
 from clients.elevenlabs import ElevenLabsClient
 from clients.supabase import SupabaseClient
+from clients.registry import registry
+from clients.job_queue import JobQueue
+from clients.response_cache import ResponseCache
+from clients.event_bus import EventBus
+from clients.streaming_stt import StreamingSTT
 from services.conversation_service import ConversationService
 from services.database_service import DatabaseService
 from services.voice_memo_service import VoiceMemoService
+from services.upload_service import ResumableUploadService
+from services.search_service import SearchService
+from services.quota_service import QuotaService
 from middleware.auth import security, verify_token
 
 
 def get_elevenlabs_client() -> ElevenLabsClient:
-    return ElevenLabsClient()
+    return registry.elevenlabs
 
 
 def get_supabase_client() -> SupabaseClient:
-    return SupabaseClient()
+    return registry.supabase
+
+
+def get_job_queue() -> JobQueue:
+    return registry.job_queue
+
+
+def get_response_cache() -> ResponseCache:
+    return registry.response_cache
+
+
+def get_event_bus() -> EventBus:
+    return registry.event_bus
+
+
+def get_streaming_stt() -> StreamingSTT:
+    return registry.streaming_stt
 
 
 def get_conversation_service(
     elevenlabs_client: Annotated[ElevenLabsClient, Depends(get_elevenlabs_client)]
 ) -> ConversationService:
-    return ConversationService(elevenlabs_client)
+    return ConversationService(elevenlabs_client, registry.signed_url_pool)
 
 
 def get_database_service(
-    supabase_client: Annotated[SupabaseClient, Depends(get_supabase_client)]
+    supabase_client: Annotated[SupabaseClient, Depends(get_supabase_client)],
+    response_cache: Annotated[ResponseCache, Depends(get_response_cache)]
 ) -> DatabaseService:
-    return DatabaseService(supabase_client)
+    return DatabaseService(supabase_client, response_cache)
 
 
 def get_voice_memo_service(
     supabase_client: Annotated[SupabaseClient, Depends(get_supabase_client)],
-    database_service: Annotated[DatabaseService, Depends(get_database_service)]
+    database_service: Annotated[DatabaseService, Depends(get_database_service)],
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)]
 ) -> VoiceMemoService:
-    return VoiceMemoService(supabase_client, database_service)
+    return VoiceMemoService(supabase_client, database_service, job_queue, registry.vector_index)
+
+
+def get_search_service(
+    database_service: Annotated[DatabaseService, Depends(get_database_service)]
+) -> SearchService:
+    return SearchService(database_service, registry.vector_index)
+
+
+def get_quota_service(
+    database_service: Annotated[DatabaseService, Depends(get_database_service)]
+) -> QuotaService:
+    return QuotaService(database_service)
+
+
+def get_resumable_upload_service() -> ResumableUploadService:
+    return ResumableUploadService()
 
 
 async def get_current_user(
@@ -46,7 +88,14 @@ async def get_current_user(
 # Type aliases for cleaner code
 ElevenLabsDep = Annotated[ElevenLabsClient, Depends(get_elevenlabs_client)]
 SupabaseDep = Annotated[SupabaseClient, Depends(get_supabase_client)]
+JobQueueDep = Annotated[JobQueue, Depends(get_job_queue)]
+ResponseCacheDep = Annotated[ResponseCache, Depends(get_response_cache)]
+EventBusDep = Annotated[EventBus, Depends(get_event_bus)]
+StreamingSTTDep = Annotated[StreamingSTT, Depends(get_streaming_stt)]
 ConversationServiceDep = Annotated[ConversationService, Depends(get_conversation_service)]
 DatabaseServiceDep = Annotated[DatabaseService, Depends(get_database_service)]
 VoiceMemoServiceDep = Annotated[VoiceMemoService, Depends(get_voice_memo_service)]
+SearchServiceDep = Annotated[SearchService, Depends(get_search_service)]
+QuotaServiceDep = Annotated[QuotaService, Depends(get_quota_service)]
+ResumableUploadServiceDep = Annotated[ResumableUploadService, Depends(get_resumable_upload_service)]
 CurrentUser = Annotated[object, Depends(get_current_user)]
\ No newline at end of file
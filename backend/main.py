@@ -1,10 +1,25 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from api import api_router
 from fastapi.middleware.cors import CORSMiddleware
+from clients.registry import registry
+from middleware.metrics import MetricsMiddleware
+from api.v1 import collect_runtime_metrics
 from config import config
+import metrics
 import uvicorn
 
-app = FastAPI(title="Sonanta", version="0.1.0", docs_url="/docs", redoc_url="/redoc")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    registry.startup()
+    # fills in the background, the first starts may still fetch directly
+    registry.signed_url_pool.start()
+    yield
+    await registry.shutdown()
+
+
+app = FastAPI(title="Sonanta", version="0.1.0", docs_url="/docs", redoc_url="/redoc", lifespan=lifespan)
 
 app.include_router(api_router, prefix="")
 
@@ -16,6 +31,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if config.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        await collect_runtime_metrics()
+        return Response(metrics.render(), media_type=metrics.CONTENT_TYPE_LATEST)
+
 @app.get("/")
 async def root():
     return {"app": "Her Labs API", "environment": config.app_env, "debug": config.debug}
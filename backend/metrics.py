@@ -0,0 +1,155 @@
+from typing import Any, Dict, Optional
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from config import config
+
+# with metrics off every observe_* call returns before touching a metric
+ENABLED = config.metrics_enabled
+
+_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_STAGE_SECONDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "sonanta_http_request_duration_seconds",
+    "Time until the response headers were sent, per route template",
+    ["method", "route", "status"],
+    buckets=_SECONDS
+)
+OUTBOUND_REQUEST_SECONDS = Histogram(
+    "sonanta_outbound_request_duration_seconds",
+    "Latency of calls to external providers",
+    ["provider"],
+    buckets=_SECONDS
+)
+OUTBOUND_REQUESTS = Counter(
+    "sonanta_outbound_requests",
+    "Calls to external providers by HTTP status, or ok/error where there is none",
+    ["provider", "status"]
+)
+OUTBOUND_RETRIES = Counter(
+    "sonanta_outbound_retries",
+    "Provider calls retried, by what triggered the retry",
+    ["provider", "reason"]
+)
+OUTBOUND_REJECTED = Counter(
+    "sonanta_outbound_rejected",
+    "Provider calls failed fast by an open circuit",
+    ["provider"]
+)
+OUTBOUND_CONCURRENCY_LIMIT = Gauge(
+    "sonanta_outbound_concurrency_limit",
+    "Current adaptive cap on in-flight provider calls",
+    ["provider"]
+)
+OUTBOUND_CIRCUIT_OPEN = Gauge(
+    "sonanta_outbound_circuit_open",
+    "1 while the provider circuit is open or half open",
+    ["provider"]
+)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "sonanta_pipeline_stage_duration_seconds",
+    "Duration of each voice memo pipeline stage",
+    ["stage"],
+    buckets=_STAGE_SECONDS
+)
+JOB_SECONDS = Histogram(
+    "sonanta_job_duration_seconds",
+    "Job handler run time",
+    ["kind", "outcome"],
+    buckets=_STAGE_SECONDS
+)
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    if ENABLED:
+        HTTP_REQUEST_SECONDS.labels(method, route, str(status)).observe(seconds)
+
+
+def observe_outbound(provider: str, status: Any, seconds: Optional[float] = None) -> None:
+    if not ENABLED:
+        return
+    OUTBOUND_REQUESTS.labels(provider, str(status)).inc()
+    if seconds is not None:
+        OUTBOUND_REQUEST_SECONDS.labels(provider).observe(seconds)
+
+
+def observe_retry(provider: str, reason: str) -> None:
+    if ENABLED:
+        OUTBOUND_RETRIES.labels(provider, reason).inc()
+
+
+def observe_rejected(provider: str) -> None:
+    if ENABLED:
+        OUTBOUND_REJECTED.labels(provider).inc()
+
+
+def observe_flow(provider: str, concurrency_limit: float, circuit_open: bool) -> None:
+    if ENABLED:
+        OUTBOUND_CONCURRENCY_LIMIT.labels(provider).set(concurrency_limit)
+        OUTBOUND_CIRCUIT_OPEN.labels(provider).set(int(circuit_open))
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    if ENABLED:
+        PIPELINE_STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_job(kind: str, outcome: str, seconds: float) -> None:
+    if ENABLED:
+        JOB_SECONDS.labels(kind, outcome).observe(seconds)
+
+
+class RuntimeCollector:
+    """Exports queue depth and cache counters the app already keeps.
+
+    Nothing is recorded on the request path; the snapshot is taken when
+    ``/metrics`` is scraped.
+    """
+
+    def __init__(self) -> None:
+        self.caches: Dict[str, Dict[str, Any]] = {}
+        self.queue: Dict[str, Any] = {}
+        self.gauges: Dict[str, float] = {}
+    
+    def update(
+        self,
+        caches: Dict[str, Dict[str, Any]],
+        queue: Dict[str, Any],
+        gauges: Dict[str, float]
+    ) -> None:
+        self.caches = caches
+        self.queue = queue
+        self.gauges = gauges
+    
+    def collect(self):
+        hits = CounterMetricFamily("sonanta_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("sonanta_cache_misses", "Cache misses", labels=["cache"])
+        for name, stats in self.caches.items():
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+        yield hits
+        yield misses
+        
+        jobs = GaugeMetricFamily("sonanta_job_queue_jobs", "Jobs by status", labels=["status"])
+        for status, key in (("queued", "depth"), ("running", "running"), ("dead", "dead")):
+            if key in self.queue:
+                jobs.add_metric([status], self.queue[key])
+        yield jobs
+        if "oldest_queued_seconds" in self.queue:
+            yield GaugeMetricFamily(
+                "sonanta_job_queue_oldest_seconds",
+                "Age of the oldest queued job",
+                value=self.queue["oldest_queued_seconds"]
+            )
+        
+        for name, value in self.gauges.items():
+            yield GaugeMetricFamily(f"sonanta_{name}", name.replace("_", " ").capitalize(), value=value)
+
+
+runtime = RuntimeCollector()
+REGISTRY.register(runtime)
+
+
+def render() -> bytes:
+    return generate_latest(REGISTRY)
+
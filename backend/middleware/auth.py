@@ -1,17 +1,100 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
-from typing import Annotated
+from collections import OrderedDict
+from typing import Annotated, Any, Dict, Optional, Tuple
 from config import config
 from clients.supabase import SupabaseClient
+import hashlib
+import threading
+import time
 
 security = HTTPBearer()
 
 
+class TokenCache:
+    """Bounded LRU of verified users keyed by token hash.
+
+    Entries expire at the earlier of the JWT ``exp`` and ``max_ttl`` seconds
+    after verification.
+    """
+
+    def __init__(self, max_entries: int, max_ttl: float) -> None:
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+    
+    def get(self, token: str) -> Optional[Any]:
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, token: str, user: Any, exp: Optional[float] = None) -> None:
+        if self.max_entries <= 0:
+            return
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, exp)
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+    
+    def revoke_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in [k for k, (_, user) in self._entries.items() if str(user.id) == user_id]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+token_cache = TokenCache(
+    max_entries=config.auth_cache_max_entries,
+    max_ttl=config.auth_cache_ttl_seconds
+)
+
+
 async def verify_token(
     token: str,
     supabase_client: SupabaseClient
 ):
+    # a cached token was fully verified before and its entry never outlives exp
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     try:
         payload = jwt.decode(
             token,
@@ -29,6 +112,8 @@ async def verify_token(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        token_cache.set(token, user_response.user, exp=payload.get("exp"))
+        
         return user_response.user
         
     except JWTError:
@@ -0,0 +1,46 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import metrics
+import time
+
+
+class MetricsMiddleware:
+    """Records request latency per route template.
+
+    Latency is measured to the response start, so server-sent event streams
+    count their time to first byte rather than how long the client stayed.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        started = False
+        
+        def observe(status: int) -> None:
+            # raw paths would give every memo id its own series
+            route = scope.get("route")
+            metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status,
+                time.perf_counter() - start
+            )
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+                observe(message["status"])
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            if not started:
+                observe(500)
+            raise
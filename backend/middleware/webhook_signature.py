@@ -0,0 +1,49 @@
+from fastapi import HTTPException, status
+from typing import Optional
+from config import config
+import hashlib
+import hmac
+import time
+
+
+def verify_elevenlabs_signature(body: bytes, header: Optional[str]) -> None:
+    """Check an ``ElevenLabs-Signature: t=<timestamp>,v0=<hex hmac>`` header.
+
+    The HMAC-SHA256 is computed over ``"<timestamp>.<raw body>"``.
+    """
+    secret = config.elevenlabs_webhook_secret
+    if not secret:
+        if config.app_env == "development":
+            return
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Webhook secret not configured"
+        )
+    
+    parts = dict(
+        part.split("=", 1) for part in (header or "").split(",") if "=" in part
+    )
+    timestamp = parts.get("t")
+    signature = parts.get("v0")
+    if not timestamp or not signature or not timestamp.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing webhook signature"
+        )
+    
+    if abs(time.time() - int(timestamp)) > config.elevenlabs_webhook_tolerance_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Webhook timestamp outside tolerance"
+        )
+    
+    expected = hmac.new(
+        secret.encode(),
+        f"{timestamp}.".encode() + body,
+        hashlib.sha256
+    ).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid webhook signature"
+        )
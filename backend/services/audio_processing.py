@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+from typing import Optional, List, Tuple
+from config import config
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+_SILENCE_START = re.compile(r"silence_start: (-?\d+(?:\.\d+)?)")
+_SILENCE_END = re.compile(r"silence_end: (\d+(?:\.\d+)?)")
+
+
+@dataclass
+class NormalizedAudio:
+    path: str
+    ext: str
+    duration_seconds: Optional[float]
+    trimmed_duration_seconds: Optional[float]
+    original_bytes: int
+    normalized_bytes: int
+    
+    @property
+    def metadata(self) -> dict:
+        return {
+            "original_bytes": self.original_bytes,
+            "normalized_bytes": self.normalized_bytes,
+            "saved_bytes": self.original_bytes - self.normalized_bytes,
+            "trimmed_seconds": round(self.duration_seconds - self.trimmed_duration_seconds, 2)
+                if self.duration_seconds is not None and self.trimmed_duration_seconds is not None else None
+        }
+    
+    def discard(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(config.ffmpeg_path) is not None
+
+
+def _parse_duration(output: str) -> Optional[float]:
+    match = _DURATION.search(output)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+async def _ffmpeg(args: List[str]) -> tuple:
+    process = await asyncio.create_subprocess_exec(
+        config.ffmpeg_path, "-hide_banner", "-nostdin", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    _, stderr = await process.communicate()
+    return process.returncode, stderr.decode(errors="replace")
+
+
+async def probe_duration(path: str) -> Optional[float]:
+    # ffmpeg without an output exits non-zero but still prints the input header
+    _, output = await _ffmpeg(["-i", path])
+    return _parse_duration(output)
+
+
+def _silence_filter() -> str:
+    # trim leading silence, then reverse and trim again for the trailing part
+    trim = (
+        f"silenceremove=start_periods=1:start_duration={config.audio_silence_min_seconds}"
+        f":start_threshold={config.audio_silence_threshold}"
+    )
+    return f"{trim},areverse,{trim},areverse"
+
+
+async def normalize_audio(input_path: str) -> NormalizedAudio:
+    """Downmix to mono, resample, trim leading/trailing silence and encode as Opus."""
+    fd, output_path = tempfile.mkstemp(suffix=".ogg")
+    os.close(fd)
+    
+    returncode, output = await _ffmpeg([
+        "-y",
+        "-i", input_path,
+        "-vn",
+        "-ac", "1",
+        "-ar", str(config.audio_sample_rate),
+        "-af", _silence_filter(),
+        "-c:a", "libopus",
+        "-b:a", config.audio_bitrate,
+        "-application", "voip",
+        output_path
+    ])
+    
+    if returncode != 0 or os.path.getsize(output_path) == 0:
+        os.remove(output_path)
+        last_line = (output.strip().splitlines() or [""])[-1]
+        raise RuntimeError(f"ffmpeg failed ({returncode}): {last_line}")
+    
+    return NormalizedAudio(
+        path=output_path,
+        ext="ogg",
+        duration_seconds=_parse_duration(output),
+        trimmed_duration_seconds=await probe_duration(output_path),
+        original_bytes=os.path.getsize(input_path),
+        normalized_bytes=os.path.getsize(output_path)
+    )
+
+
+async def detect_silences(path: str) -> List[Tuple[float, float]]:
+    _, output = await _ffmpeg([
+        "-i", path,
+        "-af", f"silencedetect=noise={config.audio_split_silence_threshold}:d={config.audio_split_silence_min_seconds}",
+        "-f", "null", "-"
+    ])
+    starts = [max(float(value), 0.0) for value in _SILENCE_START.findall(output)]
+    ends = [float(value) for value in _SILENCE_END.findall(output)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    target_seconds: float,
+    max_seconds: float
+) -> List[Tuple[float, float]]:
+    """Split [0, duration] into chunks of about target_seconds, cutting in the
+    middle of a silence where possible and hard-cutting at max_seconds otherwise."""
+    cut_points = [(start + end) / 2 for start, end in silences]
+    chunks = []
+    start = 0.0
+    
+    while duration - start > max_seconds:
+        candidates = [p for p in cut_points if start + target_seconds / 2 <= p <= start + max_seconds]
+        end = min(candidates, key=lambda p: abs(p - (start + target_seconds))) if candidates else start + max_seconds
+        chunks.append((start, end))
+        start = end
+    
+    chunks.append((start, duration))
+    return chunks
+
+
+async def extract_chunk(path: str, start: float, end: float) -> str:
+    fd, output_path = tempfile.mkstemp(suffix=".ogg")
+    os.close(fd)
+    
+    returncode, output = await _ffmpeg([
+        "-y",
+        "-ss", f"{start:.3f}",
+        "-to", f"{end:.3f}",
+        "-i", path,
+        "-c:a", "libopus",
+        "-b:a", config.audio_bitrate,
+        output_path
+    ])
+    
+    if returncode != 0:
+        os.remove(output_path)
+        last_line = (output.strip().splitlines() or [""])[-1]
+        raise RuntimeError(f"ffmpeg chunk extraction failed ({returncode}): {last_line}")
+    
+    return output_path
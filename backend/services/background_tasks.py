@@ -1,14 +1,59 @@
+import asyncio
+import hashlib
 import json
-import httpx
-from typing import List, Dict, Any
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Tuple, Union, BinaryIO
 from services.database_service import DatabaseService
 from clients.supabase import SupabaseClient
+from clients.registry import registry
+from clients.http import ProviderError, is_retryable
 from config import config
+import metrics
+from services.status_events import publish_status
+from services.search_service import index_voice_memo
+from services.memo_context import refresh_memo_context
+from services.audio_processing import (
+    NormalizedAudio,
+    detect_silences,
+    extract_chunk,
+    ffmpeg_available,
+    normalize_audio,
+    plan_chunks
+)
 
+logger = logging.getLogger(__name__)
 
-async def transcribe_voice_memo(memo_id: str, database_service: DatabaseService, supabase_client: SupabaseClient):
+
+@contextmanager
+def _timed(timings: Dict[str, float], stage: str):
+    start = time.perf_counter()
     try:
-        memo = await database_service.get_voice_memo(memo_id, memo_id)
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        timings[stage] = round(elapsed, 3)
+        metrics.observe_stage(stage, elapsed)
+
+
+async def _load_audio(
+    memo_id: str,
+    user_id: str,
+    database_service: DatabaseService,
+    supabase_client: SupabaseClient,
+    storage_path: Optional[str] = None,
+    local_path: Optional[str] = None
+) -> Tuple[Union[bytes, BinaryIO], str, str]:
+    if local_path and os.path.exists(local_path):
+        ext = os.path.splitext(local_path)[1].lstrip('.') or (storage_path or '').split('.')[-1]
+        return open(local_path, 'rb'), ext, 'handoff'
+    
+    if not storage_path:
+        memo = await database_service.get_voice_memo(memo_id, user_id)
         if not memo:
             raise ValueError(f"Memo {memo_id} not found")
         
@@ -18,89 +63,288 @@ async def transcribe_voice_memo(memo_id: str, database_service: DatabaseService,
         
         # Extract file path from URL
         # Format: https://<project>.supabase.co/storage/v1/object/public/voice-memos/<path>
-        file_path = audio_url.split("/voice-memos/")[-1]
-        
-        # Download audio from storage
-        storage = supabase_client.client.storage
-        file_data = storage.from_("voice-memos").download(file_path)
-        
-        # Detect file extension
-        file_ext = file_path.split('.')[-1] or 'webm'
-        mime_types = {
-            'webm': 'audio/webm',
-            'mp4': 'audio/mp4',
-            'm4a': 'audio/mp4',
-            'ogg': 'audio/ogg',
-            'mp3': 'audio/mp3',
-            'wav': 'audio/wav'
-        }
-        mime_type = mime_types.get(file_ext, 'audio/webm')
-        
-        # Create multipart form data
-        files = {
-            'file': (f'audio.{file_ext}', file_data, mime_type),
-            'model_id': (None, 'scribe_v1')
-        }
+        storage_path = audio_url.split("/voice-memos/")[-1]
+    
+    # Download audio from storage
+    storage = supabase_client.client.storage
+    file_data = await supabase_client.run(storage.from_("voice-memos").download, storage_path)
+    return file_data, storage_path.split('.')[-1], 'storage'
+
+
+async def _speech_to_text(file_data: Union[bytes, BinaryIO], file_ext: str) -> Dict[str, Any]:
+    # Detect file extension
+    file_ext = file_ext or 'webm'
+    mime_types = {
+        'webm': 'audio/webm',
+        'mp4': 'audio/mp4',
+        'm4a': 'audio/mp4',
+        'ogg': 'audio/ogg',
+        'mp3': 'audio/mp3',
+        'wav': 'audio/wav'
+    }
+    mime_type = mime_types.get(file_ext, 'audio/webm')
+    
+    # Create multipart form data
+    files = {
+        'file': (f'audio.{file_ext}', file_data, mime_type),
+        'model_id': (None, 'scribe_v1')
+    }
+    
+    # Call ElevenLabs API
+    client = registry.http['elevenlabs']
+    response = await client.post(
+        '/v1/speech-to-text',
+        files=files
+    )
+    
+    if response.status_code != 200:
+        raise ProviderError.from_response("ElevenLabs", response)
+    
+    return response.json()
+
+
+def _spoken_duration(data: Dict[str, Any]) -> Optional[float]:
+    # without ffmpeg the provider's word timings are the only measure of length
+    ends = [word['end'] for word in data.get('words') or [] if word.get('end') is not None]
+    return round(max(ends), 2) if ends else None
+
+
+async def _transcribe_chunk(path: str, index: int, start: float, end: float) -> Dict[str, Any]:
+    chunk_path = await extract_chunk(path, start, end)
+    try:
+        # transient provider errors are already retried by the HTTP client
+        with open(chunk_path, 'rb') as audio:
+            data = await _speech_to_text(audio, 'ogg')
+    finally:
+        _discard(chunk_path)
+    
+    return {
+        'index': index,
+        'start': round(start, 2),
+        'end': round(end, 2),
+        'text': data.get('text', '').strip(),
+        'language': data.get('language_code'),
+        'confidence': data.get('language_probability')
+    }
+
+
+async def _transcribe_chunked(path: str, duration: float) -> Dict[str, Any]:
+    silences = await detect_silences(path)
+    chunks = plan_chunks(duration, silences, config.chunk_target_seconds, config.chunk_max_seconds)
+    semaphore = asyncio.Semaphore(config.chunk_concurrency)
+    
+    async def bounded(index: int, start: float, end: float) -> Dict[str, Any]:
+        async with semaphore:
+            return await _transcribe_chunk(path, index, start, end)
+    
+    # a failed chunk cancels the others before the caller deletes the audio
+    # they are cut from
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [
+                group.create_task(bounded(index, start, end))
+                for index, (start, end) in enumerate(chunks)
+            ]
+    except ExceptionGroup as e:
+        raise e.exceptions[0]
+    segments = [task.result() for task in tasks]
+    
+    languages = Counter(segment['language'] for segment in segments if segment['language'])
+    return {
+        'text': ' '.join(segment['text'] for segment in segments if segment['text']),
+        'language_code': languages.most_common(1)[0][0] if languages else None,
+        'language_probability': min(
+            (segment['confidence'] for segment in segments if segment['confidence'] is not None),
+            default=None
+        ),
+        'segments': segments
+    }
+
+
+async def _normalize(
+    file_data: Union[bytes, BinaryIO],
+    file_ext: str
+) -> Optional[NormalizedAudio]:
+    if not config.audio_normalization_enabled or not ffmpeg_available():
+        return None
+    
+    source_path = getattr(file_data, 'name', None)
+    scratch_path = None
+    if source_path is None:
+        # storage downloads arrive as bytes, ffmpeg needs a file
+        fd, scratch_path = tempfile.mkstemp(suffix=f'.{file_ext or "webm"}')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(file_data)
+        source_path = scratch_path
+    
+    try:
+        return await normalize_audio(source_path)
+    except Exception:
+        # the provider accepts the original container, normalization is best effort
+        logger.exception("Audio normalization failed, sending original audio")
+        return None
+    finally:
+        _discard(scratch_path)
+
+
+async def _enrich(
+    memo_id: str,
+    user_id: str,
+    transcript: str,
+    database_service: DatabaseService,
+    timings: Dict[str, float]
+) -> None:
+    with _timed(timings, 'index'):
+        await index_voice_memo(memo_id, user_id, transcript, database_service)
+    
+    # Trigger tag generation
+    with _timed(timings, 'tagging'):
+        await generate_tags_for_memo(memo_id, user_id, database_service, transcript=transcript)
+    
+    # the memo is now tagged and embedded, it may belong in the conversation context
+    with _timed(timings, 'context'):
+        await refresh_memo_context(user_id, database_service)
+
+
+async def transcribe_voice_memo(
+    memo_id: str,
+    user_id: str,
+    database_service: DatabaseService,
+    supabase_client: SupabaseClient,
+    storage_path: Optional[str] = None,
+    local_path: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    final_attempt: bool = True
+):
+    timings: Dict[str, float] = {}
+    file_data = None
+    normalized = None
+    
+    try:
+        # identical audio was already transcribed, for this or another memo
+        cached = None
+        if content_hash:
+            with _timed(timings, 'cache_lookup'):
+                cached = await database_service.lookup_content_cache('transcript', content_hash)
         
-        # Call ElevenLabs API
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                'https://api.elevenlabs.io/v1/speech-to-text',
-                headers={'xi-api-key': config.elevenlabs_api_key},
-                files=files
-            )
+        if cached:
+            transcript = cached['transcript']
+            transcript_metadata = {**cached['transcript_metadata'], 'cache': 'hit'}
+        else:
+            with _timed(timings, 'load_audio'):
+                file_data, file_ext, audio_source = await _load_audio(
+                    memo_id, user_id, database_service, supabase_client, storage_path, local_path
+                )
             
-            if response.status_code != 200:
-                raise Exception(f"ElevenLabs API failed: {response.status_code}")
+            with _timed(timings, 'transcode'):
+                normalized = await _normalize(file_data, file_ext)
+            
+            with _timed(timings, 'stt'):
+                # segment timestamps are relative to the silence-trimmed audio
+                if normalized and (normalized.trimmed_duration_seconds or 0) >= config.chunked_transcription_threshold_seconds:
+                    data = await _transcribe_chunked(normalized.path, normalized.trimmed_duration_seconds)
+                elif normalized:
+                    with open(normalized.path, 'rb') as audio:
+                        data = await _speech_to_text(audio, normalized.ext)
+                else:
+                    data = await _speech_to_text(file_data, file_ext)
             
-            data = response.json()
             transcript = data.get('text', '')
+            transcript_metadata = {
+                'language': data.get('language_code'),
+                'confidence': data.get('language_probability'),
+                # metered into usage_counters, so every path needs a length
+                'duration_seconds': (normalized.duration_seconds if normalized else None) or _spoken_duration(data)
+            }
+            if data.get('segments'):
+                transcript_metadata['segments'] = data['segments']
+            
+            if content_hash:
+                await database_service.store_content_cache('transcript', content_hash, {
+                    'transcript': transcript,
+                    'transcript_metadata': transcript_metadata
+                })
             
+            transcript_metadata = {**transcript_metadata, 'audio_source': audio_source}
+            if normalized:
+                transcript_metadata['preprocessing'] = normalized.metadata
+        
+        # stored timings end at stt, the stages below are only exported as metrics
+        stored_timings = dict(timings)
+        with _timed(timings, 'db_write'):
             await database_service.update_voice_memo_transcript(
                 memo_id=memo_id,
                 transcript=transcript,
                 status='completed',
-                transcript_metadata={
-                    'language': data.get('language_code'),
-                    'confidence': data.get('language_probability')
-                }
+                transcript_metadata={**transcript_metadata, 'timings': stored_timings},
+                duration_seconds=transcript_metadata.get('duration_seconds')
             )
-            
-            # Trigger tag generation
-            await generate_tags_for_memo(memo_id, database_service)
-            
+        await publish_status(user_id, {'type': 'transcript', 'memo_id': memo_id, 'status': 'completed'})
+        
     except Exception as e:
-        await database_service.update_voice_memo_transcript(
-            memo_id=memo_id,
-            transcript="",
-            status='failed',
-            transcript_metadata={'error': str(e)}
-        )
+        # earlier attempts are retried by the job queue, only the last one
+        # (or one the queue won't retry) marks the memo as failed
+        if final_attempt or not is_retryable(e):
+            await database_service.update_voice_memo_transcript(
+                memo_id=memo_id,
+                transcript="",
+                status='failed',
+                transcript_metadata={'error': str(e), 'timings': timings}
+            )
+            await publish_status(user_id, {'type': 'transcript', 'memo_id': memo_id, 'status': 'failed'})
+        raise
+    finally:
+        if hasattr(file_data, 'close'):
+            file_data.close()
+        if normalized:
+            normalized.discard()
+    
+    # a separate job, so a failure there can't send the stored transcript
+    # back through speech-to-text or mark the memo failed
+    try:
+        await registry.job_queue.enqueue('enrich_voice_memo', {'memo_id': memo_id, 'user_id': user_id})
+    except Exception:
+        logger.exception("Failed to enqueue enrichment for voice memo %s", memo_id)
 
 
-async def generate_tags_for_memo(memo_id: str, database_service: DatabaseService):
+async def generate_tags_for_memo(
+    memo_id: str,
+    user_id: str,
+    database_service: DatabaseService,
+    transcript: Optional[str] = None
+):
     try:
-        # Get memo with transcript
-        memo = await database_service.get_voice_memo(memo_id, memo_id)
-        if not memo or not memo.get('transcript'):
+        if transcript is None:
+            # Get memo with transcript
+            memo = await database_service.get_voice_memo(memo_id, user_id)
+            if not memo or not memo.get('transcript'):
+                return
+            
+            transcript = memo['transcript']
+        
+        if not transcript:
             return
         
-        transcript = memo['transcript']
+        transcript_hash = hashlib.sha256(transcript.encode()).hexdigest()
+        cached = await database_service.lookup_content_cache('tags', transcript_hash)
+        if cached:
+            await database_service.update_voice_memo_tags(
+                memo_id=memo_id,
+                tags=cached['tags']
+            )
+            await publish_status(user_id, {'type': 'tags', 'memo_id': memo_id, 'tags': cached['tags']})
+            return
         
         # OpenAI request
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                'https://api.openai.com/v1/chat/completions',
-                headers={
-                    'Authorization': f'Bearer {config.openai_api_key}',
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': 'gpt-4o-mini',
-                    'messages': [
-                        {
-                            'role': 'system',
-                            'content': '''Extract 1-4 relevant tags from the voice memo transcript.
+        client = registry.http['openai']
+        response = await client.post(
+            '/v1/chat/completions',
+            json={
+                'model': 'gpt-4o-mini',
+                'messages': [
+                    {
+                        'role': 'system',
+                        'content': '''Extract 1-4 relevant tags from the voice memo transcript.
           
 Tag categories to consider:
 - Emotions: happy, sad, anxious, grateful, excited, frustrated, peaceful
@@ -115,48 +359,98 @@ Rules:
 - Always return at least 1 tag
 
 Return ONLY a JSON array, no other text. Example: ["work", "planning", "anxious"]'''
-                        },
-                        {
-                            'role': 'user',
-                            'content': transcript
-                        }
-                    ],
-                    'temperature': 0.3,
-                    'max_tokens': 50
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"OpenAI API failed: {response.status_code}")
-            
-            content = response.json()['choices'][0]['message']['content']
-            
-            try:
-                tags = json.loads(content or '[]')
-                tags = [
-                    tag.lower().strip() 
-                    for tag in tags 
-                    if isinstance(tag, str) and tag.strip()
-                ][:4]
-            except:
-                # Fallback: extract words from response
-                import re
-                words = re.findall(r'\w+', content or '')
-                tags = [w.lower() for w in words[:4]]
-            
-            if not tags:
-                tags = ['general']
-            
-            await database_service.update_voice_memo_tags(
-                memo_id=memo_id,
-                tags=tags
-            )
-            
-    except Exception as e:
+                    },
+                    {
+                        'role': 'user',
+                        'content': transcript
+                    }
+                ],
+                'temperature': 0.3,
+                'max_tokens': 50
+            }
+        )
+        
+        if response.status_code != 200:
+            raise ProviderError.from_response("OpenAI", response)
+        
+        content = response.json()['choices'][0]['message']['content']
+        
+        try:
+            tags = json.loads(content or '[]')
+            tags = [
+                tag.lower().strip() 
+                for tag in tags 
+                if isinstance(tag, str) and tag.strip()
+            ][:4]
+        except:
+            # Fallback: extract words from response
+            import re
+            words = re.findall(r'\w+', content or '')
+            tags = [w.lower() for w in words[:4]]
+        
+        if not tags:
+            tags = ['general']
+        
+        await database_service.store_content_cache('tags', transcript_hash, {'tags': tags})
+        
+        await database_service.update_voice_memo_tags(
+            memo_id=memo_id,
+            tags=tags
+        )
+        await publish_status(user_id, {'type': 'tags', 'memo_id': memo_id, 'tags': tags})
+        
+    except ProviderError as e:
+        if e.retryable:
+            # throttled or down, the enrichment job tries again later
+            raise
+        logger.exception("Tag generation failed for voice memo %s", memo_id)
+    except Exception:
+        # tags are optional, the transcript is already stored
+        logger.exception("Tag generation failed for voice memo %s", memo_id)
+
 
+def _discard(path: Optional[str]) -> None:
+    if path and os.path.exists(path):
+        os.remove(path)
 
-async def process_voice_memo(memo_id: str):
-    supabase_client = SupabaseClient()
+
+async def process_voice_memo(
+    memo_id: str,
+    user_id: str,
+    storage_path: Optional[str] = None,
+    local_path: Optional[str] = None,
+    content_hash: Optional[str] = None,
+    final_attempt: bool = True
+):
+    supabase_client = registry.supabase
     database_service = DatabaseService(supabase_client)
     
-    await transcribe_voice_memo(memo_id, database_service, supabase_client)
\ No newline at end of file
+    try:
+        await transcribe_voice_memo(
+            memo_id,
+            user_id,
+            database_service,
+            supabase_client,
+            storage_path=storage_path,
+            local_path=local_path,
+            content_hash=content_hash,
+            final_attempt=final_attempt
+        )
+    except Exception:
+        if final_attempt:
+            _discard(local_path)
+        raise
+    
+    # the handed-off copy is only needed until the transcript is stored
+    _discard(local_path)
+
+
+async def enrich_voice_memo(memo_id: str, user_id: str):
+    """Index, tag and contextualize a memo whose transcript is already stored."""
+    database_service = DatabaseService(registry.supabase)
+    
+    memo = await database_service.get_voice_memo(memo_id, user_id)
+    if not memo or not memo.get('transcript'):
+        return
+    
+    await _enrich(memo_id, user_id, memo['transcript'], database_service, {})
\ No newline at end of file
@@ -1,12 +1,16 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 from clients.elevenlabs import ElevenLabsClient
+from clients.signed_url_pool import SignedURLPool
 
 
 class ConversationService:
-    def __init__(self, elevenlabs_client: ElevenLabsClient):
+    def __init__(self, elevenlabs_client: ElevenLabsClient, signed_url_pool: Optional[SignedURLPool] = None):
         self.elevenlabs_client = elevenlabs_client
+        self.signed_url_pool = signed_url_pool
 
     async def get_signed_url(self) -> str:
+        if self.signed_url_pool is not None:
+            return await self.signed_url_pool.get()
         return await self.elevenlabs_client.get_signed_url()
     
     async def get_conversation_details(self, conversation_id: str) -> Dict[str, Any]:
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+from clients.registry import registry
+from services.database_service import DatabaseService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-turn fields worth keeping; tool calls, LLM usage and feedback are dropped
+MESSAGE_FIELDS = ("role", "message", "time_in_call_secs")
+
+
+def compact_webhook(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a post_call_transcription payload the conversation row stores."""
+    analysis = data.get("analysis") or {}
+    metadata = data.get("metadata") or {}
+    client_data = data.get("conversation_initiation_client_data") or {}
+    
+    transcript: List[Dict[str, Any]] = [
+        {field: turn.get(field) for field in MESSAGE_FIELDS}
+        for turn in data.get("transcript") or []
+        if turn.get("message")
+    ]
+    
+    return {
+        "elevenlabs_conversation_id": data.get("conversation_id"),
+        "transcript": transcript,
+        "summary": analysis.get("transcript_summary"),
+        "title": analysis.get("call_summary_title"),
+        "duration_seconds": metadata.get("call_duration_secs"),
+        # set by the client from POST /conversations/start
+        "dynamic_variables": client_data.get("dynamic_variables") or {}
+    }
+
+
+async def ingest_conversation(
+    webhook: Dict[str, Any],
+    database_service: Optional[DatabaseService] = None
+) -> Optional[str]:
+    database_service = database_service or DatabaseService(registry.supabase)
+    elevenlabs_id = webhook["elevenlabs_conversation_id"]
+    
+    # webhooks are delivered at least once
+    existing = await database_service.get_conversation_by_elevenlabs_id(elevenlabs_id)
+    if existing and existing.get("ended_at"):
+        return existing["id"]
+    
+    # the dynamic variables come from the client, so they only point at a
+    # conversation; who owns it is whoever POST /conversations/start created
+    # it for. A client-supplied user_id is never trusted.
+    conversation = existing
+    requested_id = webhook["dynamic_variables"].get("conversation_id")
+    if conversation is None and requested_id:
+        conversation = await database_service.get_conversation_by_id(requested_id)
+        if conversation and conversation.get("elevenlabs_conversation_id") not in (None, elevenlabs_id):
+            # already bound to another ElevenLabs session
+            conversation = None
+    
+    if conversation is None:
+        logger.warning("Conversation %s matches no started conversation, dropped", elevenlabs_id)
+        return None
+    conversation_id = conversation["id"]
+    
+    # the transcript and its usage log are written together, and only by the
+    # delivery that actually ends the conversation
+    duration = webhook.get("duration_seconds")
+    await database_service.end_conversation(
+        conversation_id=conversation_id,
+        transcript=webhook["transcript"],
+        summary=webhook.get("summary"),
+        duration_seconds=int(duration) if duration is not None else None,
+        title=webhook.get("title"),
+        elevenlabs_conversation_id=elevenlabs_id
+    )
+    return conversation_id
@@ -1,29 +1,68 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set
 from uuid import UUID
 from datetime import datetime
 from clients.supabase import SupabaseClient
+from clients.registry import registry
+from clients.response_cache import ResponseCache
+from services.pagination import Cursor
 
 
 class DatabaseService:
-    def __init__(self, supabase_client: SupabaseClient):
+    def __init__(
+        self,
+        supabase_client: SupabaseClient,
+        response_cache: Optional[ResponseCache] = None
+    ):
+        self.supabase_client = supabase_client
         self.client = supabase_client.get_client()
+        self.response_cache = response_cache or registry.response_cache
+    
+    async def _execute(self, query):
+        return await self.supabase_client.run(query.execute)
+    
+    async def _invalidate(self, user_id: Optional[str]) -> None:
+        # cached voice memo reads expire on their own if this fails
+        if not user_id:
+            return
+        try:
+            await self.response_cache.invalidate_user(str(user_id))
+        except Exception:
+            pass
+    
+    def _page(self, query, limit: int, offset: int, after: Optional[Cursor]):
+        query = query \
+            .order("created_at", desc=True) \
+            .order("id", desc=True) \
+            .limit(limit)
+        
+        if after is None:
+            return query.offset(offset)
+        
+        # keyset: rows strictly after (created_at, id) in descending order
+        created_at, row_id = after
+        return query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
     
     async def create_conversation(
         self, 
         user_id: str,
         elevenlabs_conversation_id: Optional[str] = None,
         title: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        context_memo_ids: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         data = {
             "user_id": user_id,
             "title": title,
             "elevenlabs_conversation_id": elevenlabs_conversation_id,
-            "metadata": metadata or {}
+            "metadata": metadata or {},
+            "context_memo_ids": context_memo_ids or []
         }
         
         try:
-            response = self.client.table("conversations").insert(data).execute()
+            response = await self._execute(self.client.table("conversations").insert(data))
             return response.data[0] if response.data else None
         except Exception as e:
             raise
@@ -34,12 +73,27 @@ class DatabaseService:
         user_id: str
     ) -> Optional[Dict[str, Any]]:
         try:
-            response = self.client.table("conversations") \
+            query = self.client.table("conversations") \
                 .select("*") \
                 .eq("id", conversation_id) \
                 .eq("user_id", user_id) \
-                .single() \
-                .execute()
+                .single()
+            
+            response = await self._execute(query)
+            
+            return response.data
+        except Exception as e:
+            return None
+    
+    async def get_conversation_by_id(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        """Unscoped lookup, for callers that establish ownership from the row."""
+        try:
+            query = self.client.table("conversations") \
+                .select("*") \
+                .eq("id", conversation_id) \
+                .single()
+            
+            response = await self._execute(query)
             
             return response.data
         except Exception as e:
@@ -50,11 +104,12 @@ class DatabaseService:
         elevenlabs_conversation_id: str
     ) -> Optional[Dict[str, Any]]:
         try:
-            response = self.client.table("conversations") \
+            query = self.client.table("conversations") \
                 .select("*") \
                 .eq("elevenlabs_conversation_id", elevenlabs_conversation_id) \
-                .single() \
-                .execute()
+                .single()
+            
+            response = await self._execute(query)
             
             return response.data
         except Exception as e:
@@ -69,7 +124,8 @@ class DatabaseService:
         audio_url: Optional[str] = None,
         title: Optional[str] = None,
         context_memo_ids: Optional[List[str]] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        elevenlabs_conversation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         data = {
             "transcript": transcript,
@@ -89,31 +145,59 @@ class DatabaseService:
             data["context_memo_ids"] = context_memo_ids
         if metadata:
             data["metadata"] = metadata
+        if elevenlabs_conversation_id:
+            data["elevenlabs_conversation_id"] = elevenlabs_conversation_id
         
         try:
-            response = self.client.table("conversations") \
+            query = self.client.table("conversations") \
                 .update(data) \
-                .eq("id", conversation_id) \
-                .execute()
+                .eq("id", conversation_id)
+            
+            response = await self._execute(query)
             
             return response.data[0] if response.data else None
         except Exception as e:
             raise
     
+    async def end_conversation(
+        self,
+        conversation_id: str,
+        transcript: List[Dict[str, Any]],
+        summary: Optional[str] = None,
+        duration_seconds: Optional[int] = None,
+        title: Optional[str] = None,
+        elevenlabs_conversation_id: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Store the final transcript and log its usage, see create_end_conversation.sql.
+
+        Returns None if the conversation had already ended.
+        """
+        response = await self._execute(self.client.rpc("end_conversation", {
+            "p_conversation_id": conversation_id,
+            "p_transcript": transcript,
+            "p_summary": summary or None,
+            "p_duration_seconds": duration_seconds,
+            "p_title": title or None,
+            "p_elevenlabs_conversation_id": elevenlabs_conversation_id
+        }))
+        return response.data[0] if response.data else None
+    
     async def get_user_conversations(
         self, 
         user_id: str, 
         limit: int = 10, 
-        offset: int = 0
+        offset: int = 0,
+        after: Optional[Cursor] = None,
+        columns: str = "*"
     ) -> List[Dict[str, Any]]:
         try:
-            response = self.client.table("conversations") \
-                .select("*") \
-                .eq("user_id", user_id) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .offset(offset) \
-                .execute()
+            query = self.client.table("conversations") \
+                .select(columns) \
+                .eq("user_id", user_id)
+            
+            query = self._page(query, limit, offset, after)
+            
+            response = await self._execute(query)
             
             return response.data
         except Exception as e:
@@ -126,8 +210,10 @@ class DatabaseService:
         duration_seconds: Optional[float] = None,
         file_size_bytes: Optional[int] = None,
         title: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
+        metadata: Optional[Dict[str, Any]] = None,
+        content_hash: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """None if the user already has a memo with this ``content_hash``."""
         data = {
             "user_id": user_id,
             "audio_url": audio_url,
@@ -135,11 +221,20 @@ class DatabaseService:
             "file_size_bytes": file_size_bytes,
             "title": title,
             "transcript_status": "pending",
-            "metadata": metadata or {}
+            "metadata": metadata or {},
+            "content_hash": content_hash
         }
         
+        query = self.client.table("voice_memos")
+        if content_hash:
+            # unique per user, a concurrent upload of the same audio inserts nothing
+            query = query.upsert(data, on_conflict="user_id,content_hash", ignore_duplicates=True)
+        else:
+            query = query.insert(data)
+        
         try:
-            response = self.client.table("voice_memos").insert(data).execute()
+            response = await self._execute(query)
+            await self._invalidate(user_id)
             return response.data[0] if response.data else None
         except Exception as e:
             raise
@@ -149,7 +244,8 @@ class DatabaseService:
         memo_id: str,
         transcript: str,
         status: str = "completed",
-        transcript_metadata: Optional[Dict[str, Any]] = None
+        transcript_metadata: Optional[Dict[str, Any]] = None,
+        duration_seconds: Optional[float] = None
     ) -> Dict[str, Any]:
         data = {
             "transcript": transcript,
@@ -158,13 +254,19 @@ class DatabaseService:
             "updated_at": datetime.utcnow().isoformat()
         }
         
+        if duration_seconds is not None:
+            data["duration_seconds"] = duration_seconds
+        
         try:
-            response = self.client.table("voice_memos") \
+            query = self.client.table("voice_memos") \
                 .update(data) \
-                .eq("id", memo_id) \
-                .execute()
+                .eq("id", memo_id)
             
-            return response.data[0] if response.data else None
+            response = await self._execute(query)
+            
+            memo = response.data[0] if response.data else None
+            await self._invalidate(memo and memo.get("user_id"))
+            return memo
         except Exception as e:
             raise
     
@@ -183,12 +285,15 @@ class DatabaseService:
             data["summary"] = summary
         
         try:
-            response = self.client.table("voice_memos") \
+            query = self.client.table("voice_memos") \
                 .update(data) \
-                .eq("id", memo_id) \
-                .execute()
+                .eq("id", memo_id)
             
-            return response.data[0] if response.data else None
+            response = await self._execute(query)
+            
+            memo = response.data[0] if response.data else None
+            await self._invalidate(memo and memo.get("user_id"))
+            return memo
         except Exception as e:
             raise
     
@@ -198,41 +303,175 @@ class DatabaseService:
         user_id: str
     ) -> Optional[Dict[str, Any]]:
         try:
-            response = self.client.table("voice_memos") \
+            query = self.client.table("voice_memos") \
                 .select("*") \
                 .eq("id", memo_id) \
                 .eq("user_id", user_id) \
-                .single() \
-                .execute()
+                .single()
+            
+            response = await self._execute(query)
             
             return response.data
         except Exception as e:
             return None
     
+    async def delete_voice_memo(self, memo_id: str, user_id: str) -> None:
+        query = self.client.table("voice_memos") \
+            .delete() \
+            .eq("id", memo_id) \
+            .eq("user_id", user_id)
+        
+        await self._execute(query)
+        await self._invalidate(user_id)
+    
+    async def delete_voice_memos(self, user_id: str, memo_ids: List[str]) -> List[str]:
+        query = self.client.table("voice_memos") \
+            .delete() \
+            .eq("user_id", user_id) \
+            .in_("id", memo_ids)
+        
+        response = await self._execute(query)
+        await self._invalidate(user_id)
+        return [row["id"] for row in response.data or []]
+    
+    async def get_voice_memo_by_content_hash(
+        self,
+        user_id: str,
+        content_hash: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            query = self.client.table("voice_memos") \
+                .select("*") \
+                .eq("user_id", user_id) \
+                .eq("content_hash", content_hash) \
+                .order("created_at") \
+                .limit(1)
+            
+            response = await self._execute(query)
+            
+            return response.data[0] if response.data else None
+        except Exception as e:
+            return None
+    
+    async def get_voice_memo_by_audio_url(
+        self,
+        user_id: str,
+        audio_url: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            query = self.client.table("voice_memos") \
+                .select("*") \
+                .eq("user_id", user_id) \
+                .eq("audio_url", audio_url) \
+                .limit(1)
+            
+            response = await self._execute(query)
+            
+            return response.data[0] if response.data else None
+        except Exception as e:
+            return None
+    
+    async def get_shared_audio_urls(self, audio_urls: List[str], exclude_memo_ids: List[str]) -> Set[str]:
+        # audio_urls still referenced by memos outside the given ones
+        query = self.client.table("voice_memos") \
+            .select("audio_url") \
+            .in_("audio_url", audio_urls) \
+            .not_.in_("id", exclude_memo_ids)
+        
+        response = await self._execute(query)
+        
+        return {row["audio_url"] for row in response.data or []}
+    
     async def get_user_voice_memos(
         self,
         user_id: str,
         limit: int = 20,
         offset: int = 0,
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        after: Optional[Cursor] = None,
+        columns: str = "*"
     ) -> List[Dict[str, Any]]:
         try:
             query = self.client.table("voice_memos") \
-                .select("*") \
-                .eq("user_id", user_id) \
-                .order("created_at", desc=True) \
-                .limit(limit) \
-                .offset(offset)
+                .select(columns) \
+                .eq("user_id", user_id)
+            
+            query = self._page(query, limit, offset, after)
             
             # Filter by tags if provided
             if tags:
                 query = query.contains("tags", tags)
             
-            response = query.execute()
+            response = await self._execute(query)
             return response.data
         except Exception as e:
             return []
     
+    async def get_voice_memos_by_ids(
+        self,
+        user_id: str,
+        memo_ids: List[str],
+        columns: str = "*"
+    ) -> List[Dict[str, Any]]:
+        if not memo_ids:
+            return []
+        
+        query = self.client.table("voice_memos") \
+            .select(columns) \
+            .eq("user_id", user_id) \
+            .in_("id", memo_ids)
+        
+        response = await self._execute(query)
+        return response.data
+    
+    async def get_voice_memo_statuses(
+        self,
+        user_id: str,
+        memo_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        # memos still being transcribed, plus any the caller is already watching
+        status_filter = "transcript_status.in.(pending,processing)"
+        if memo_ids:
+            status_filter += f",id.in.({','.join(memo_ids)})"
+        
+        query = self.client.table("voice_memos") \
+            .select("id,transcript_status,tags") \
+            .eq("user_id", user_id) \
+            .or_(status_filter)
+        
+        response = await self._execute(query)
+        return response.data
+    
+    async def get_memo_context(self, user_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            query = self.client.table("memo_contexts") \
+                .select("memo_ids,digest,updated_at") \
+                .eq("user_id", user_id) \
+                .limit(1)
+            
+            response = await self._execute(query)
+            return response.data[0] if response.data else None
+        except Exception as e:
+            return None
+    
+    async def upsert_memo_context(
+        self,
+        user_id: str,
+        memo_ids: List[str],
+        digest: str
+    ) -> Dict[str, Any]:
+        data = {
+            "user_id": user_id,
+            "memo_ids": memo_ids,
+            "digest": digest,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        
+        response = await self._execute(self.client.table("memo_contexts").upsert(data))
+        # a read between the memo write and this one may have cached the old context
+        await self._invalidate(user_id)
+        return response.data[0] if response.data else None
+    
     async def create_conversation_log(
         self,
         user_id: str,
@@ -244,7 +483,54 @@ class DatabaseService:
         }
         
         try:
-            response = self.client.table("conversation_logs").insert(data).execute()
+            response = await self._execute(self.client.table("conversation_logs").insert(data))
             return response.data[0] if response.data else None
         except Exception as e:
-            raise
\ No newline at end of file
+            raise
+    
+    async def get_usage_quota(self, user_id: str) -> Optional[Dict[str, Any]]:
+        response = await self._execute(self.client.rpc("get_usage_quota", {"p_user_id": user_id}))
+        return response.data[0] if response.data else None
+    
+    async def reconcile_usage(self, period: Optional[str] = None) -> int:
+        response = await self._execute(self.client.rpc("reconcile_usage", {"p_period": period}))
+        return response.data or 0
+    
+    async def lookup_content_cache(
+        self,
+        kind: str,
+        content_hash: str
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            response = await self._execute(self.client.rpc("lookup_content_cache", {
+                "p_kind": kind,
+                "p_content_hash": content_hash
+            }))
+            return response.data or None
+        except Exception as e:
+            return None
+    
+    async def store_content_cache(
+        self,
+        kind: str,
+        content_hash: str,
+        result: Dict[str, Any]
+    ) -> None:
+        data = {
+            "kind": kind,
+            "content_hash": content_hash,
+            "result": result
+        }
+        
+        try:
+            await self._execute(self.client.table("content_cache").upsert(data))
+        except Exception as e:
+            # the cache is an optimisation, never fail the pipeline over it
+            pass
+    
+    async def get_content_cache_stats(self) -> List[Dict[str, Any]]:
+        try:
+            response = await self._execute(self.client.rpc("content_cache_stats", {}))
+            return response.data
+        except Exception as e:
+            return []
\ No newline at end of file
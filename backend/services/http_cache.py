@@ -0,0 +1,73 @@
+from typing import Any, Awaitable, Callable, Iterable
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from clients.response_cache import CachedResponse, ResponseCache
+from config import config
+import hashlib
+import json
+
+IN_FLIGHT_STATUSES = ("pending", "processing")
+
+
+def _in_flight(memos: Iterable[Any], shared: bool) -> bool:
+    for memo in memos:
+        if not isinstance(memo, dict):
+            continue
+        if memo.get("transcript_status") in IN_FLIGHT_STATUSES:
+            return True
+        # tags come from a later enrichment job in the worker, whose
+        # invalidation only reaches a cache shared with it
+        if not shared and memo.get("transcript_status") == "completed" and "tags" in memo and not memo["tags"]:
+            return True
+    return False
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [value.strip().removeprefix("W/") for value in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _response(request: Request, cached: CachedResponse, cache_status: str) -> Response:
+    headers = {
+        "ETag": cached.etag,
+        # clients must revalidate, the ETag makes that a 304 when nothing changed
+        "Cache-Control": "private, no-cache",
+        "X-Cache": cache_status
+    }
+    if _etag_matches(request, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+async def cached_read(
+    request: Request,
+    cache: ResponseCache,
+    user_id: str,
+    load: Callable[[], Awaitable[Any]],
+    memos: Callable[[Any], Iterable[Any]] = lambda payload: [payload]
+) -> Response:
+    """Serve a per-user read from ``cache``, falling back to ``load``.
+
+    ``memos`` picks the voice memos out of the payload; while any of them is
+    still being transcribed or tagged the entry gets the short pending TTL.
+    """
+    key = f"{request.url.path}?{request.url.query}"
+    
+    generation = await cache.generation(user_id)
+    cached = await cache.get(user_id, key)
+    if cached is not None:
+        return _response(request, cached, "HIT")
+    
+    payload = await load()
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    cached = CachedResponse(etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+    
+    ttl = config.response_cache_ttl_seconds
+    if _in_flight(memos(payload), cache.shared):
+        ttl = min(ttl, config.response_cache_pending_ttl_seconds)
+    await cache.set(user_id, key, cached, ttl, generation)
+    
+    return _response(request, cached, "MISS")
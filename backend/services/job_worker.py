@@ -0,0 +1,124 @@
+from typing import Any, Awaitable, Callable, Dict
+from clients.http import is_retryable
+from clients.job_queue import Job, JobQueue, LeaseLostError
+from config import config
+import asyncio
+import metrics
+import logging
+import random
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Job], Awaitable[Any]]
+
+
+def retry_delay(attempts: int) -> float:
+    # exponential backoff with full jitter
+    ceiling = min(config.job_retry_base_seconds * 2 ** (attempts - 1), config.job_retry_max_seconds)
+    return random.uniform(0, ceiling)
+
+
+class JobWorker:
+    # workers running in this process; their status events reach an
+    # in-process event bus without going through another process
+    running = 0
+    
+    def __init__(
+        self,
+        queue: JobQueue,
+        handlers: Dict[str, JobHandler],
+        concurrency: int = 4
+    ) -> None:
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.worker_id = f"worker-{uuid.uuid4().hex[:8]}"
+        self._stopping = asyncio.Event()
+        self.counters = {
+            "completed": 0,
+            "retried": 0,
+            "dead": 0,
+            "lease_lost": 0,
+            "wait_seconds_total": 0.0,
+            "run_seconds_total": 0.0
+        }
+    
+    def stop(self) -> None:
+        self._stopping.set()
+    
+    async def run(self) -> None:
+        JobWorker.running += 1
+        try:
+            await asyncio.gather(*[self._loop(slot) for slot in range(self.concurrency)])
+        finally:
+            JobWorker.running -= 1
+    
+    async def _loop(self, slot: int) -> None:
+        worker_id = f"{self.worker_id}/{slot}"
+        while not self._stopping.is_set():
+            try:
+                job = await self.queue.claim(worker_id, config.job_visibility_timeout_seconds)
+            except Exception:
+                logger.exception("Failed to claim job")
+                job = None
+            
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), config.job_poll_interval_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await self._process(job)
+    
+    async def _process(self, job: Job) -> None:
+        self.counters["wait_seconds_total"] += job.wait_seconds
+        start = time.perf_counter()
+        outcome = "completed"
+        
+        try:
+            outcome = await self._run(job)
+        except LeaseLostError:
+            # it outlived its visibility timeout, the worker that reclaimed it decides
+            outcome = "lease_lost"
+            self.counters["lease_lost"] += 1
+            logger.warning("Job %s (%s) lost its lease, outcome not recorded", job.id, job.kind)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.counters["run_seconds_total"] += elapsed
+            metrics.observe_job(job.kind, outcome, elapsed)
+    
+    async def _run(self, job: Job) -> str:
+        try:
+            handler = self.handlers[job.kind]
+            await handler(job)
+            await self.queue.complete(job)
+            self.counters["completed"] += 1
+            return "completed"
+        except LeaseLostError:
+            raise
+        except Exception as e:
+            # provider errors were already retried by the HTTP client, so the
+            # requeue waits at least as long as the provider or circuit asked
+            delay = None
+            if is_retryable(e) and not job.final_attempt:
+                delay = max(retry_delay(job.attempts), getattr(e, "retry_after", 0.0))
+            await self.queue.fail(job, str(e) or type(e).__name__, delay)
+            if delay is None:
+                self.counters["dead"] += 1
+                logger.error("Job %s (%s) failed permanently: %s", job.id, job.kind, e)
+                return "dead"
+            self.counters["retried"] += 1
+            logger.warning("Job %s (%s) attempt %d failed, retrying in %.1fs: %s", job.id, job.kind, job.attempts, delay, e)
+            return "retried"
+    
+    async def stats(self) -> Dict[str, Any]:
+        processed = self.counters["completed"] + self.counters["retried"] + self.counters["dead"]
+        return {
+            **await self.queue.stats(),
+            **{k: v for k, v in self.counters.items() if not k.endswith("_total")},
+            "avg_wait_seconds": round(self.counters["wait_seconds_total"] / processed, 3) if processed else 0.0,
+            "avg_run_seconds": round(self.counters["run_seconds_total"] / processed, 3) if processed else 0.0
+        }
@@ -0,0 +1,118 @@
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from clients.streaming_stt import StreamingSession, StreamingSTT
+from services.upload_service import SpooledAudio, staging_dir
+from config import config
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import wave
+
+logger = logging.getLogger(__name__)
+
+live_stats: Counter = Counter()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(config.upload_chunk_bytes):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LiveRecording:
+    """A memo recorded over the WebSocket, 16-bit mono PCM.
+
+    Every chunk goes to the speech-to-text session and to a WAV staging file
+    at once, so stopping only has to flush the last segment and upload. If
+    the provider drops out the recording carries on and ``finish`` returns
+    no transcript; the stored audio is then transcribed by the worker.
+    """
+
+    def __init__(self, stt: StreamingSTT, sample_rate: int, language: Optional[str] = None) -> None:
+        self.stt = stt
+        self.sample_rate = sample_rate
+        self.language = language
+        self.session: Optional[StreamingSession] = None
+        self.size_bytes = 0
+        fd, self.path = tempfile.mkstemp(dir=staging_dir(), suffix=".wav")
+        self._file = os.fdopen(fd, "wb")
+        self._wav = wave.open(self._file, "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+        live_stats["active"] += 1
+        live_stats["started"] += 1
+    
+    @property
+    def duration_seconds(self) -> float:
+        return self.size_bytes / 2 / self.sample_rate
+    
+    async def start(self) -> None:
+        try:
+            self.session = await self.stt.open(self.sample_rate, self.language)
+        except Exception:
+            logger.exception("Realtime speech-to-text unavailable, recording without it")
+            live_stats["stt_unavailable"] += 1
+    
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        if self.session is not None:
+            async for event in self.session:
+                yield event
+    
+    async def write(self, chunk: bytes) -> None:
+        if self.size_bytes + len(chunk) > config.max_upload_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Recording too large. Maximum size is {config.max_upload_bytes} bytes"
+            )
+        self._wav.writeframesraw(chunk)
+        self.size_bytes += len(chunk)
+        
+        if self.session is not None and not self.session.error:
+            try:
+                await self.session.send(chunk)
+            except Exception:
+                logger.exception("Realtime speech-to-text failed mid-recording")
+    
+    async def finish(self) -> Tuple[SpooledAudio, Optional[Dict[str, Any]]]:
+        """Close the WAV and the session; the transcript is None if the session failed."""
+        self._close_file()
+        
+        transcript = None
+        if self.session is not None:
+            try:
+                transcript = await self.session.finish()
+            except Exception:
+                logger.exception("Realtime speech-to-text failed, the worker will transcribe the audio")
+        if transcript is None:
+            live_stats["stt_fallbacks"] += 1
+        
+        audio = SpooledAudio(
+            path=self.path,
+            size_bytes=os.path.getsize(self.path),
+            sha256=await asyncio.to_thread(_sha256, self.path)
+        )
+        return audio, transcript
+    
+    async def discard(self) -> None:
+        self._close_file()
+        if self.session is not None:
+            await self.session.aclose()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+    
+    def _close_file(self) -> None:
+        if self._wav is None:
+            return
+        # rewrites the header sizes now that the length is known
+        self._wav.close()
+        self._file.close()
+        self._wav = None
+        live_stats["active"] -= 1
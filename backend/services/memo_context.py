@@ -0,0 +1,103 @@
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from clients.response_cache import CachedResponse, ResponseCache
+from services.database_service import DatabaseService
+from services.projections import select_columns
+from config import config
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "memo-context"
+
+
+def _age_days(created_at: str, now: datetime) -> float:
+    created = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    return max((now - created).total_seconds() / 86400, 0.0)
+
+
+def rank_memos(memos: List[Dict[str, Any]], now: datetime) -> List[Dict[str, Any]]:
+    """Recent memos first, lifted by tags the user keeps coming back to."""
+    completed = [memo for memo in memos if memo.get("transcript_status") == "completed"]
+    tag_counts = Counter(tag for memo in completed for tag in memo.get("tags") or [])
+    top_count = max(tag_counts.values(), default=1)
+    
+    def score(memo: Dict[str, Any]) -> float:
+        recency = 0.5 ** (_age_days(memo["created_at"], now) / config.context_half_life_days)
+        affinity = max((tag_counts[tag] for tag in memo.get("tags") or []), default=0) / top_count
+        return recency * (1 + affinity) + (0.5 if memo.get("is_favorite") else 0.0)
+    
+    return sorted(completed, key=score, reverse=True)
+
+
+def build_digest(memos: List[Dict[str, Any]]) -> str:
+    lines = []
+    length = 0
+    for memo in memos:
+        tags = ", ".join(memo.get("tags") or [])
+        preview = " ".join((memo.get("transcript_preview") or "").split())
+        line = f"- {memo['created_at'][:10]} [{tags}] {memo.get('title') or 'Untitled'}: {preview}"
+        if length + len(line) > config.context_digest_max_chars:
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+async def refresh_memo_context(user_id: str, database_service: DatabaseService) -> None:
+    """Recompute the user's context from their latest memos; runs in the worker."""
+    try:
+        memos = await database_service.get_user_voice_memos(
+            user_id=user_id,
+            limit=config.context_candidate_count,
+            columns=select_columns("voice_memos", "summary")
+        )
+        selected = rank_memos(memos, datetime.now(timezone.utc))[:config.context_memo_count]
+        await database_service.upsert_memo_context(
+            user_id,
+            [memo["id"] for memo in selected],
+            build_digest(selected)
+        )
+    except Exception:
+        # start_conversation keeps using the previous context
+        logger.exception("Failed to refresh memo context for %s", user_id)
+
+
+async def get_memo_context(
+    user_id: str,
+    database_service: DatabaseService,
+    cache: ResponseCache
+) -> Dict[str, Any]:
+    """Precomputed context, from the per-user cache or one row read.
+
+    The cache entry shares the user's generation with voice memo reads, so
+    any memo write drops it. Refreshes made by the worker only reach a
+    shared cache, otherwise the entry is kept for a few seconds.
+    """
+    generation = await cache.generation(user_id)
+    cached = await cache.get(user_id, CACHE_KEY)
+    if cached is not None:
+        return json.loads(cached.body)
+    
+    context = await database_service.get_memo_context(user_id)
+    if context is None:
+        # users whose memos predate the worker's refresh
+        await refresh_memo_context(user_id, database_service)
+        context = await database_service.get_memo_context(user_id)
+    
+    context = {
+        "memo_ids": (context or {}).get("memo_ids") or [],
+        "digest": (context or {}).get("digest") or ""
+    }
+    body = json.dumps(context).encode()
+    await cache.set(
+        user_id,
+        CACHE_KEY,
+        CachedResponse(etag=hashlib.sha256(body).hexdigest()[:32], body=body),
+        config.response_cache_ttl_seconds if cache.shared else config.context_cache_ttl_seconds,
+        generation
+    )
+    return context
@@ -0,0 +1,54 @@
+from typing import Dict, FrozenSet, Optional, Tuple
+from fastapi import HTTPException
+
+# Columns list endpoints may select. Pagination needs id and created_at,
+# so they are always part of the projection.
+KEYSET_COLUMNS = ("id", "created_at")
+
+VOICE_MEMO_COLUMNS: FrozenSet[str] = frozenset({
+    "id", "user_id", "created_at", "updated_at", "audio_url", "duration_seconds",
+    "file_size_bytes", "transcript", "transcript_preview", "transcript_status",
+    "transcript_metadata", "title", "summary", "tags", "is_favorite", "metadata",
+    "content_hash"
+})
+
+VOICE_MEMO_SUMMARY = (
+    "id", "title", "tags", "created_at", "duration_seconds",
+    "transcript_status", "transcript_preview", "is_favorite"
+)
+
+CONVERSATION_COLUMNS: FrozenSet[str] = frozenset({
+    "id", "user_id", "created_at", "updated_at", "title", "context_memo_ids",
+    "metadata", "transcript", "summary", "duration_seconds", "ended_at",
+    "elevenlabs_conversation_id", "audio_url"
+})
+
+CONVERSATION_SUMMARY = (
+    "id", "title", "created_at", "ended_at", "duration_seconds", "summary"
+)
+
+PROJECTIONS: Dict[str, Tuple[FrozenSet[str], Tuple[str, ...]]] = {
+    "voice_memos": (VOICE_MEMO_COLUMNS, VOICE_MEMO_SUMMARY),
+    "conversations": (CONVERSATION_COLUMNS, CONVERSATION_SUMMARY),
+}
+
+
+def select_columns(table: str, fields: Optional[str]) -> str:
+    """PostgREST select list for ``fields``: "summary" (default), "full" or a comma-separated list."""
+    allowed, summary = PROJECTIONS[table]
+    
+    if not fields or fields == "summary":
+        return ",".join(summary)
+    if fields == "full":
+        return "*"
+    
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    
+    columns = list(KEYSET_COLUMNS) + [field for field in requested if field not in KEYSET_COLUMNS]
+    return ",".join(dict.fromkeys(columns))
@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Set
+from fastapi import HTTPException, status
+from services.database_service import DatabaseService
+from config import config
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+RECORDING = "recording"
+CONVERSATION = "conversation"
+
+
+def _current_period() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-01")
+
+
+@dataclass
+class Quota:
+    period: str
+    recording_seconds: float
+    conversation_seconds: float
+    recording_limit_seconds: float
+    conversation_limit_seconds: float
+    fetched_at: float
+    
+    def remaining(self, kind: str) -> float:
+        if kind == RECORDING:
+            return self.recording_limit_seconds - self.recording_seconds
+        return self.conversation_limit_seconds - self.conversation_seconds
+
+
+class QuotaCache:
+    """Bounded LRU of quota snapshots per user.
+
+    Snapshots older than ``ttl`` are still served while one background read
+    refreshes them, so the check itself never waits on the database after a
+    user's first request in this process.
+    """
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self._entries: "OrderedDict[str, Quota]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        # the event loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+    
+    def get(self, user_id: str) -> Optional[Quota]:
+        quota = self._entries.get(user_id)
+        if quota is None or quota.period != _current_period():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return quota
+    
+    def set(self, user_id: str, quota: Quota) -> None:
+        self._entries[user_id] = quota
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def stale(self, quota: Quota) -> bool:
+        return time.monotonic() - quota.fetched_at > self.ttl
+    
+    def begin_refresh(self, user_id: str) -> bool:
+        if user_id in self._refreshing:
+            return False
+        self._refreshing.add(user_id)
+        self.refreshes += 1
+        return True
+    
+    def end_refresh(self, user_id: str) -> None:
+        self._refreshing.discard(user_id)
+    
+    def track(self, task: asyncio.Task) -> None:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def clear(self) -> None:
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+quota_cache = QuotaCache(config.quota_cache_max_entries, config.quota_cache_ttl_seconds)
+
+
+class QuotaService:
+    def __init__(self, database_service: DatabaseService, cache: QuotaCache = quota_cache):
+        self.database_service = database_service
+        self.cache = cache
+    
+    async def _fetch(self, user_id: str) -> Optional[Quota]:
+        row = await self.database_service.get_usage_quota(user_id)
+        if not row:
+            return None
+        quota = Quota(
+            period=str(row["period"]),
+            recording_seconds=float(row["recording_seconds"]),
+            conversation_seconds=float(row["conversation_seconds"]),
+            recording_limit_seconds=float(row["recording_limit_seconds"]),
+            conversation_limit_seconds=float(row["conversation_limit_seconds"]),
+            fetched_at=time.monotonic()
+        )
+        self.cache.set(user_id, quota)
+        return quota
+    
+    async def _refresh(self, user_id: str) -> None:
+        try:
+            await self._fetch(user_id)
+        except Exception:
+            logger.exception("Failed to refresh quota for %s", user_id)
+        finally:
+            self.cache.end_refresh(user_id)
+    
+    async def get_quota(self, user_id: str) -> Optional[Quota]:
+        quota = self.cache.get(user_id)
+        if quota is None:
+            return await self._fetch(user_id)
+        
+        if self.cache.stale(quota) and self.cache.begin_refresh(user_id):
+            self.cache.track(asyncio.create_task(self._refresh(user_id)))
+        return quota
+    
+    async def check(self, user_id: str, kind: str) -> None:
+        """Raise 403 once this month's ``kind`` minutes are used up."""
+        if not config.quota_enforcement_enabled:
+            return
+        
+        try:
+            quota = await self.get_quota(user_id)
+        except Exception:
+            # metering must not take uploads and conversations down with it
+            logger.exception("Quota check failed for %s, allowing", user_id)
+            return
+        
+        if quota is not None and quota.remaining(kind) <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Monthly {kind} minutes used up"
+            )
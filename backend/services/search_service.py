@@ -0,0 +1,111 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from clients.registry import registry
+from clients.http import ProviderError
+from clients.vector_index import VectorIndex
+from services.database_service import DatabaseService
+from services.projections import select_columns
+from config import config
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_MODES = ("hybrid", "semantic", "keyword")
+
+# repeated queries (typing, paging) skip the embeddings round trip
+_query_embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+
+
+async def embed(texts: List[str]) -> List[List[float]]:
+    client = registry.http['openai']
+    response = await client.post(
+        '/v1/embeddings',
+        json={'model': config.embedding_model, 'input': texts}
+    )
+    
+    if response.status_code != 200:
+        raise ProviderError.from_response("OpenAI embeddings", response)
+    
+    data = sorted(response.json()['data'], key=lambda item: item['index'])
+    return [item['embedding'] for item in data]
+
+
+async def index_voice_memo(
+    memo_id: str,
+    user_id: str,
+    transcript: str,
+    database_service: DatabaseService,
+    index: Optional[VectorIndex] = None
+) -> None:
+    """Embed a transcript once and add it to the user's search index."""
+    if not transcript:
+        return
+    
+    index = index or registry.vector_index
+    text = transcript[:config.embedding_max_chars]
+    text_hash = hashlib.sha256(f"{config.embedding_model}:{text}".encode()).hexdigest()
+    
+    try:
+        cached = await database_service.lookup_content_cache('embedding', text_hash)
+        if cached:
+            embedding = cached['embedding']
+        else:
+            embedding = (await embed([text]))[0]
+            await database_service.store_content_cache('embedding', text_hash, {'embedding': embedding})
+        
+        await index.upsert(user_id, memo_id, embedding, text, config.embedding_model)
+    except ProviderError as e:
+        if e.retryable:
+            # re-indexed when the enrichment job is retried
+            raise
+        logger.exception("Failed to index voice memo %s", memo_id)
+    except Exception:
+        # search misses this memo until it is re-indexed, the transcript is unaffected
+        logger.exception("Failed to index voice memo %s", memo_id)
+
+
+class SearchService:
+    def __init__(self, database_service: DatabaseService, index: VectorIndex):
+        self.database_service = database_service
+        self.index = index
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        key = query.strip().lower()
+        if key in _query_embeddings:
+            _query_embeddings.move_to_end(key)
+            return _query_embeddings[key]
+        
+        embedding = (await embed([query]))[0]
+        _query_embeddings[key] = embedding
+        while len(_query_embeddings) > config.query_embedding_cache_size:
+            _query_embeddings.popitem(last=False)
+        return embedding
+    
+    async def search(
+        self,
+        user_id: str,
+        query: str,
+        limit: int = 10,
+        mode: str = "hybrid",
+        fields: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        limit = max(1, min(limit, config.search_max_results))
+        embedding = await self._embed_query(query) if mode != "keyword" else None
+        keywords = query if mode != "semantic" else None
+        
+        hits = await self.index.search(user_id, embedding, keywords, limit)
+        
+        # deleted memos drop out here even if the index still has them
+        memos = await self.database_service.get_voice_memos_by_ids(
+            user_id,
+            [memo_id for memo_id, _ in hits],
+            columns=select_columns("voice_memos", fields)
+        )
+        by_id = {memo["id"]: memo for memo in memos}
+        
+        return [
+            {**by_id[memo_id], "score": round(score, 6)}
+            for memo_id, score in hits
+            if memo_id in by_id
+        ]
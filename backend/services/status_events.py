@@ -0,0 +1,128 @@
+from typing import Any, AsyncIterator, Dict, List, Optional
+from clients.event_bus import EventBus
+from clients.registry import registry
+from services.database_service import DatabaseService
+from services.job_worker import JobWorker
+from config import config
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATUSES = ("completed", "failed")
+
+
+async def publish_status(user_id: str, event: Dict[str, Any]) -> None:
+    # status events are advisory, the memo row stays the source of truth
+    try:
+        await registry.event_bus.publish(user_id, event)
+    except Exception:
+        logger.exception("Failed to publish %s event", event.get("type"))
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+class MemoWatch:
+    """Turns status snapshots into the same events the worker publishes.
+
+    Used when the bus does not carry the worker's events: in-flight memos are
+    re-read every ``events_poll_interval_seconds`` and changes are emitted.
+    A completed memo stays watched for at most ``tag_wait_polls`` polls while
+    its tags are missing; finished and deleted memos are forgotten.
+    """
+
+    def __init__(self, tag_wait_polls: Optional[int] = None) -> None:
+        self.tag_wait_polls = tag_wait_polls or config.events_tag_wait_polls
+        self._seen: Dict[str, Dict[str, Any]] = {}
+        self._untagged_polls: Dict[str, int] = {}
+    
+    @property
+    def watching(self) -> List[str]:
+        return list(self._seen)
+    
+    def update(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        events = []
+        for row in rows:
+            previous = self._seen.get(row["id"])
+            row = {**row, "tags": row.get("tags") or []}
+            self._seen[row["id"]] = row
+            
+            if previous is None or previous["transcript_status"] != row["transcript_status"]:
+                events.append({
+                    "type": "transcript",
+                    "memo_id": row["id"],
+                    "status": row["transcript_status"]
+                })
+            if row["tags"] and (previous is None or previous["tags"] != row["tags"]):
+                events.append({"type": "tags", "memo_id": row["id"], "tags": row["tags"]})
+        
+        # every watched memo that still exists is in rows
+        returned = {row["id"] for row in rows}
+        for memo_id, memo in list(self._seen.items()):
+            if memo_id not in returned or self._finished(memo_id, memo):
+                del self._seen[memo_id]
+                self._untagged_polls.pop(memo_id, None)
+        return events
+    
+    def _finished(self, memo_id: str, memo: Dict[str, Any]) -> bool:
+        if memo["transcript_status"] not in FINAL_STATUSES:
+            return False
+        if memo["transcript_status"] == "failed" or memo["tags"]:
+            return True
+        polls = self._untagged_polls.get(memo_id, 0) + 1
+        self._untagged_polls[memo_id] = polls
+        return polls >= self.tag_wait_polls
+
+
+async def status_stream(
+    bus: EventBus,
+    database_service: DatabaseService,
+    user_id: str,
+    is_disconnected,
+    heartbeat: Optional[float] = None,
+    poll_interval: Optional[float] = None
+) -> AsyncIterator[str]:
+    heartbeat = heartbeat or config.events_heartbeat_seconds
+    poll_interval = poll_interval or config.events_poll_interval_seconds
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def pump() -> None:
+        async for event in bus.subscribe(user_id):
+            await events.put(event)
+    
+    async def poll() -> None:
+        # the first read reports memos that were already in flight on connect
+        watch = MemoWatch()
+        while True:
+            try:
+                rows = await database_service.get_voice_memo_statuses(user_id, watch.watching)
+            except Exception:
+                logger.exception("Failed to read voice memo statuses")
+            else:
+                for event in watch.update(rows):
+                    await events.put(event)
+            await asyncio.sleep(poll_interval)
+    
+    tasks = [asyncio.create_task(pump())]
+    # a worker in this process publishes straight to an in-process bus
+    if not bus.shared and not JobWorker.running:
+        tasks.append(asyncio.create_task(poll()))
+    
+    try:
+        yield f"retry: {int(poll_interval * 1000)}\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,245 @@
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, AsyncIterator, BinaryIO, Tuple
+from fastapi import HTTPException, UploadFile
+from config import config
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+import uuid
+import weakref
+
+
+@dataclass
+class SpooledAudio:
+    path: str
+    size_bytes: int
+    sha256: str
+    handed_off: bool = False
+    
+    def handoff(self, name: str) -> str:
+        """Move the staged file where the worker looks for it, keeping it past the request."""
+        path = os.path.join(handoff_dir(), name)
+        os.replace(self.path, path)
+        self.path = path
+        self.handed_off = True
+        return path
+    
+    def discard(self) -> None:
+        if self.handed_off:
+            return
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {config.max_upload_bytes} bytes"
+    )
+
+
+def staging_dir() -> str:
+    path = config.upload_staging_dir or os.path.join(tempfile.gettempdir(), "sonanta-uploads")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def handoff_dir() -> str:
+    path = os.path.join(staging_dir(), "handoff")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+async def spool_upload(file: UploadFile) -> SpooledAudio:
+    """Copy an upload to a staging file chunk by chunk, hashing as it goes."""
+    if file.size is not None and file.size > config.max_upload_bytes:
+        raise _too_large()
+    
+    digest = hashlib.sha256()
+    size = 0
+    fd, path = tempfile.mkstemp(dir=staging_dir(), suffix=".part")
+    
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(config.upload_chunk_bytes):
+                size += len(chunk)
+                if size > config.max_upload_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    
+    return SpooledAudio(path=path, size_bytes=size, sha256=digest.hexdigest())
+
+
+def _hash_file(path: str) -> Tuple[Any, int]:
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(config.upload_chunk_bytes):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest, size
+
+
+def _write(out: BinaryIO, digest: Any, chunk: bytes) -> None:
+    out.write(chunk)
+    digest.update(chunk)
+
+
+# per process: a PATCH that lands on another API process rebuilds the hash
+# from the data file, and relies on the offset check instead of the lock
+_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+# running sha256 of each upload's data file, with the offset it covers
+_digests: Dict[str, Tuple[Any, int]] = {}
+
+
+class ResumableUploadService:
+    """TUS-style resumable uploads staged on local disk.
+
+    Each upload is a ``<id>.part`` data file plus a ``<id>.json`` sidecar with
+    the owner and declared length. The current offset is the size of the data
+    file, so a client can always resume from the last byte that reached disk.
+    The sha256 is kept up to date as chunks arrive, so completing an upload
+    doesn't read the whole file again.
+    """
+
+    def __init__(self) -> None:
+        self.directory = staging_dir()
+    
+    @asynccontextmanager
+    async def lock(self, upload_id: str):
+        """Held across append and complete; a concurrent PATCH gets a 409."""
+        lock = _locks.setdefault(upload_id, asyncio.Lock())
+        if lock.locked():
+            raise HTTPException(status_code=409, detail="Upload already in progress")
+        async with lock:
+            yield
+    
+    async def _digest(self, upload_id: str, data_path: str, offset: int) -> Any:
+        digest, hashed = _digests.get(upload_id, (None, -1))
+        if hashed != offset:
+            # staged by another process, or before a restart
+            digest, hashed = await asyncio.to_thread(_hash_file, data_path)
+        _digests[upload_id] = (digest, hashed)
+        return digest
+    
+    def _paths(self, upload_id: str):
+        uuid.UUID(upload_id)  # rejects path traversal in ids
+        base = os.path.join(self.directory, upload_id)
+        return f"{base}.part", f"{base}.json"
+    
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - config.upload_session_ttl_seconds
+        
+        # handoff files a worker never picked up (e.g. it runs on another host)
+        for name in os.listdir(handoff_dir()):
+            path = os.path.join(handoff_dir(), name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            if os.path.getmtime(path) < cutoff:
+                self.discard(name[:-len(".json")])
+    
+    def create(
+        self,
+        user_id: str,
+        length: int,
+        filename: str,
+        content_type: str,
+        title: Optional[str] = None
+    ) -> Dict[str, Any]:
+        if length <= 0:
+            # an empty upload would finalize immediately and send no audio to STT
+            raise HTTPException(status_code=400, detail="Upload-Length must be positive")
+        if length > config.max_upload_bytes:
+            raise _too_large()
+        
+        self._purge_expired()
+        
+        upload = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "length": length,
+            "filename": filename,
+            "content_type": content_type,
+            "title": title
+        }
+        data_path, meta_path = self._paths(upload["id"])
+        open(data_path, "wb").close()
+        with open(meta_path, "w") as f:
+            json.dump(upload, f)
+        
+        return {**upload, "offset": 0}
+    
+    def get(self, upload_id: str, user_id: str) -> Dict[str, Any]:
+        try:
+            data_path, meta_path = self._paths(upload_id)
+            with open(meta_path) as f:
+                upload = json.load(f)
+        except (ValueError, FileNotFoundError):
+            raise HTTPException(status_code=404, detail="Upload not found")
+        
+        if upload["user_id"] != user_id:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        
+        return {**upload, "offset": os.path.getsize(data_path)}
+    
+    async def append(
+        self,
+        upload_id: str,
+        user_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes]
+    ) -> Dict[str, Any]:
+        upload = self.get(upload_id, user_id)
+        if offset != upload["offset"]:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Upload offset mismatch, expected {upload['offset']}"
+            )
+        
+        data_path, meta_path = self._paths(upload_id)
+        digest = await self._digest(upload_id, data_path, upload["offset"])
+        written = upload["offset"]
+        
+        # bytes already flushed stay on disk if the connection drops
+        out = await asyncio.to_thread(open, data_path, "ab")
+        try:
+            async for chunk in chunks:
+                if written + len(chunk) > upload["length"]:
+                    raise HTTPException(status_code=413, detail="Chunk exceeds declared upload length")
+                await asyncio.to_thread(_write, out, digest, chunk)
+                written += len(chunk)
+                _digests[upload_id] = (digest, written)
+        finally:
+            await asyncio.to_thread(out.close)
+        
+        os.utime(meta_path)
+        return {**upload, "offset": written}
+    
+    async def complete(self, upload_id: str, user_id: str) -> SpooledAudio:
+        upload = self.get(upload_id, user_id)
+        data_path, _ = self._paths(upload_id)
+        digest = await self._digest(upload_id, data_path, upload["offset"])
+        return SpooledAudio(path=data_path, size_bytes=upload["offset"], sha256=digest.hexdigest())
+    
+    def discard(self, upload_id: str) -> None:
+        _digests.pop(upload_id, None)
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,15 +1,49 @@
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from clients.supabase import SupabaseClient
+from clients.job_queue import JobQueue
+from clients.vector_index import VectorIndex
 from services.database_service import DatabaseService
-import os
+from services.upload_service import SpooledAudio
+from services.pagination import Cursor
+from services.memo_context import refresh_memo_context
+from services.status_events import publish_status
+from config import config
+from collections import Counter
 from datetime import datetime, timezone
+import hashlib
+import logging
+import os
+import re
 import uuid
+from io import BufferedReader
+
+logger = logging.getLogger(__name__)
+
+upload_dedup_stats: Counter = Counter()
+
+# direct uploads are named by the server, the extension follows the declared type
+DIRECT_UPLOAD_EXTENSIONS = {
+    "audio/mpeg": ".mp3",
+    "audio/mp3": ".mp3",
+    "audio/wav": ".wav",
+    "audio/m4a": ".m4a",
+    "audio/webm": ".webm"
+}
+_DIRECT_UPLOAD_PATH = re.compile(r"^[^/]+/\d{4}-\d{2}-\d{2}/[0-9a-f-]{36}\.(mp3|wav|m4a|webm)$")
 
 
 class VoiceMemoService:
-    def __init__(self, supabase_client: SupabaseClient, database_service: DatabaseService):
+    def __init__(
+        self,
+        supabase_client: SupabaseClient,
+        database_service: DatabaseService,
+        job_queue: JobQueue,
+        vector_index: VectorIndex
+    ):
         self.supabase_client = supabase_client
         self.database_service = database_service
+        self.job_queue = job_queue
+        self.vector_index = vector_index
         self.bucket_name = "voice-memos"
     
     async def upload_voice_memo(
@@ -20,39 +54,227 @@ class VoiceMemoService:
         content_type: str = "audio/mpeg",
         title: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        return await self._store_voice_memo(
+            user_id=user_id,
+            file=file_content,
+            file_size_bytes=len(file_content),
+            content_hash=hashlib.sha256(file_content).hexdigest(),
+            filename=filename,
+            content_type=content_type,
+            title=title,
+            metadata=metadata or {"original_filename": filename}
+        )
+    
+    async def upload_spooled_voice_memo(
+        self,
+        user_id: str,
+        audio: SpooledAudio,
+        filename: str,
+        content_type: str = "audio/mpeg",
+        title: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        # httpx streams file objects from disk in small blocks
+        with open(audio.path, "rb") as file:
+            return await self._store_voice_memo(
+                user_id=user_id,
+                file=file,
+                file_size_bytes=audio.size_bytes,
+                content_hash=audio.sha256,
+                filename=filename,
+                content_type=content_type,
+                title=title,
+                metadata=metadata or {"original_filename": filename}
+            )
+    
+    async def _store_voice_memo(
+        self,
+        user_id: str,
+        file: Union[bytes, BufferedReader],
+        file_size_bytes: int,
+        content_hash: str,
+        filename: str,
+        content_type: str,
+        title: Optional[str],
+        metadata: Dict[str, Any]
     ) -> Dict[str, Any]:
         try:
+            # a retried upload of the same audio returns the memo it already created
+            existing = await self.database_service.get_voice_memo_by_content_hash(user_id, content_hash)
+            if existing and existing.get("transcript_status") == "failed":
+                # not a duplicate worth returning as is: the caller transcribes
+                # it again, with the audio it just received
+                upload_dedup_stats["retried"] += 1
+                return await self.database_service.update_voice_memo_transcript(
+                    memo_id=existing["id"],
+                    transcript="",
+                    status="pending"
+                ) or existing
+            if existing:
+                upload_dedup_stats["hits"] += 1
+                return {**existing, "deduplicated": True}
+            upload_dedup_stats["misses"] += 1
+            
+            # content-addressed, still under the user's folder for the storage policies
             file_extension = os.path.splitext(filename)[1] or ".mp3"
-            unique_filename = f"{user_id}/{datetime.now(timezone.utc).strftime('%Y/%m/%d')}/{uuid.uuid4()}{file_extension}"
+            unique_filename = f"{user_id}/audio/{content_hash}{file_extension}"
             
             storage_client = self.supabase_client.client.storage
             
-            storage_client.from_(self.bucket_name).upload(
+            await self.supabase_client.run(
+                storage_client.from_(self.bucket_name).upload,
                 path=unique_filename,
-                file=file_content,
-                file_options={"content-type": content_type}
+                file=file,
+                file_options={"content-type": content_type, "upsert": "true"}
             )
             
             public_url = storage_client.from_(self.bucket_name).get_public_url(unique_filename)
             
-            file_size_bytes = len(file_content)
-            
             voice_memo = await self.database_service.create_voice_memo(
                 user_id=user_id,
                 audio_url=public_url,
                 file_size_bytes=file_size_bytes,
                 title=title or filename,
-                metadata=metadata or {"original_filename": filename}
+                metadata=metadata,
+                content_hash=content_hash
             )
+            if voice_memo is None:
+                # a concurrent retry of this upload inserted it first
+                upload_dedup_stats["raced"] += 1
+                existing = await self.database_service.get_voice_memo_by_content_hash(user_id, content_hash)
+                if existing is None:
+                    raise RuntimeError("Voice memo was deleted while it was being uploaded")
+                return {**existing, "deduplicated": True}
             
             return voice_memo
-            
+        
         except Exception:
             raise
     
-    async def start_transcription(self, memo_id: str) -> None:
-        from services.background_tasks import process_voice_memo
-        await process_voice_memo(memo_id)
+    async def create_upload_url(self, user_id: str, content_type: str) -> Dict[str, Any]:
+        """Sign a one-off storage path the client uploads to without the API."""
+        path = f"{user_id}/{datetime.now(timezone.utc):%Y-%m-%d}/{uuid.uuid4()}{DIRECT_UPLOAD_EXTENSIONS[content_type]}"
+        
+        storage_client = self.supabase_client.client.storage
+        signed = await self.supabase_client.run(
+            storage_client.from_(self.bucket_name).create_signed_upload_url,
+            path
+        )
+        
+        return {"path": path, "upload_url": signed["signed_url"], "token": signed["token"]}
+    
+    def owns_upload_path(self, user_id: str, path: str) -> bool:
+        return path.startswith(f"{user_id}/") and bool(_DIRECT_UPLOAD_PATH.match(path))
+    
+    async def get_uploaded_object(self, path: str) -> Optional[Dict[str, Any]]:
+        folder, name = path.rsplit("/", 1)
+        storage_client = self.supabase_client.client.storage
+        objects = await self.supabase_client.run(
+            storage_client.from_(self.bucket_name).list,
+            folder,
+            {"search": name, "limit": 1}
+        )
+        return next((item for item in objects or [] if item.get("name") == name), None)
+    
+    async def finalize_upload(
+        self,
+        user_id: str,
+        path: str,
+        size_bytes: Optional[int],
+        title: Optional[str] = None,
+        filename: Optional[str] = None
+    ) -> Dict[str, Any]:
+        storage_client = self.supabase_client.client.storage
+        public_url = storage_client.from_(self.bucket_name).get_public_url(path)
+        
+        # a retried finalize returns the memo the first one created
+        existing = await self.database_service.get_voice_memo_by_audio_url(user_id, public_url)
+        if existing:
+            return {**existing, "deduplicated": True}
+        
+        filename = filename or os.path.basename(path)
+        return await self.database_service.create_voice_memo(
+            user_id=user_id,
+            audio_url=public_url,
+            file_size_bytes=size_bytes,
+            title=title or filename,
+            metadata={"original_filename": filename, "upload": "direct"}
+        )
+    
+    async def remove_upload(self, path: str) -> None:
+        storage_client = self.supabase_client.client.storage
+        await self.supabase_client.run(storage_client.from_(self.bucket_name).remove, [path])
+    
+    def _storage_path(self, audio_url: str) -> Optional[str]:
+        # Format: https://<project>.supabase.co/storage/v1/object/public/voice-memos/<path>
+        url_parts = audio_url.split(f"/{self.bucket_name}/")
+        return url_parts[1].split("?")[0] if len(url_parts) > 1 else None
+    
+    async def start_transcription(
+        self,
+        voice_memo: Dict[str, Any],
+        audio: Optional[SpooledAudio] = None
+    ) -> None:
+        storage_path = self._storage_path(voice_memo["audio_url"])
+        payload = {
+            "memo_id": voice_memo["id"],
+            "user_id": voice_memo["user_id"],
+            "storage_path": storage_path,
+            "content_hash": voice_memo.get("content_hash")
+        }
+        
+        if audio is not None and config.audio_handoff_enabled:
+            extension = os.path.splitext(storage_path or "")[1]
+            payload["local_path"] = audio.handoff(f"{voice_memo['id']}{extension}")
+        
+        # picked up by worker.py, see services/background_tasks.py
+        await self.job_queue.enqueue("transcribe_voice_memo", payload)
+    
+    async def store_live_recording(
+        self,
+        user_id: str,
+        audio: SpooledAudio,
+        transcript: Optional[Dict[str, Any]],
+        duration_seconds: float,
+        title: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Store a recording streamed over the WebSocket with its live transcript."""
+        filename = f"recording-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.wav"
+        voice_memo = await self.upload_spooled_voice_memo(
+            user_id=user_id,
+            audio=audio,
+            filename=filename,
+            content_type="audio/wav",
+            title=title,
+            metadata={"original_filename": filename, "upload": "stream"}
+        )
+        if voice_memo.get("deduplicated"):
+            return voice_memo
+        
+        if transcript is None:
+            # the live session failed, transcribe the stored audio instead
+            await self.start_transcription(voice_memo, audio)
+            return voice_memo
+        
+        voice_memo = await self.database_service.update_voice_memo_transcript(
+            memo_id=voice_memo["id"],
+            transcript=transcript["text"],
+            status="completed",
+            transcript_metadata={
+                "language": transcript.get("language_code"),
+                "confidence": None,
+                "duration_seconds": round(duration_seconds, 2),
+                "segment_count": transcript.get("segment_count"),
+                "audio_source": "stream"
+            },
+            duration_seconds=round(duration_seconds, 2)
+        )
+        await publish_status(user_id, {"type": "transcript", "memo_id": voice_memo["id"], "status": "completed"})
+        
+        # indexing and tagging are not worth keeping the client waiting
+        await self.job_queue.enqueue("enrich_voice_memo", {"memo_id": voice_memo["id"], "user_id": user_id})
+        return voice_memo
     
     async def get_voice_memo(self, memo_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         return await self.database_service.get_voice_memo(memo_id, user_id)
@@ -62,13 +284,17 @@ class VoiceMemoService:
         user_id: str,
         limit: int = 20,
         offset: int = 0,
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        after: Optional[Cursor] = None,
+        columns: str = "*"
     ) -> List[Dict[str, Any]]:
         return await self.database_service.get_user_voice_memos(
             user_id=user_id,
             limit=limit,
             offset=offset,
-            tags=tags
+            tags=tags,
+            after=after,
+            columns=columns
         )
     
     
@@ -78,19 +304,74 @@ class VoiceMemoService:
             return False
         
         try:
-            if memo.get("audio_url"):
-                url_parts = memo["audio_url"].split("/voice-memos/")
-                if len(url_parts) > 1:
-                    file_path = url_parts[1]
-                    storage_client = self.supabase_client.client.storage
-                    storage_client.from_(self.bucket_name).remove([file_path])
-            
-            self.supabase_client.client.table("voice_memos") \
-                .delete() \
-                .eq("id", memo_id) \
-                .execute()
-            
-            return True
-            
+            await self.database_service.delete_voice_memo(memo_id, user_id)
+        except Exception:
+            return False
+        
+        await self._remove_audio([memo.get("audio_url")], [memo_id])
+        await self._delete_embeddings(user_id, [memo_id])
+        await refresh_memo_context(user_id, self.database_service)
+        return True
+    
+    async def get_voice_memos_batch(
+        self,
+        user_id: str,
+        memo_ids: List[str],
+        columns: str = "*"
+    ) -> Dict[str, Dict[str, Any]]:
+        memos = await self.database_service.get_voice_memos_by_ids(user_id, memo_ids, columns)
+        return {memo["id"]: memo for memo in memos}
+    
+    async def delete_voice_memos(self, user_id: str, memo_ids: List[str]) -> Dict[str, str]:
+        """Delete several memos with one read, one delete and one storage call.
+
+        Returns each id's outcome: "deleted", "not_found" or "failed".
+        """
+        memos = await self.database_service.get_voice_memos_by_ids(user_id, memo_ids, "id,audio_url")
+        results = {memo_id: "not_found" for memo_id in memo_ids}
+        if not memos:
+            return results
+        
+        found = [memo["id"] for memo in memos]
+        try:
+            deleted = await self.database_service.delete_voice_memos(user_id, found)
+        except Exception:
+            results.update({memo_id: "failed" for memo_id in found})
+            return results
+        
+        results.update({memo_id: "deleted" for memo_id in deleted})
+        if deleted:
+            gone = set(deleted)
+            await self._remove_audio([memo.get("audio_url") for memo in memos if memo["id"] in gone], deleted)
+            await self._delete_embeddings(user_id, deleted)
+        await refresh_memo_context(user_id, self.database_service)
+        return results
+    
+    async def _remove_audio(self, audio_urls: List[Optional[str]], memo_ids: List[str]) -> None:
+        # runs after the rows are gone: an orphaned object only costs storage,
+        # a memo whose audio was removed can't be played or transcribed again
+        audio_urls = list({url for url in audio_urls if url})
+        if not audio_urls:
+            return
+        try:
+            # content-addressed objects can back memos that were not deleted
+            shared = await self.database_service.get_shared_audio_urls(audio_urls, memo_ids)
+            paths = [
+                path for path in (self._storage_path(url) for url in audio_urls if url not in shared)
+                if path
+            ]
+            if paths:
+                storage_client = self.supabase_client.client.storage
+                await self.supabase_client.run(
+                    storage_client.from_(self.bucket_name).remove,
+                    paths
+                )
+        except Exception:
+            logger.exception("Failed to remove audio of %d deleted voice memos", len(memo_ids))
+    
+    async def _delete_embeddings(self, user_id: str, memo_ids: List[str]) -> None:
+        try:
+            await self.vector_index.delete(user_id, memo_ids)
         except Exception:
-            return False
\ No newline at end of file
+            # the memos are gone, search drops hits it can't load
+            logger.exception("Failed to delete embeddings for %d voice memos", len(memo_ids))
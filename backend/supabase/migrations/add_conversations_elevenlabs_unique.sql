@@ -0,0 +1,7 @@
+-- One conversation per ElevenLabs conversation, so a redelivered webhook
+-- cannot create a second row
+DROP INDEX IF EXISTS public.idx_conversations_elevenlabs_id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_conversations_elevenlabs_id
+  ON public.conversations(elevenlabs_conversation_id)
+  WHERE elevenlabs_conversation_id IS NOT NULL;
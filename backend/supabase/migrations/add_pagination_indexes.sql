@@ -0,0 +1,14 @@
+-- Keyset pagination: list endpoints page by (created_at DESC, id DESC) per user,
+-- so one composite index serves both the filter and the sort without a scan
+CREATE INDEX IF NOT EXISTS idx_voice_memos_user_created_id
+  ON public.voice_memos(user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_conversations_user_created_id
+  ON public.conversations(user_id, created_at DESC, id DESC);
+
+-- The composite indexes cover lookups by user_id alone
+DROP INDEX IF EXISTS public.idx_voice_memos_user_id;
+DROP INDEX IF EXISTS public.idx_conversations_user_id;
+
+-- Tag filters (tags @> ARRAY[...]) are served by idx_voice_memos_tags (GIN),
+-- created in create_voice_memos.sql
@@ -0,0 +1,6 @@
+-- Short prefix of the transcript for list views, so lists don't ship full transcripts
+ALTER TABLE public.voice_memos
+ADD COLUMN IF NOT EXISTS transcript_preview TEXT
+GENERATED ALWAYS AS (LEFT(transcript, 200)) STORED;
+
+COMMENT ON COLUMN public.voice_memos.transcript_preview IS 'First 200 characters of the transcript';
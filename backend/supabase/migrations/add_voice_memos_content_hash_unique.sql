@@ -0,0 +1,20 @@
+-- One memo per user and audio content, so concurrent retries of the same
+-- upload can't create two rows sharing one content-addressed object.
+-- Existing duplicates keep their rows but stop taking part in dedup.
+UPDATE public.voice_memos
+SET content_hash = NULL
+WHERE id IN (
+  SELECT id FROM (
+    SELECT id,
+           ROW_NUMBER() OVER (PARTITION BY user_id, content_hash ORDER BY created_at, id) AS copy
+    FROM public.voice_memos
+    WHERE content_hash IS NOT NULL
+  ) copies
+  WHERE copy > 1
+);
+
+DROP INDEX IF EXISTS public.idx_voice_memos_user_content_hash;
+
+-- NULL hashes (memos stored before dedup) never conflict
+CREATE UNIQUE INDEX IF NOT EXISTS idx_voice_memos_user_content_hash
+  ON public.voice_memos(user_id, content_hash);
@@ -0,0 +1,43 @@
+-- Content hash of the uploaded audio, used to dedupe retried uploads
+ALTER TABLE public.voice_memos
+ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_voice_memos_user_content_hash ON public.voice_memos(user_id, content_hash);
+CREATE INDEX IF NOT EXISTS idx_voice_memos_audio_url ON public.voice_memos(audio_url);
+
+COMMENT ON COLUMN public.voice_memos.content_hash IS 'SHA-256 of the uploaded audio bytes';
+
+-- Results of expensive processing keyed by a hash of their input:
+--   kind = 'transcript' -> SHA-256 of the audio bytes
+--   kind = 'tags'       -> SHA-256 of the transcript text
+CREATE TABLE IF NOT EXISTS public.content_cache (
+  kind TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+  last_hit_at TIMESTAMP WITH TIME ZONE,
+
+  result JSONB NOT NULL,
+  hit_count INTEGER DEFAULT 0 NOT NULL,
+
+  PRIMARY KEY (kind, content_hash)
+);
+
+-- Service role only; no client policies
+ALTER TABLE public.content_cache ENABLE ROW LEVEL SECURITY;
+
+-- Returns the cached result and counts the hit in one round trip
+CREATE OR REPLACE FUNCTION public.lookup_content_cache(p_kind TEXT, p_content_hash TEXT)
+RETURNS JSONB AS $$
+  UPDATE public.content_cache
+  SET hit_count = hit_count + 1,
+      last_hit_at = NOW()
+  WHERE kind = p_kind AND content_hash = p_content_hash
+  RETURNING result;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION public.content_cache_stats()
+RETURNS TABLE(kind TEXT, entries BIGINT, hits BIGINT) AS $$
+  SELECT kind, COUNT(*), COALESCE(SUM(hit_count), 0)
+  FROM public.content_cache
+  GROUP BY kind;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,34 @@
+-- Stores a conversation's final transcript and logs its usage in one
+-- statement. Only a conversation that has not ended yet is updated, so
+-- redelivered or concurrently retried webhooks meter the call once, and a
+-- failed log insert rolls the update back with it.
+CREATE OR REPLACE FUNCTION public.end_conversation(
+  p_conversation_id UUID,
+  p_transcript JSONB,
+  p_summary TEXT DEFAULT NULL,
+  p_duration_seconds INTEGER DEFAULT NULL,
+  p_title TEXT DEFAULT NULL,
+  p_elevenlabs_conversation_id TEXT DEFAULT NULL
+)
+RETURNS SETOF public.conversations AS $$
+  WITH ended AS (
+    UPDATE public.conversations
+    SET transcript = p_transcript,
+        summary = COALESCE(p_summary, summary),
+        duration_seconds = COALESCE(p_duration_seconds, duration_seconds),
+        title = COALESCE(p_title, title),
+        elevenlabs_conversation_id = COALESCE(p_elevenlabs_conversation_id, elevenlabs_conversation_id),
+        ended_at = NOW(),
+        updated_at = NOW()
+    WHERE id = p_conversation_id
+      AND ended_at IS NULL
+    RETURNING *
+  ),
+  -- metered by the conversation_logs_usage trigger into usage_counters
+  logged AS (
+    INSERT INTO public.conversation_logs (user_id, duration_seconds)
+    SELECT user_id, p_duration_seconds FROM ended
+    WHERE p_duration_seconds > 0
+  )
+  SELECT * FROM ended;
+$$ LANGUAGE sql;
@@ -0,0 +1,53 @@
+CREATE TABLE IF NOT EXISTS public.jobs (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+
+  kind TEXT NOT NULL,
+  payload JSONB DEFAULT '{}'::jsonb NOT NULL,
+  status TEXT CHECK (status IN ('queued', 'running', 'completed', 'dead')) DEFAULT 'queued' NOT NULL,
+  attempts INTEGER DEFAULT 0 NOT NULL,
+  max_attempts INTEGER DEFAULT 5 NOT NULL,
+  visible_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+  locked_by TEXT,
+  last_error TEXT,
+  started_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Only queued/running rows are ever scanned by claim_job
+CREATE INDEX idx_jobs_claimable ON public.jobs(visible_at) WHERE status IN ('queued', 'running');
+
+-- Service role only; no client policies
+ALTER TABLE public.jobs ENABLE ROW LEVEL SECURITY;
+
+CREATE TRIGGER update_jobs_updated_at BEFORE UPDATE ON public.jobs
+  FOR EACH ROW EXECUTE FUNCTION public.update_updated_at_column();
+
+-- Claims the next visible job; a running job whose visibility timeout has
+-- passed is treated as abandoned and handed to the next worker
+CREATE OR REPLACE FUNCTION public.claim_job(p_worker TEXT, p_visibility_seconds INTEGER)
+RETURNS SETOF public.jobs AS $$
+  UPDATE public.jobs
+  SET status = 'running',
+      attempts = attempts + 1,
+      locked_by = p_worker,
+      started_at = NOW(),
+      visible_at = NOW() + make_interval(secs => p_visibility_seconds)
+  WHERE id = (
+    SELECT id FROM public.jobs
+    WHERE status IN ('queued', 'running') AND visible_at <= NOW()
+    ORDER BY visible_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING *;
+$$ LANGUAGE sql;
+
+CREATE OR REPLACE FUNCTION public.job_queue_stats()
+RETURNS TABLE(status TEXT, jobs BIGINT, oldest TIMESTAMP WITH TIME ZONE) AS $$
+  SELECT status, COUNT(*), MIN(created_at)
+  FROM public.jobs
+  WHERE status <> 'completed'
+  GROUP BY status;
+$$ LANGUAGE sql STABLE;
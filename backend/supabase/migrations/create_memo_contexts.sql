@@ -0,0 +1,14 @@
+-- Precomputed conversation context per user, refreshed by the worker after
+-- each memo is transcribed and tagged, read once by POST /conversations/start
+CREATE TABLE IF NOT EXISTS public.memo_contexts (
+  user_id UUID PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+
+  memo_ids UUID[] DEFAULT '{}' NOT NULL,
+  digest TEXT DEFAULT '' NOT NULL
+);
+
+ALTER TABLE public.memo_contexts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own memo context" ON public.memo_contexts
+  FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,146 @@
+-- Per-user monthly usage, kept current by triggers on the raw rows so quota
+-- checks read one row instead of summing memos and logs
+CREATE TABLE IF NOT EXISTS public.usage_counters (
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  period DATE NOT NULL,
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+  reconciled_at TIMESTAMP WITH TIME ZONE,
+
+  recording_seconds NUMERIC(12, 2) DEFAULT 0 NOT NULL,
+  conversation_seconds INTEGER DEFAULT 0 NOT NULL,
+
+  PRIMARY KEY (user_id, period)
+);
+
+ALTER TABLE public.usage_counters ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own usage" ON public.usage_counters
+  FOR SELECT USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION public.usage_period(p_at TIMESTAMP WITH TIME ZONE)
+RETURNS DATE AS $$
+  SELECT DATE_TRUNC('month', p_at AT TIME ZONE 'utc')::date;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION public.add_usage(
+  p_user_id UUID,
+  p_at TIMESTAMP WITH TIME ZONE,
+  p_recording_seconds NUMERIC,
+  p_conversation_seconds INTEGER
+)
+RETURNS VOID AS $$
+  INSERT INTO public.usage_counters (user_id, period, recording_seconds, conversation_seconds)
+  VALUES (p_user_id, public.usage_period(p_at), p_recording_seconds, p_conversation_seconds)
+  ON CONFLICT (user_id, period) DO UPDATE
+  SET recording_seconds = usage_counters.recording_seconds + EXCLUDED.recording_seconds,
+      conversation_seconds = usage_counters.conversation_seconds + EXCLUDED.conversation_seconds,
+      updated_at = NOW();
+$$ LANGUAGE sql;
+
+-- Recording time is known once the worker stores duration_seconds. Counting
+-- the change rather than the value keeps retried updates from double counting.
+CREATE OR REPLACE FUNCTION public.count_voice_memo_usage()
+RETURNS TRIGGER AS $$
+DECLARE
+  delta NUMERIC;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    delta := COALESCE(NEW.duration_seconds, 0);
+  ELSE
+    delta := COALESCE(NEW.duration_seconds, 0) - COALESCE(OLD.duration_seconds, 0);
+  END IF;
+
+  IF delta <> 0 THEN
+    PERFORM public.add_usage(NEW.user_id, NEW.created_at, delta, 0);
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER voice_memos_usage
+  AFTER INSERT OR UPDATE OF duration_seconds ON public.voice_memos
+  FOR EACH ROW EXECUTE FUNCTION public.count_voice_memo_usage();
+
+CREATE OR REPLACE FUNCTION public.count_conversation_usage()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM public.add_usage(NEW.user_id, COALESCE(NEW.created_at, NOW()), 0, NEW.duration_seconds);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER conversation_logs_usage
+  AFTER INSERT ON public.conversation_logs
+  FOR EACH ROW EXECUTE FUNCTION public.count_conversation_usage();
+
+-- Current month's usage next to the user's tier limits (free without a subscription)
+CREATE OR REPLACE FUNCTION public.get_usage_quota(p_user_id UUID)
+RETURNS TABLE(
+  period DATE,
+  recording_seconds NUMERIC,
+  conversation_seconds INTEGER,
+  recording_limit_seconds INTEGER,
+  conversation_limit_seconds INTEGER
+) AS $$
+  SELECT public.usage_period(NOW()),
+         COALESCE(u.recording_seconds, 0),
+         COALESCE(u.conversation_seconds, 0),
+         t.monthly_recording_minutes * 60,
+         t.monthly_conversation_minutes * 60
+  FROM (
+    SELECT COALESCE(
+      (SELECT tier_id FROM public.user_subscriptions WHERE user_id = p_user_id),
+      'free'
+    ) AS tier_id
+  ) s
+  JOIN public.subscription_tiers t ON t.id = s.tier_id
+  LEFT JOIN public.usage_counters u
+    ON u.user_id = p_user_id AND u.period = public.usage_period(NOW());
+$$ LANGUAGE sql STABLE;
+
+-- Recomputes a month from the raw rows and returns how many counters were off.
+-- Recording time only moves up: deleting a memo does not give minutes back,
+-- but increments a counter missed are recovered. Conversation logs are never
+-- deleted, so that side is set exactly.
+CREATE OR REPLACE FUNCTION public.reconcile_usage(p_period DATE DEFAULT NULL)
+RETURNS INTEGER AS $$
+  WITH bounds AS (
+    SELECT COALESCE(p_period, public.usage_period(NOW())) AS period
+  ),
+  window_bounds AS (
+    SELECT period,
+           period::timestamp AT TIME ZONE 'utc' AS starts_at,
+           (period + INTERVAL '1 month')::timestamp AT TIME ZONE 'utc' AS ends_at
+    FROM bounds
+  ),
+  raw AS (
+    SELECT user_id, SUM(recording) AS recording_seconds, SUM(conversation)::integer AS conversation_seconds
+    FROM (
+      SELECT m.user_id, COALESCE(m.duration_seconds, 0) AS recording, 0 AS conversation
+      FROM public.voice_memos m, window_bounds w
+      WHERE m.created_at >= w.starts_at AND m.created_at < w.ends_at
+      UNION ALL
+      SELECT l.user_id, 0, l.duration_seconds
+      FROM public.conversation_logs l, window_bounds w
+      WHERE l.created_at >= w.starts_at AND l.created_at < w.ends_at
+    ) usage
+    GROUP BY user_id
+  ),
+  fixed AS (
+    INSERT INTO public.usage_counters (user_id, period, recording_seconds, conversation_seconds, reconciled_at)
+    SELECT raw.user_id, w.period, raw.recording_seconds, raw.conversation_seconds, NOW()
+    FROM raw, window_bounds w
+    ON CONFLICT (user_id, period) DO UPDATE
+    SET recording_seconds = GREATEST(usage_counters.recording_seconds, EXCLUDED.recording_seconds),
+        conversation_seconds = EXCLUDED.conversation_seconds,
+        reconciled_at = NOW(),
+        updated_at = NOW()
+    WHERE usage_counters.recording_seconds < EXCLUDED.recording_seconds
+       OR usage_counters.conversation_seconds <> EXCLUDED.conversation_seconds
+    RETURNING 1
+  )
+  SELECT COUNT(*)::integer FROM fixed;
+$$ LANGUAGE sql;
+
+-- Existing usage for the current month
+SELECT public.reconcile_usage();
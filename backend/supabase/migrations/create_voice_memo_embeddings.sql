@@ -0,0 +1,69 @@
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- One transcript embedding per memo, written by the transcription pipeline
+CREATE TABLE IF NOT EXISTS public.voice_memo_embeddings (
+  memo_id UUID PRIMARY KEY REFERENCES public.voice_memos(id) ON DELETE CASCADE,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE NOT NULL,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc'::text, NOW()) NOT NULL,
+
+  model TEXT NOT NULL,
+  embedding vector(1536) NOT NULL
+);
+
+-- Search is always scoped to one user. An exact scan of that user's rows is
+-- a few ms for thousands of memos and has none of the recall loss a global
+-- ANN index shows when most of its candidates are filtered out by user_id.
+CREATE INDEX IF NOT EXISTS idx_voice_memo_embeddings_user ON public.voice_memo_embeddings(user_id);
+
+-- Service role only; no client policies
+ALTER TABLE public.voice_memo_embeddings ENABLE ROW LEVEL SECURITY;
+
+-- Keyword side of hybrid search. 'simple' keeps words as spoken, transcripts
+-- are not all English.
+ALTER TABLE public.voice_memos
+ADD COLUMN IF NOT EXISTS transcript_tsv tsvector
+GENERATED ALWAYS AS (to_tsvector('simple', COALESCE(title, '') || ' ' || COALESCE(transcript, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_voice_memos_transcript_tsv ON public.voice_memos USING GIN(transcript_tsv);
+
+-- content_cache also holds kind = 'embedding', keyed by SHA-256 of model and text
+
+-- Top matches for one user. Pass an embedding, a keyword query or both;
+-- with both, the two rankings are merged by reciprocal rank fusion.
+CREATE OR REPLACE FUNCTION public.search_voice_memos(
+  p_user_id UUID,
+  p_embedding vector(1536) DEFAULT NULL,
+  p_query TEXT DEFAULT NULL,
+  p_match_count INTEGER DEFAULT 10
+)
+RETURNS TABLE(memo_id UUID, score DOUBLE PRECISION, similarity DOUBLE PRECISION, keyword_rank REAL) AS $$
+  WITH semantic AS (
+    SELECT e.memo_id,
+           1 - (e.embedding <=> p_embedding) AS similarity,
+           ROW_NUMBER() OVER (ORDER BY e.embedding <=> p_embedding) AS rank
+    FROM public.voice_memo_embeddings e
+    WHERE p_embedding IS NOT NULL
+      AND e.user_id = p_user_id
+    ORDER BY e.embedding <=> p_embedding
+    LIMIT p_match_count * 4
+  ),
+  keyword AS (
+    SELECT m.id AS memo_id,
+           ts_rank_cd(m.transcript_tsv, q) AS keyword_rank,
+           ROW_NUMBER() OVER (ORDER BY ts_rank_cd(m.transcript_tsv, q) DESC) AS rank
+    FROM public.voice_memos m, websearch_to_tsquery('simple', p_query) q
+    WHERE COALESCE(p_query, '') <> ''
+      AND m.user_id = p_user_id
+      AND m.transcript_tsv @@ q
+    ORDER BY keyword_rank DESC
+    LIMIT p_match_count * 4
+  )
+  SELECT COALESCE(s.memo_id, k.memo_id),
+         COALESCE(1.0 / (60 + s.rank), 0) + COALESCE(1.0 / (60 + k.rank), 0),
+         s.similarity,
+         k.keyword_rank
+  FROM semantic s
+  FULL OUTER JOIN keyword k ON s.memo_id = k.memo_id
+  ORDER BY 2 DESC
+  LIMIT p_match_count;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,33 @@
+-- A running job whose visibility timeout expired on its last attempt is
+-- buried instead of being handed out again past max_attempts
+CREATE OR REPLACE FUNCTION public.claim_job(p_worker TEXT, p_visibility_seconds INTEGER)
+RETURNS SETOF public.jobs AS $$
+  UPDATE public.jobs
+  SET status = 'dead',
+      locked_by = NULL,
+      finished_at = NOW(),
+      last_error = COALESCE(last_error, 'visibility timeout expired')
+  WHERE status = 'running'
+    AND visible_at <= NOW()
+    AND attempts >= max_attempts;
+
+  UPDATE public.jobs
+  SET status = 'running',
+      attempts = attempts + 1,
+      locked_by = p_worker,
+      started_at = NOW(),
+      visible_at = NOW() + make_interval(secs => p_visibility_seconds)
+  WHERE id = (
+    SELECT id FROM public.jobs
+    WHERE status IN ('queued', 'running')
+      AND visible_at <= NOW()
+      AND attempts < max_attempts
+    ORDER BY visible_at
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING *;
+$$ LANGUAGE sql;
+
+-- complete and fail filter on (id, status, locked_by), so a worker whose
+-- lease was taken over can't overwrite the new holder's outcome
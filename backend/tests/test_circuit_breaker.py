@@ -0,0 +1,153 @@
+import asyncio
+import httpx
+import pytest
+from clients.http import ProviderError, ProviderHTTPClient
+from clients.rate_limit import CircuitBreaker, CircuitOpenError
+from config import config
+
+
+def _open(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.threshold):
+        breaker.before_request()
+        breaker.record(False)
+
+
+def _expire(breaker: CircuitBreaker) -> None:
+    breaker._opened_at -= breaker.reset_seconds
+
+
+def test_opens_after_threshold_consecutive_failures():
+    breaker = CircuitBreaker("test", threshold=3, reset_seconds=30)
+    breaker.record(False)
+    breaker.record(False)
+    breaker.record(True)
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record(False)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = CircuitBreaker("test", threshold=2, reset_seconds=30)
+    _open(breaker)
+    _expire(breaker)
+
+    assert breaker.before_request() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_successful_probe_closes():
+    breaker = CircuitBreaker("test", threshold=2, reset_seconds=30)
+    _open(breaker)
+    _expire(breaker)
+    breaker.before_request()
+    breaker.record(True)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.before_request() is False
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker("test", threshold=2, reset_seconds=30)
+    _open(breaker)
+    _expire(breaker)
+    breaker.before_request()
+    breaker.record(False)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_abandoned_probe_lets_the_next_request_probe():
+    breaker = CircuitBreaker("test", threshold=2, reset_seconds=30)
+    _open(breaker)
+    _expire(breaker)
+    breaker.before_request()
+    breaker.abandon_probe()
+
+    assert breaker.before_request() is True
+
+
+def _client(handler, monkeypatch) -> ProviderHTTPClient:
+    monkeypatch.setattr(config, "outbound_max_attempts", 1)
+    client = ProviderHTTPClient("test", "http://provider.test", timeout=5, max_connections=4)
+    client.client._transport = httpx.MockTransport(handler)
+    client.breaker = CircuitBreaker("test", threshold=2, reset_seconds=30)
+    _open(client.breaker)
+    _expire(client.breaker)
+    return client
+
+
+def test_cancelled_probe_releases_the_breaker_and_the_limiter(monkeypatch):
+    async def scenario():
+        started = asyncio.Event()
+
+        async def hang(request):
+            started.set()
+            await asyncio.sleep(60)
+
+        client = _client(hang, monkeypatch)
+        task = asyncio.create_task(client.get("/"))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await client.aclose()
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.breaker.before_request() is True
+    assert client.limiter.in_flight == 0
+
+
+def test_throttled_probe_reopens(monkeypatch):
+    async def scenario():
+        client = _client(lambda request: httpx.Response(429), monkeypatch)
+        response = await client.get("/")
+        await client.aclose()
+        return client, response
+
+    client, response = asyncio.run(scenario())
+
+    assert response.status_code == 429
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+
+def test_transport_error_on_probe_reopens(monkeypatch):
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    async def scenario():
+        client = _client(refuse, monkeypatch)
+        with pytest.raises(ProviderError):
+            await client.get("/")
+        await client.aclose()
+        return client
+
+    client = asyncio.run(scenario())
+
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.limiter.in_flight == 0
+
+
+def test_successful_probe_closes_the_client_breaker(monkeypatch):
+    async def scenario():
+        client = _client(lambda request: httpx.Response(200, json={}), monkeypatch)
+        response = await client.get("/")
+        await client.aclose()
+        return client, response
+
+    client, response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert client.breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,95 @@
+import asyncio
+import uuid
+import pytest
+from benchmarks.fakes import FakeSupabase
+from clients.response_cache import MemoryResponseCache
+from clients.supabase import SupabaseClient
+from services.conversation_webhooks import ingest_conversation
+from services.database_service import DatabaseService
+
+USER_ID = str(uuid.uuid4())
+
+
+@pytest.fixture
+def supabase():
+    fake = FakeSupabase()
+    client = SupabaseClient()
+    fake.install(client)
+    yield fake, DatabaseService(client, MemoryResponseCache(max_entries=0))
+    client.close()
+
+
+def _webhook(**variables):
+    return {
+        "elevenlabs_conversation_id": f"el-{uuid.uuid4()}",
+        "transcript": [{"role": "user", "message": "hello", "time_in_call_secs": 0}],
+        "summary": "greeting",
+        "title": "Hello",
+        "duration_seconds": 42,
+        "dynamic_variables": variables
+    }
+
+
+def _started(fake: FakeSupabase, user_id: str = USER_ID):
+    return fake.insert("conversations", {"user_id": user_id, "elevenlabs_conversation_id": None, "ended_at": None})
+
+
+def test_redelivered_webhook_is_logged_once(supabase):
+    fake, database_service = supabase
+    conversation = _started(fake)
+    webhook = _webhook(conversation_id=conversation["id"])
+
+    first = asyncio.run(ingest_conversation(webhook, database_service))
+    second = asyncio.run(ingest_conversation(webhook, database_service))
+
+    assert first == second == conversation["id"]
+    assert len(fake.table("conversations")) == 1
+    assert [log["duration_seconds"] for log in fake.table("conversation_logs").values()] == [42]
+
+
+def test_concurrent_deliveries_are_logged_once(supabase):
+    fake, database_service = supabase
+    conversation = _started(fake)
+    webhook = _webhook(conversation_id=conversation["id"])
+
+    async def scenario():
+        return await asyncio.gather(*(ingest_conversation(webhook, database_service) for _ in range(5)))
+
+    assert set(asyncio.run(scenario())) == {conversation["id"]}
+    assert len(fake.table("conversation_logs")) == 1
+    assert fake.table("conversations")[conversation["id"]]["transcript"] == webhook["transcript"]
+
+
+def test_forged_user_id_does_not_charge_that_user(supabase):
+    fake, database_service = supabase
+    victim = str(uuid.uuid4())
+    conversation = _started(fake)
+    webhook = _webhook(user_id=victim, conversation_id=conversation["id"])
+
+    assert asyncio.run(ingest_conversation(webhook, database_service)) == conversation["id"]
+    assert [row["user_id"] for row in fake.table("conversations").values()] == [USER_ID]
+    assert [log["user_id"] for log in fake.table("conversation_logs").values()] == [USER_ID]
+
+
+def test_forged_user_id_without_a_started_conversation_is_dropped(supabase):
+    fake, database_service = supabase
+
+    assert asyncio.run(ingest_conversation(_webhook(user_id=USER_ID), database_service)) is None
+    webhook = _webhook(user_id=USER_ID, conversation_id=str(uuid.uuid4()))
+    assert asyncio.run(ingest_conversation(webhook, database_service)) is None
+    assert fake.table("conversations") == {}
+    assert fake.table("conversation_logs") == {}
+
+
+def test_conversation_bound_to_another_session_is_not_ended(supabase):
+    fake, database_service = supabase
+    conversation = fake.insert("conversations", {
+        "user_id": USER_ID,
+        "elevenlabs_conversation_id": "el-other",
+        "ended_at": None
+    })
+    webhook = _webhook(conversation_id=conversation["id"])
+
+    assert asyncio.run(ingest_conversation(webhook, database_service)) is None
+    assert fake.table("conversations")[conversation["id"]]["ended_at"] is None
+    assert fake.table("conversation_logs") == {}
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from clients.job_queue import LeaseLostError, SQLiteJobQueue
+from config import config
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "job_max_attempts", 2)
+    return SQLiteJobQueue(str(tmp_path / "jobs.db"))
+
+
+def test_claimed_job_is_invisible_until_its_lease_expires(queue):
+    async def scenario():
+        await queue.enqueue("kind", {"n": 1})
+        job = await queue.claim("a", visibility_timeout=60)
+        return job, await queue.claim("b", visibility_timeout=60)
+
+    job, other = asyncio.run(scenario())
+
+    assert job.payload == {"n": 1}
+    assert job.attempts == 1
+    assert job.locked_by == "a"
+    assert other is None
+
+
+def test_worker_that_lost_its_lease_cannot_complete(queue):
+    async def scenario():
+        await queue.enqueue("kind", {})
+        stale = await queue.claim("a", visibility_timeout=0)
+        current = await queue.claim("b", visibility_timeout=60)
+        with pytest.raises(LeaseLostError):
+            await queue.complete(stale)
+        with pytest.raises(LeaseLostError):
+            await queue.fail(stale, "late", retry_delay=0)
+        await queue.complete(current)
+        return current, await queue.stats()
+
+    current, stats = asyncio.run(scenario())
+
+    assert current.attempts == 2
+    assert stats["running"] == 0
+    assert stats["depth"] == 0
+    assert stats["dead"] == 0
+
+
+def test_lease_expired_on_the_last_attempt_buries_the_job(queue):
+    async def scenario():
+        await queue.enqueue("kind", {})
+        await queue.claim("a", visibility_timeout=0)
+        await queue.claim("b", visibility_timeout=0)
+        return await queue.claim("c", visibility_timeout=60), await queue.stats()
+
+    job, stats = asyncio.run(scenario())
+
+    assert job is None
+    assert stats["dead"] == 1
+    assert stats["running"] == 0
+
+
+def test_fail_requeues_until_the_last_attempt(queue):
+    async def scenario():
+        await queue.enqueue("kind", {})
+        job = await queue.claim("a", visibility_timeout=60)
+        await queue.fail(job, "boom", retry_delay=0)
+        retried = await queue.claim("a", visibility_timeout=60)
+        await queue.fail(retried, "boom", retry_delay=0)
+        return retried, await queue.stats()
+
+    retried, stats = asyncio.run(scenario())
+
+    assert retried.attempts == 2
+    assert stats["dead"] == 1
+    assert stats["depth"] == 0
+
+
+def test_fail_without_retry_delay_buries_the_job(queue):
+    async def scenario():
+        await queue.enqueue("kind", {})
+        job = await queue.claim("a", visibility_timeout=60)
+        await queue.fail(job, "not retryable", retry_delay=None)
+        return await queue.claim("a", visibility_timeout=60), await queue.stats()
+
+    job, stats = asyncio.run(scenario())
+
+    assert job is None
+    assert stats["dead"] == 1
@@ -0,0 +1,55 @@
+import base64
+import json
+import uuid
+import pytest
+from fastapi import HTTPException
+from services.pagination import decode_cursor, encode_cursor, paginate
+
+
+def _rows(count: int):
+    return [
+        {"id": str(uuid.uuid4()), "created_at": f"2026-01-{31 - i:02d}T12:00:00+00:00"}
+        for i in range(count)
+    ]
+
+
+def _raw_cursor(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    row = _rows(1)[0]
+    assert decode_cursor(encode_cursor(row)) == (row["created_at"], row["id"])
+
+
+def test_no_cursor_is_the_first_page():
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    _raw_cursor({"created_at": "2026-01-01T00:00:00+00:00"}),
+    _raw_cursor(["2026-01-01T00:00:00+00:00"]),
+    # both values are interpolated into the keyset filter
+    _raw_cursor(["2026-01-01,id.gt.0", str(uuid.uuid4())]),
+    _raw_cursor(["2026-01-01T00:00:00+00:00", "x),user_id.neq.(y"]),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_last_page_has_no_cursor():
+    rows = _rows(3)
+    page, cursor = paginate(rows, limit=3)
+    assert page == rows
+    assert cursor is None
+
+
+def test_full_page_points_at_its_last_row():
+    rows = _rows(4)
+    page, cursor = paginate(rows, limit=3)
+    assert page == rows[:3]
+    assert decode_cursor(cursor) == (rows[2]["created_at"], rows[2]["id"])
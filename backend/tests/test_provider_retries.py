@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+import time
+import httpx
+import pytest
+from benchmarks.fakes import FakeElevenLabs, FakeOpenAI, FakeSupabase, install
+from clients.http import ProviderError
+from clients.job_queue import SQLiteJobQueue
+from clients.registry import registry
+from config import config
+from services.job_worker import JobWorker
+from worker import HANDLERS
+
+
+@pytest.mark.parametrize("status, retryable", [(429, True), (500, True), (503, True), ("ConnectError", True), (400, False), (401, False), (422, False)])
+def test_only_transient_failures_are_retryable(status, retryable):
+    assert ProviderError("test", status).retryable is retryable
+
+
+def test_retry_after_is_carried_from_the_response():
+    response = httpx.Response(429, headers={"retry-after": "120"})
+    assert ProviderError.from_response("test", response).retry_after == 120
+
+
+def test_long_retry_after_requeues_the_job_instead_of_failing_the_memo(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ffmpeg_path", "missing-ffmpeg")
+    monkeypatch.setattr(config, "job_max_attempts", 5)
+    supabase = FakeSupabase()
+    audio = tmp_path / "memo.webm"
+    audio.write_bytes(b"audio")
+
+    async def scenario():
+        install(registry, supabase, FakeElevenLabs(), FakeOpenAI())
+        # longer than outbound_max_retry_after_seconds, so the client hands the 429 back
+        registry.http["elevenlabs"].client._transport = httpx.MockTransport(
+            lambda request: httpx.Response(429, headers={"retry-after": "600"})
+        )
+        memo = supabase.insert("voice_memos", {"user_id": "user", "transcript_status": "pending", "tags": []})
+        queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+        await queue.enqueue("transcribe_voice_memo", {"memo_id": memo["id"], "user_id": "user", "local_path": str(audio)})
+        try:
+            outcome = await JobWorker(queue, HANDLERS)._run(await queue.claim("test", 60))
+        finally:
+            await registry.shutdown()
+        return memo, outcome
+
+    started = time.time()
+    memo, outcome = asyncio.run(scenario())
+
+    assert outcome == "retried"
+    assert supabase.table("voice_memos")[memo["id"]]["transcript_status"] == "pending"
+    with sqlite3.connect(tmp_path / "jobs.db") as conn:
+        status, visible_at = conn.execute("SELECT status, visible_at FROM jobs").fetchone()
+    assert status == "queued"
+    assert visible_at >= started + 600
+    assert audio.exists()
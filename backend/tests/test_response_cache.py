@@ -0,0 +1,105 @@
+import asyncio
+import time
+from starlette.requests import Request
+from clients.response_cache import CachedResponse, MemoryResponseCache
+from config import config
+from services.http_cache import cached_read
+
+
+def _request(path: str = "/api/v1/voice-memos") -> Request:
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
+
+def test_set_after_invalidation_is_dropped():
+    async def scenario():
+        cache = MemoryResponseCache(max_entries=10)
+        generation = await cache.generation("user")
+        # a write lands while the old payload is still loading
+        await cache.invalidate_user("user")
+        await cache.set("user", "key", CachedResponse(etag='"a"', body=b"[]"), ttl=60, generation=generation)
+        return await cache.get("user", "key"), await cache.stats()
+
+    cached, stats = asyncio.run(scenario())
+
+    assert cached is None
+    assert stats["stale_writes"] == 1
+
+
+def test_set_in_current_generation_is_served():
+    async def scenario():
+        cache = MemoryResponseCache(max_entries=10)
+        generation = await cache.generation("user")
+        await cache.set("user", "key", CachedResponse(etag='"a"', body=b"[]"), ttl=60, generation=generation)
+        return await cache.get("user", "key")
+
+    assert asyncio.run(scenario()).body == b"[]"
+
+
+def test_invalidation_only_affects_that_user():
+    async def scenario():
+        cache = MemoryResponseCache(max_entries=10)
+        for user_id in ("a", "b"):
+            await cache.set(user_id, "key", CachedResponse(etag='"a"', body=b"[]"), ttl=60, generation=0)
+        await cache.invalidate_user("a")
+        return await cache.get("a", "key"), await cache.get("b", "key")
+
+    a, b = asyncio.run(scenario())
+
+    assert a is None
+    assert b is not None
+
+
+def test_cached_read_does_not_cache_a_payload_loaded_across_an_invalidation():
+    async def scenario():
+        cache = MemoryResponseCache(max_entries=10)
+        loads = []
+
+        async def load():
+            loads.append(len(loads))
+            if len(loads) == 1:
+                # the worker stores a transcript while this read is in flight
+                await cache.invalidate_user("user")
+                return [{"id": "memo", "transcript": None}]
+            return [{"id": "memo", "transcript": "hello"}]
+
+        first = await cached_read(_request(), cache, "user", load)
+        second = await cached_read(_request(), cache, "user", load)
+        third = await cached_read(_request(), cache, "user", load)
+        return first, second, third, loads
+
+    first, second, third, loads = asyncio.run(scenario())
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "MISS"
+    assert b"hello" in second.body
+    assert third.headers["X-Cache"] == "HIT"
+    assert third.body == second.body
+    assert len(loads) == 2
+
+
+def _cached_ttl(cache: MemoryResponseCache, memo) -> float:
+    async def load():
+        return memo
+
+    asyncio.run(cached_read(_request(), cache, "user", load))
+    (expires_at, _), = cache._entries.values()
+    return expires_at - time.monotonic()
+
+
+def test_completed_memo_waiting_for_tags_gets_the_pending_ttl():
+    memo = {"id": "memo", "transcript_status": "completed", "tags": []}
+    assert _cached_ttl(MemoryResponseCache(max_entries=10), memo) <= config.response_cache_pending_ttl_seconds
+
+
+def test_tagged_memo_gets_the_full_ttl():
+    memo = {"id": "memo", "transcript_status": "completed", "tags": ["work"]}
+    assert _cached_ttl(MemoryResponseCache(max_entries=10), memo) > config.response_cache_pending_ttl_seconds
+
+
+def test_shared_cache_keeps_untagged_memos_for_the_full_ttl():
+    class SharedCache(MemoryResponseCache):
+        # stands in for redis: the worker's invalidations reach it
+        shared = True
+
+    memo = {"id": "memo", "transcript_status": "completed", "tags": []}
+    assert _cached_ttl(SharedCache(max_entries=10), memo) > config.response_cache_pending_ttl_seconds
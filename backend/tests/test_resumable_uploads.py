@@ -0,0 +1,30 @@
+import pytest
+from fastapi import HTTPException
+from config import config
+from services.upload_service import ResumableUploadService
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "upload_staging_dir", str(tmp_path))
+    return ResumableUploadService()
+
+
+@pytest.mark.parametrize("length", [0, -1])
+def test_non_positive_length_is_rejected(uploads, tmp_path, length):
+    with pytest.raises(HTTPException) as error:
+        uploads.create("user", length, "memo.webm", "audio/webm")
+    assert error.value.status_code == 400
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_length_over_the_limit_is_rejected(uploads):
+    with pytest.raises(HTTPException) as error:
+        uploads.create("user", config.max_upload_bytes + 1, "memo.webm", "audio/webm")
+    assert error.value.status_code == 413
+
+
+def test_upload_starts_at_offset_zero(uploads):
+    upload = uploads.create("user", 1024, "memo.webm", "audio/webm")
+    assert upload["offset"] == 0
+    assert upload["length"] == 1024
@@ -0,0 +1,75 @@
+import asyncio
+from clients.event_bus import MemoryEventBus
+from services.job_worker import JobWorker
+from services.status_events import MemoWatch, status_stream
+
+
+def _row(memo_id, status, tags=None):
+    return {"id": memo_id, "transcript_status": status, "tags": tags}
+
+
+def test_memo_is_watched_until_its_tags_arrive():
+    watch = MemoWatch(tag_wait_polls=3)
+    watch.update([_row("a", "pending")])
+    events = watch.update([_row("a", "completed")])
+    assert watch.watching == ["a"]
+
+    events += watch.update([_row("a", "completed", ["work"])])
+
+    assert [event["type"] for event in events] == ["transcript", "tags"]
+    assert watch.watching == []
+
+
+def test_memo_that_never_gets_tags_stops_being_watched():
+    watch = MemoWatch(tag_wait_polls=3)
+    watch.update([_row("a", "pending")])
+    for _ in range(2):
+        watch.update([_row("a", "completed", [])])
+        assert watch.watching == ["a"]
+
+    watch.update([_row("a", "completed", [])])
+
+    assert watch.watching == []
+
+
+def test_failed_and_deleted_memos_are_forgotten():
+    watch = MemoWatch()
+    watch.update([_row("a", "pending"), _row("b", "pending")])
+
+    watch.update([_row("a", "failed")])
+
+    assert watch.watching == []
+
+
+class CountingDatabase:
+    def __init__(self):
+        self.reads = 0
+
+    async def get_voice_memo_statuses(self, user_id, memo_ids=None):
+        self.reads += 1
+        return []
+
+
+def _reads_while_streaming(monkeypatch, running: int) -> int:
+    monkeypatch.setattr(JobWorker, "running", running)
+    database = CountingDatabase()
+
+    async def never_disconnected():
+        return False
+
+    async def scenario():
+        stream = status_stream(MemoryEventBus(10), database, "user", never_disconnected, heartbeat=0.05, poll_interval=0.01)
+        await stream.__anext__()
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(scenario())
+    return database.reads
+
+
+def test_memory_bus_polls_when_jobs_run_elsewhere(monkeypatch):
+    assert _reads_while_streaming(monkeypatch, running=0) > 0
+
+
+def test_memory_bus_does_not_poll_next_to_an_in_process_worker(monkeypatch):
+    assert _reads_while_streaming(monkeypatch, running=1) == 0
@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import pytest
+from benchmarks.fakes import FakeSupabase
+from clients.job_queue import SQLiteJobQueue
+from clients.response_cache import MemoryResponseCache
+from clients.supabase import SupabaseClient
+from clients.vector_index import MemoryVectorIndex
+from services.database_service import DatabaseService
+from services.voice_memo_service import VoiceMemoService
+
+AUDIO = b"the same recording, uploaded twice"
+
+
+@pytest.fixture
+def service(tmp_path):
+    fake = FakeSupabase()
+    client = SupabaseClient()
+    fake.install(client)
+    database_service = DatabaseService(client, MemoryResponseCache(max_entries=0))
+    yield fake, VoiceMemoService(client, database_service, SQLiteJobQueue(str(tmp_path / "jobs.db")), MemoryVectorIndex())
+    client.close()
+
+
+def test_concurrent_retries_of_one_upload_create_one_memo(service):
+    fake, voice_memo_service = service
+
+    async def scenario():
+        return await asyncio.gather(*(
+            voice_memo_service.upload_voice_memo("user", AUDIO, "memo.webm", "audio/webm")
+            for _ in range(4)
+        ))
+
+    memos = asyncio.run(scenario())
+
+    assert len(fake.table("voice_memos")) == 1
+    assert {memo["id"] for memo in memos} == set(fake.table("voice_memos"))
+    assert sum(1 for memo in memos if not memo.get("deduplicated")) == 1
+
+
+def test_memos_without_a_hash_never_conflict(service):
+    fake, voice_memo_service = service
+
+    async def scenario():
+        for _ in range(2):
+            await voice_memo_service.database_service.create_voice_memo("user", "https://storage/audio.webm")
+
+    asyncio.run(scenario())
+
+    assert len(fake.table("voice_memos")) == 2
+
+
+def test_same_audio_from_another_user_is_not_deduplicated(service):
+    fake, voice_memo_service = service
+
+    async def scenario():
+        for user_id in ("a", "b"):
+            await voice_memo_service.upload_voice_memo(user_id, AUDIO, "memo.webm", "audio/webm")
+
+    asyncio.run(scenario())
+
+    content_hash = hashlib.sha256(AUDIO).hexdigest()
+    assert sorted(memo["user_id"] for memo in fake.table("voice_memos").values() if memo["content_hash"] == content_hash) == ["a", "b"]
@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import logging
+import signal
+from prometheus_client import start_http_server
+from clients.registry import registry
+from clients.job_queue import Job
+from config import config
+from services.background_tasks import enrich_voice_memo, process_voice_memo
+from services.conversation_webhooks import ingest_conversation
+from services.database_service import DatabaseService
+from services.job_worker import JobWorker
+
+logger = logging.getLogger("worker")
+
+
+async def transcribe_voice_memo_job(job: Job) -> None:
+    await process_voice_memo(
+        job.payload["memo_id"],
+        job.payload["user_id"],
+        storage_path=job.payload.get("storage_path"),
+        local_path=job.payload.get("local_path"),
+        content_hash=job.payload.get("content_hash"),
+        final_attempt=job.final_attempt
+    )
+
+
+async def enrich_voice_memo_job(job: Job) -> None:
+    await enrich_voice_memo(job.payload["memo_id"], job.payload["user_id"])
+
+
+async def ingest_conversation_job(job: Job) -> None:
+    await ingest_conversation(job.payload)
+
+
+HANDLERS = {
+    "transcribe_voice_memo": transcribe_voice_memo_job,
+    "enrich_voice_memo": enrich_voice_memo_job,
+    "ingest_conversation": ingest_conversation_job,
+}
+
+
+async def _report(worker: JobWorker, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            logger.info("queue stats: %s", await worker.stats())
+        except Exception:
+            logger.exception("Failed to read queue stats")
+
+
+async def _reconcile(interval: float) -> None:
+    # triggers keep usage_counters current; this only repairs drift
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            fixed = await DatabaseService(registry.supabase).reconcile_usage()
+            if fixed:
+                logger.info("reconciled %d usage counters", fixed)
+        except Exception:
+            logger.exception("Failed to reconcile usage counters")
+
+
+async def main(
+    concurrency: int,
+    stats_interval: float,
+    reconcile_interval: float,
+    metrics_port: int = 0
+) -> None:
+    if config.vector_index_backend == "memory":
+        # the API would search an index this process fills and it never sees
+        raise SystemExit("VECTOR_INDEX_BACKEND=memory only works in a single process, use pgvector with worker.py")
+    registry.startup()
+    if metrics_port and config.metrics_enabled:
+        # pipeline stage and provider timings are recorded here, not in the API process
+        start_http_server(metrics_port)
+    worker = JobWorker(registry.job_queue, HANDLERS, concurrency=concurrency)
+    
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    
+    reporter = asyncio.create_task(_report(worker, stats_interval))
+    reconciler = asyncio.create_task(_reconcile(reconcile_interval))
+    logger.info("%s started with concurrency %d", worker.worker_id, concurrency)
+    try:
+        # in-flight jobs finish before run() returns
+        await worker.run()
+    finally:
+        reporter.cancel()
+        reconciler.cancel()
+        await registry.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sonanta background job worker")
+    parser.add_argument("--concurrency", type=int, default=config.worker_concurrency)
+    parser.add_argument("--stats-interval", type=float, default=60.0)
+    parser.add_argument("--reconcile-interval", type=float, default=config.usage_reconcile_interval_seconds)
+    parser.add_argument("--metrics-port", type=int, default=config.worker_metrics_port)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(main(args.concurrency, args.stats_interval, args.reconcile_interval, args.metrics_port))